@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark of backends of caches.
+
+Compares CacheTable using SQLAlchemy, SqliteCacheTable using sqlite3
+module in the standard library, and DirectoryCacheTable saving files in times
+to import modules, per-lookup costs of hits and misses, and times to write
+results.
+"""
+
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from clang_tidy_checker.cache_backend import ICacheTable
+from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.directory_cache_table import DirectoryCacheTable
+from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+NUM_ENTRIES = 10000
+NUM_IMPORT_REPETITIONS = 5
+RESULT = CheckResult(exit_code=1, stdout="file.cpp:1:2: warning: test\n", stderr="")
+
+BACKENDS: typing.Dict[str, typing.Tuple[str, typing.Callable[[str], ICacheTable]]] = {
+    "sqlalchemy": (
+        "clang_tidy_checker.cache_table",
+        lambda filepath: create_cache_table_at(filepath, max_cache_entries=NUM_ENTRIES),
+    ),
+    "sqlite3": (
+        "clang_tidy_checker.sqlite_cache_table",
+        lambda filepath: SqliteCacheTable(filepath, max_cache_entries=NUM_ENTRIES),
+    ),
+    "directory": (
+        "clang_tidy_checker.directory_cache_table",
+        lambda filepath: DirectoryCacheTable(filepath, max_cache_entries=NUM_ENTRIES),
+    ),
+}
+
+
+def measure_import_time(module: str) -> float:
+    """Measure the minimum time to import a module in a new process."""
+    times = []
+    for _ in range(NUM_IMPORT_REPETITIONS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def measure(table: ICacheTable) -> typing.Tuple[float, float, float]:
+    """Measure the time to save results and per-lookup times of hits and misses."""
+    start = time.perf_counter()
+    for i in range(NUM_ENTRIES):
+        table.save(source_hash=f"hash{i}", result=RESULT)
+    table.flush()
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(NUM_ENTRIES):
+        assert table.load(source_hash=f"hash{i}") is not None
+    hit_time = (time.perf_counter() - start) / NUM_ENTRIES
+
+    start = time.perf_counter()
+    for i in range(NUM_ENTRIES):
+        assert table.load(source_hash=f"none{i}") is None
+    miss_time = (time.perf_counter() - start) / NUM_ENTRIES
+    return save_time, hit_time, miss_time
+
+
+def main() -> None:
+    """Run the benchmark."""
+    python_time = measure_import_time("sys")
+    print(f"Entries: {NUM_ENTRIES}")
+    print(
+        f"{'backend':<11} {'import [ms]':>12} {'save [s]':>9} "
+        f"{'hit [us]':>9} {'miss [us]':>10}"
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, (module, create_table) in BACKENDS.items():
+            import_time = measure_import_time(module) - python_time
+            table = create_table(str(pathlib.Path(temp_dir) / f"{name}.db"))
+            save_time, hit_time, miss_time = measure(table)
+            print(
+                f"{name:<11} {import_time * 1e3:12.0f} {save_time:9.3f} "
+                f"{hit_time * 1e6:9.1f} {miss_time * 1e6:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Benchmark of sizes and throughput of the cache with compressed outputs.
+
+Compares CacheTable with a table of the previous layout storing outputs
+as plain texts, using synthetic outputs of clang-tidy with many warnings.
+Some outputs are shared among entries as in warnings of common headers.
+"""
+
+import datetime
+import os
+import pathlib
+import tempfile
+import time
+import typing
+
+import sqlalchemy
+
+from clang_tidy_checker.cache_table import CacheTable
+from clang_tidy_checker.check_result import CheckResult
+
+NUM_ENTRIES = 1000
+NUM_WARNINGS_PER_ENTRY = 300
+NUM_DISTINCT_OUTPUTS = 100
+
+
+def create_result(index: int) -> CheckResult:
+    """Create a synthetic result of clang-tidy."""
+    lines = []
+    for i in range(NUM_WARNINGS_PER_ENTRY):
+        lines.append(
+            f"/proj/src/module{index}/file{index}.cpp:{i + 1}:{i % 80 + 1}: "
+            f"warning: variable 'value{i}' is not initialized "
+            "[cppcoreguidelines-init-variables]\n"
+            f"    int value{i};\n"
+            "        ^\n"
+            "                 = 0\n"
+        )
+    return CheckResult(
+        exit_code=1,
+        stdout="".join(lines),
+        stderr=f"{NUM_WARNINGS_PER_ENTRY} warnings generated.\n",
+    )
+
+
+def create_plain_table(engine: sqlalchemy.Engine) -> sqlalchemy.Table:
+    """Create a table of the previous layout."""
+    metadata = sqlalchemy.MetaData()
+    table = sqlalchemy.Table(
+        "cached_result",
+        metadata,
+        sqlalchemy.Column("source_hash", sqlalchemy.String(100), primary_key=True),
+        sqlalchemy.Column("exit_code", sqlalchemy.Integer),
+        sqlalchemy.Column("stdout", sqlalchemy.String),
+        sqlalchemy.Column("stderr", sqlalchemy.String),
+        sqlalchemy.Column("created_at", sqlalchemy.DateTime),
+    )
+    metadata.create_all(engine)
+    return table
+
+
+def measure_plain(
+    filepath: pathlib.Path, results: typing.List[CheckResult]
+) -> typing.Tuple[float, float]:
+    """Measure times to save and load results in the previous layout."""
+    engine = sqlalchemy.create_engine(f"sqlite:///{filepath}")
+    table = create_plain_table(engine)
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(
+            table.insert(),
+            [
+                {
+                    "source_hash": f"hash{i}",
+                    "exit_code": result.exit_code,
+                    "stdout": result.stdout,
+                    "stderr": result.stderr,
+                    "created_at": datetime.datetime.now(),
+                }
+                for i, result in enumerate(results)
+            ],
+        )
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        loaded = [
+            CheckResult(exit_code=row.exit_code, stdout=row.stdout, stderr=row.stderr)
+            for row in connection.execute(sqlalchemy.select(table))
+        ]
+    load_time = time.perf_counter() - start
+    assert len(loaded) == len(results)
+    engine.dispose()
+    return save_time, load_time
+
+
+def measure_compressed(
+    filepath: pathlib.Path, results: typing.List[CheckResult]
+) -> typing.Tuple[float, float]:
+    """Measure times to save and load results in CacheTable."""
+    engine = sqlalchemy.create_engine(f"sqlite:///{filepath}")
+    table = CacheTable(
+        engine=engine, max_cache_entries=NUM_ENTRIES, write_batch_size=NUM_ENTRIES
+    )
+
+    start = time.perf_counter()
+    for i, result in enumerate(results):
+        table.save(source_hash=f"hash{i}", result=result)
+    table.flush()
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded = table.load_many(f"hash{i}" for i in range(len(results)))
+    load_time = time.perf_counter() - start
+    assert len(loaded) == len(results)
+    engine.dispose()
+    return save_time, load_time
+
+
+def main() -> None:
+    """Run the benchmark."""
+    results = [create_result(i % NUM_DISTINCT_OUTPUTS) for i in range(NUM_ENTRIES)]
+    output_size = sum(len(result.stdout) + len(result.stderr) for result in results)
+    print(
+        f"Entries: {NUM_ENTRIES} ({NUM_DISTINCT_OUTPUTS} distinct outputs), "
+        f"outputs: {output_size / 1e6:.1f} MB"
+    )
+    print(f"{'layout':<11} {'size [MB]':>10} {'save [MB/s]':>12} {'load [MB/s]':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, function in [
+            ("plain", measure_plain),
+            ("compressed", measure_compressed),
+        ]:
+            filepath = pathlib.Path(temp_dir) / f"{name}.db"
+            save_time, load_time = function(filepath, results)
+            print(
+                f"{name:<11} {os.path.getsize(filepath) / 1e6:10.1f} "
+                f"{output_size / 1e6 / save_time:12.1f} "
+                f"{output_size / 1e6 / load_time:12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
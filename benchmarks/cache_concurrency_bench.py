@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark of writes to a cache from multiple processes.
+
+Compares an engine with default settings of SQLite with the engine created
+by create_engine_at (WAL, busy timeout, and retries of transactions),
+counting failed processes and lost writes.
+"""
+
+import multiprocessing
+import pathlib
+import tempfile
+import time
+
+import sqlalchemy
+
+from clang_tidy_checker.cache_table import CacheTable, create_engine_at
+from clang_tidy_checker.check_result import CheckResult
+
+NUM_PROCESSES = 8
+NUM_RESULTS_PER_PROCESS = 1000
+WRITE_BATCH_SIZE = 20
+
+
+def write_results(filepath: str, use_default_engine: bool, process_index: int) -> None:
+    """Write results in a process."""
+    if use_default_engine:
+        engine = sqlalchemy.create_engine(f"sqlite:///{filepath}")
+    else:
+        engine = create_engine_at(filepath)
+    table = CacheTable(
+        engine=engine,
+        max_cache_entries=NUM_PROCESSES * NUM_RESULTS_PER_PROCESS,
+        write_batch_size=WRITE_BATCH_SIZE,
+    )
+    for index in range(NUM_RESULTS_PER_PROCESS):
+        table.save(
+            source_hash=f"hash{process_index}-{index}",
+            result=CheckResult(
+                exit_code=1, stdout=f"warning {index % 50}\n" * 20, stderr=""
+            ),
+        )
+        table.load(source_hash=f"hash{(process_index + 1) % NUM_PROCESSES}-{index}")
+    table.flush()
+
+
+def measure(filepath: str, use_default_engine: bool) -> None:
+    """Measure throughput and print the result."""
+    # Create tables before starting processes.
+    CacheTable(engine=create_engine_at(filepath), max_cache_entries=1)
+
+    processes = [
+        multiprocessing.Process(
+            target=write_results, args=(filepath, use_default_engine, index)
+        )
+        for index in range(NUM_PROCESSES)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    num_failed = sum(1 for process in processes if process.exitcode != 0)
+    table = CacheTable(
+        engine=create_engine_at(filepath),
+        max_cache_entries=NUM_PROCESSES * NUM_RESULTS_PER_PROCESS,
+    )
+    num_saved = len(
+        table.load_many(
+            f"hash{process_index}-{index}"
+            for process_index in range(NUM_PROCESSES)
+            for index in range(NUM_RESULTS_PER_PROCESS)
+        )
+    )
+    num_lost = NUM_PROCESSES * NUM_RESULTS_PER_PROCESS - num_saved
+    name = "default" if use_default_engine else "create_engine_at"
+    print(
+        f"{name:<17} {elapsed:8.3f} s {num_saved / elapsed:10.0f} results/s "
+        f"failed processes: {num_failed}, lost writes: {num_lost}"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"Processes: {NUM_PROCESSES}, results per process: {NUM_RESULTS_PER_PROCESS}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        measure(str(pathlib.Path(temp_dir) / "default.db"), True)
+        measure(str(pathlib.Path(temp_dir) / "wal.db"), False)
+
+
+if __name__ == "__main__":
+    main()
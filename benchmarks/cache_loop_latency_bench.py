@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Benchmark of latencies of the event loop during heavy uses of the cache.
+
+Compares calls of CacheTable in coroutines with AsyncCacheTable executing
+operations in a dedicated thread. A task sleeping for a short interval
+measures delays of the event loop while coroutines save and load many
+results with eviction of entries.
+"""
+
+import asyncio
+import pathlib
+import statistics
+import tempfile
+import time
+import typing
+
+from clang_tidy_checker.cache_backend import AsyncCacheTable
+from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.check_result import CheckResult
+
+NUM_TASKS = 8
+NUM_RESULTS_PER_TASK = 500
+MAX_CACHE_ENTRIES = 1000
+TICK_INTERVAL_SECONDS = 0.001
+
+
+def create_result(index: int) -> CheckResult:
+    """Create a synthetic result of clang-tidy."""
+    return CheckResult(
+        exit_code=1,
+        stdout="".join(
+            f"/proj/src/file{index}.cpp:{i + 1}:1: warning: test {i} [test-check]\n"
+            for i in range(100)
+        ),
+        stderr="100 warnings generated.\n",
+    )
+
+
+async def measure_latencies(
+    churn: typing.Callable[[int], typing.Awaitable[None]]
+) -> typing.Tuple[float, typing.List[float]]:
+    """Measure delays of the event loop while executing tasks using the cache."""
+    latencies: typing.List[float] = []
+    is_running = True
+
+    async def tick() -> None:
+        while is_running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL_SECONDS)
+            latencies.append(time.perf_counter() - start - TICK_INTERVAL_SECONDS)
+
+    tick_task = asyncio.create_task(tick())
+    start = time.perf_counter()
+    await asyncio.gather(*[churn(index) for index in range(NUM_TASKS)])
+    elapsed = time.perf_counter() - start
+    is_running = False
+    await tick_task
+    return elapsed, latencies
+
+
+async def measure_sync(filepath: str) -> typing.Tuple[float, typing.List[float]]:
+    """Measure with CacheTable called in coroutines."""
+    table = create_cache_table_at(filepath, max_cache_entries=MAX_CACHE_ENTRIES)
+
+    async def churn(task_index: int) -> None:
+        for index in range(NUM_RESULTS_PER_TASK):
+            source_hash = f"hash{task_index}-{index}"
+            table.load(source_hash)
+            table.save(source_hash, create_result(index))
+            await asyncio.sleep(0)
+
+    result = await measure_latencies(churn)
+    table.flush()
+    return result
+
+
+async def measure_async(filepath: str) -> typing.Tuple[float, typing.List[float]]:
+    """Measure with AsyncCacheTable."""
+    table = AsyncCacheTable(
+        create_cache_table_at(filepath, max_cache_entries=MAX_CACHE_ENTRIES)
+    )
+
+    async def churn(task_index: int) -> None:
+        for index in range(NUM_RESULTS_PER_TASK):
+            source_hash = f"hash{task_index}-{index}"
+            await table.load_many([source_hash])
+            await table.save(source_hash, create_result(index))
+
+    result = await measure_latencies(churn)
+    await table.close()
+    return result
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"Tasks: {NUM_TASKS}, results per task: {NUM_RESULTS_PER_TASK}")
+    print(
+        f"{'table':<16} {'time [s]':>9} {'p99 delay [ms]':>15} {'max delay [ms]':>15}"
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, function in [
+            ("CacheTable", measure_sync),
+            ("AsyncCacheTable", measure_async),
+        ]:
+            filepath = str(pathlib.Path(temp_dir) / f"{name}.db")
+            elapsed, latencies = asyncio.run(function(filepath))
+            p99 = statistics.quantiles(latencies, n=100)[-1]
+            print(
+                f"{name:<16} {elapsed:9.2f} {p99 * 1e3:15.1f} "
+                f"{max(latencies) * 1e3:15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark of packs of caches.
+
+Measures per-result times of export and import of packs in different numbers
+of results to check that both scale linearly.
+"""
+
+import pathlib
+import tempfile
+import time
+
+from clang_tidy_checker.cache_pack import export_pack, import_pack
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+NUM_RESULTS_LIST = [1000, 4000, 16000]
+
+
+def create_result(index: int) -> CheckResult:
+    """Create a result with outputs shared among some results."""
+    return CheckResult(
+        exit_code=1,
+        stdout=f"file{index % 100}.cpp:1:2: warning: test [check{index % 7}]\n",
+        stderr="",
+    )
+
+
+def measure(directory: pathlib.Path, num_results: int) -> None:
+    """Measure times of export and import of a pack."""
+    source = SqliteCacheTable(str(directory / "source.db"), num_results)
+    for index in range(num_results):
+        source.save(f"hash{index}", create_result(index))
+    source.flush()
+
+    pack_path = str(directory / "cache.pack")
+    start = time.perf_counter()
+    export_pack(source, pack_path)
+    export_time = time.perf_counter() - start
+    source.close()
+
+    target = SqliteCacheTable(str(directory / "target.db"), num_results)
+    start = time.perf_counter()
+    import_pack(target, pack_path)
+    import_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statistics = import_pack(target, pack_path)
+    skip_time = time.perf_counter() - start
+    assert statistics.num_skipped_results == num_results
+    target.close()
+
+    pack_size = pathlib.Path(pack_path).stat().st_size
+    print(
+        f"{num_results:>8} {pack_size / num_results:12.1f} "
+        f"{export_time / num_results * 1e6:12.1f} "
+        f"{import_time / num_results * 1e6:12.1f} "
+        f"{skip_time / num_results * 1e6:10.1f}"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(
+        f"{'results':>8} {'bytes/result':>12} {'export [us]':>12} "
+        f"{'import [us]':>12} {'skip [us]':>10}"
+    )
+    for num_results in NUM_RESULTS_LIST:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            measure(pathlib.Path(temp_dir), num_results)
+
+
+if __name__ == "__main__":
+    main()
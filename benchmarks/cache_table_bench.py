@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark of lookups and writes of CacheTable.
+
+Compares per-row lookups and writes with bulk lookups and batched writes
+for a cache with 10k entries.
+"""
+
+import pathlib
+import tempfile
+import time
+
+import sqlalchemy
+
+from clang_tidy_checker.cache_table import CacheTable
+from clang_tidy_checker.check_result import CheckResult
+
+NUM_ENTRIES = 10000
+RESULT = CheckResult(exit_code=0, stdout="x" * 200, stderr="")
+
+
+def create_engine(filepath: pathlib.Path) -> sqlalchemy.Engine:
+    """Create an engine of a database file."""
+    return sqlalchemy.create_engine(f"sqlite:///{filepath}")
+
+
+def fill(table: CacheTable) -> float:
+    """Save entries and return the time in seconds."""
+    start = time.perf_counter()
+    for i in range(NUM_ENTRIES):
+        table.save(source_hash=f"hash{i}", result=RESULT)
+    table.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark."""
+    hashes = [f"hash{i}" for i in range(NUM_ENTRIES)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        per_row_table = CacheTable(
+            engine=create_engine(pathlib.Path(temp_dir) / "per_row.db"),
+            max_cache_entries=NUM_ENTRIES,
+            write_batch_size=1,
+        )
+        per_row_save_time = fill(per_row_table)
+
+        batched_table = CacheTable(
+            engine=create_engine(pathlib.Path(temp_dir) / "batched.db"),
+            max_cache_entries=NUM_ENTRIES,
+        )
+        batched_save_time = fill(batched_table)
+
+        start = time.perf_counter()
+        for source_hash in hashes:
+            assert batched_table.load(source_hash) is not None
+        per_row_load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assert len(batched_table.load_many(hashes)) == NUM_ENTRIES
+        bulk_load_time = time.perf_counter() - start
+
+    print(f"Entries: {NUM_ENTRIES}")
+    print(f"save (per row):  {per_row_save_time:8.3f} s")
+    print(f"save (batched):  {batched_save_time:8.3f} s")
+    print(f"load (per row):  {per_row_load_time:8.3f} s")
+    print(f"load_many:       {bulk_load_time:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark of lookups in databases of compile commands.
+
+Compares the indexed CompileDatabase with a linear scan of the entries
+for databases of increasing sizes.
+"""
+
+import shlex
+import time
+import typing
+
+from clang_tidy_checker.compile_database import CompileDatabase
+
+DATABASE_SIZES = [1000, 5000, 25000]
+NUM_LOOKUPS = 200
+
+
+def create_entries(num_entries: int) -> typing.List[dict]:
+    """Create entries of a synthetic compile_commands.json."""
+    return [
+        {
+            "directory": "/proj/build",
+            "command": (
+                f"/usr/bin/c++ -I/proj/include -o obj/{i}.o -c /proj/src/{i}.cpp"
+            ),
+            "file": f"/proj/src/{i}.cpp",
+        }
+        for i in range(num_entries)
+    ]
+
+
+def linear_lookup(entries: typing.List[dict], input_file: str) -> typing.List[str]:
+    """Look up a command by a linear scan as in older versions."""
+    for entry in entries:
+        if entry["file"] == input_file:
+            return shlex.split(entry["command"])
+    raise ValueError(input_file)
+
+
+def measure(function: typing.Callable[[str], object], files: typing.List[str]) -> float:
+    """Measure the mean time of lookups in microseconds."""
+    start = time.perf_counter()
+    for input_file in files:
+        function(input_file)
+    return (time.perf_counter() - start) / len(files) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{'entries':>8} {'linear [us]':>12} {'indexed [us]':>13} {'build [ms]':>11}")
+    for num_entries in DATABASE_SIZES:
+        entries = create_entries(num_entries)
+        step = max(1, num_entries // NUM_LOOKUPS)
+        files = [f"/proj/src/{i}.cpp" for i in range(0, num_entries, step)]
+
+        start = time.perf_counter()
+        database = CompileDatabase(entries)
+        build_time = (time.perf_counter() - start) * 1e3
+
+        linear_time = measure(lambda path: linear_lookup(entries, path), files)
+        indexed_time = measure(database.get, files)
+        print(
+            f"{num_entries:>8} {linear_time:>12.2f} {indexed_time:>13.2f}"
+            f" {build_time:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
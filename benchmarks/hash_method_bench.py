@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark of methods to calculate hashes of source codes.
+
+Compares hashing outputs of the preprocessor with hashing contents of
+dependencies for a synthetic project in which all source codes include
+many shared headers.
+"""
+
+import asyncio
+import json
+import pathlib
+import tempfile
+import time
+import typing
+
+from clang_tidy_checker.compile_database import load_compile_database
+from clang_tidy_checker.config import parse_config_from_dict
+from clang_tidy_checker.source_hash_calculator import SourceHashCalculator
+
+NUM_HEADERS = 200
+NUM_SOURCES = 100
+NUM_FUNCTIONS_PER_HEADER = 50
+COMPILER = "c++"
+
+
+def create_project(root: pathlib.Path) -> typing.List[str]:
+    """Create a synthetic project and return paths of the source codes."""
+    include_dir = root / "include"
+    include_dir.mkdir()
+    for i in range(NUM_HEADERS):
+        functions = "".join(
+            f"inline int function{i}_{j}(int x) {{ return x + {j}; }}\n"
+            for j in range(NUM_FUNCTIONS_PER_HEADER)
+        )
+        (include_dir / f"header{i}.h").write_text(
+            f"#pragma once\n\n{functions}", encoding="utf8"
+        )
+    includes = "".join(f'#include "header{i}.h"\n' for i in range(NUM_HEADERS))
+
+    source_dir = root / "src"
+    source_dir.mkdir()
+    build_dir = root / "build"
+    build_dir.mkdir()
+    sources: typing.List[str] = []
+    compile_commands: typing.List[dict] = []
+    for i in range(NUM_SOURCES):
+        source = source_dir / f"source{i}.cpp"
+        source.write_text(
+            f"{includes}\nint main() {{ return function{i % NUM_HEADERS}_0(0); }}\n",
+            encoding="utf8",
+        )
+        sources.append(str(source))
+        compile_commands.append(
+            {
+                "directory": str(build_dir),
+                "arguments": [
+                    COMPILER,
+                    f"-I{include_dir}",
+                    "-o",
+                    f"source{i}.o",
+                    "-c",
+                    str(source),
+                ],
+                "file": str(source),
+            }
+        )
+    (build_dir / "compile_commands.json").write_text(
+        json.dumps(compile_commands), encoding="utf8"
+    )
+    return sources
+
+
+async def measure(root: pathlib.Path, sources: typing.List[str], method: str) -> float:
+    """Calculate hashes of all source codes and return the time in seconds."""
+    config = await parse_config_from_dict(
+        {"build_dir": str(root / "build"), "hash_method": method}
+    )
+    compile_database = load_compile_database(config.build_dir)
+    semaphore = asyncio.Semaphore(config.preprocess_jobs)
+
+    async with SourceHashCalculator(
+        config=config, compile_database=compile_database
+    ) as calculator:
+
+        async def calculate(source: str) -> str:
+            async with semaphore:
+                return await calculator.calculate(source)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[calculate(source) for source in sources])
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = pathlib.Path(temp_dir)
+        sources = create_project(root)
+        print(f"Headers: {NUM_HEADERS}, sources: {NUM_SOURCES}")
+        for method in ["preprocess", "dependencies"]:
+            elapsed = asyncio.run(measure(root, sources, method))
+            print(f"{method:<13} {elapsed:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,666 @@
+"""Interface of tables of cached results and common implementations.
+
+This module does not import libraries of databases, so that only the backend
+selected by ``config.cache_backend`` is imported in a run.
+"""
+
+import abc
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextvars
+import dataclasses
+import datetime
+import hashlib
+import logging
+import time
+import typing
+import zlib
+
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.tracer import (
+    STAGE_CACHE_FLUSH,
+    STAGE_CACHE_LOAD,
+    STAGE_CACHE_SAVE,
+    trace_span,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+# Name of the file of the database.
+# The version is incremented when the schema is changed.
+CACHE_DATABASE_FILE_NAME = "clang_tidy_cache_v3.db"
+
+# Level of compression of outputs.
+# (Outputs of clang-tidy are compressed well even in low levels.)
+COMPRESSION_LEVEL = 1
+
+# Ratio of the size of the cache after eviction to the maximum size.
+# (Entries are removed below the maximum size not to evict for each write.)
+CACHE_SIZE_LOW_WATER_RATIO = 0.9
+
+# Name of the statistics of the number of entries.
+NUM_ENTRIES_INFO = "num_entries"
+
+# Name of the statistics of the total size of outputs in bytes.
+TOTAL_BYTES_INFO = "total_bytes"
+
+# Time to wait for locks of the database held by other processes in seconds.
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Maximum number of retries of transactions failed due to locks.
+MAX_LOCK_RETRIES = 5
+
+# Interval of the first retry of a transaction in seconds.
+# (Doubled for each retry.)
+LOCK_RETRY_INTERVAL_SECONDS = 0.1
+
+# Default number of results written in a transaction.
+DEFAULT_WRITE_BATCH_SIZE = 100
+
+# Maximum number of parameters in a query.
+# (SQLite before 3.32.0 limits the number of parameters to 999.)
+MAX_QUERY_PARAMETERS = 500
+
+
+def compress_text(text: str) -> bytes:
+    """Compress a text.
+
+    Args:
+        text (str): Text.
+
+    Returns:
+        bytes: Compressed data.
+    """
+    return zlib.compress(text.encode("utf8"), COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    """Decompress a text.
+
+    Args:
+        data (bytes): Compressed data.
+
+    Returns:
+        str: Text.
+    """
+    return zlib.decompress(data).decode("utf8")
+
+
+def calculate_blob_hash(text: str) -> str:
+    """Calculate a hash of an output used as the address in the database.
+
+    Args:
+        text (str): Output.
+
+    Returns:
+        str: Hash.
+    """
+    return hashlib.sha3_256(text.encode("utf8")).hexdigest()
+
+
+def is_valid_blob(blob_hash: str, data: bytes) -> bool:
+    """Check whether data of an output match its hash.
+
+    Args:
+        blob_hash (str): Hash of the output.
+        data (bytes): Compressed data.
+
+    Returns:
+        bool: True if valid.
+    """
+    try:
+        return calculate_blob_hash(decompress_text(data)) == blob_hash
+    except (zlib.error, UnicodeDecodeError):
+        return False
+
+
+def retry_on_lock_error(
+    function: typing.Callable[[], T], is_lock_error: typing.Callable[[Exception], bool]
+) -> T:
+    """Execute a function retrying when the database is locked.
+
+    Args:
+        function (typing.Callable[[], T]): Function executing a transaction.
+        is_lock_error (typing.Callable[[Exception], bool]): Function to check
+            whether an error is caused by locks of the database.
+
+    Returns:
+        T: Returned value of the function.
+    """
+    num_retries = 0
+    while True:
+        try:
+            return function()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            if not is_lock_error(error) or num_retries >= MAX_LOCK_RETRIES:
+                raise
+            LOGGER.debug("Database is locked. Retrying a transaction: %s", error)
+            time.sleep(LOCK_RETRY_INTERVAL_SECONDS * 2**num_retries)
+            num_retries += 1
+
+
+@dataclasses.dataclass
+class PendingResult:
+    """Result waiting to be written."""
+
+    result: CheckResult
+    created_at: datetime.datetime
+
+
+def collect_outputs(pending_results: typing.Dict[str, PendingResult]) -> typing.Tuple[
+    typing.Dict[str, typing.Tuple[str, str]],
+    typing.Dict[str, str],
+    typing.Counter[str],
+]:
+    """Collect outputs of results to write.
+
+    Args:
+        pending_results (typing.Dict[str, PendingResult]): Results to write.
+
+    Returns:
+        typing.Tuple[typing.Dict[str, typing.Tuple[str, str]],
+        typing.Dict[str, str], typing.Counter[str]]:
+        Hashes of standard output and standard error for hashes of source codes,
+        outputs for their hashes, and numbers of references to outputs.
+    """
+    output_hashes: typing.Dict[str, typing.Tuple[str, str]] = {}
+    outputs: typing.Dict[str, str] = {}
+    ref_counts: typing.Counter[str] = collections.Counter()
+    for source_hash, pending in pending_results.items():
+        stdout_hash = calculate_blob_hash(pending.result.stdout)
+        stderr_hash = calculate_blob_hash(pending.result.stderr)
+        outputs[stdout_hash] = pending.result.stdout
+        outputs[stderr_hash] = pending.result.stderr
+        ref_counts[stdout_hash] += 1
+        ref_counts[stderr_hash] += 1
+        output_hashes[source_hash] = (stdout_hash, stderr_hash)
+    return output_hashes, outputs, ref_counts
+
+
+def decompress_result(
+    exit_code: int,
+    stdout_blob: typing.Tuple[str, bytes],
+    stderr_blob: typing.Tuple[str, bytes],
+    texts: typing.Dict[str, str],
+) -> CheckResult:
+    """Create a result from compressed outputs.
+
+    Outputs shared among results are decompressed once using ``texts``.
+
+    Args:
+        exit_code (int): Exit code.
+        stdout_blob (typing.Tuple[str, bytes]): Hash and data of standard output.
+        stderr_blob (typing.Tuple[str, bytes]): Hash and data of standard error.
+        texts (typing.Dict[str, str]): Decompressed outputs for their hashes.
+
+    Returns:
+        CheckResult: Result.
+    """
+    for blob_hash, data in (stdout_blob, stderr_blob):
+        if blob_hash not in texts:
+            texts[blob_hash] = decompress_text(data)
+    return CheckResult(
+        exit_code=exit_code,
+        stdout=texts[stdout_blob[0]],
+        stderr=texts[stderr_blob[0]],
+    )
+
+
+@dataclasses.dataclass
+class EvictionPlan:
+    """Entries to remove and outputs released by them."""
+
+    blob_states: typing.Dict[str, typing.Tuple[int, int]] = dataclasses.field(
+        default_factory=dict
+    )
+    removed_hashes: typing.List[str] = dataclasses.field(default_factory=list)
+    released_counts: typing.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter
+    )
+    freed_bytes: int = 0
+
+    def remove(self, source_hash: str, blob_hashes: typing.Iterable[str]) -> None:
+        """Add an entry to remove.
+
+        Args:
+            source_hash (str): Hash of the source code.
+            blob_hashes (typing.Iterable[str]): Hashes of outputs of the entry.
+        """
+        self.removed_hashes.append(source_hash)
+        for blob_hash in blob_hashes:
+            self.released_counts[blob_hash] += 1
+            ref_count, size = self.blob_states[blob_hash]
+            if self.released_counts[blob_hash] == ref_count:
+                self.freed_bytes += size
+
+    def unreferenced_hashes(self) -> typing.List[str]:
+        """Get hashes of outputs no longer referred to after removal.
+
+        Returns:
+            typing.List[str]: Hashes of outputs.
+        """
+        return [
+            blob_hash
+            for blob_hash, count in self.released_counts.items()
+            if count == self.blob_states[blob_hash][0]
+        ]
+
+
+class ICacheTable(abc.ABC):
+    """Interface of tables of cached results."""
+
+    @abc.abstractmethod
+    def save(self, source_hash: str, result: CheckResult) -> None:
+        """Save a result of a check.
+
+        Args:
+            source_hash (str): Hash of source code.
+            result (CheckResult): Result.
+        """
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """Write buffered results and times of uses, and remove old entries."""
+
+    @abc.abstractmethod
+    def load_many(
+        self, source_hashes: typing.Iterable[str]
+    ) -> typing.Dict[str, CheckResult]:
+        """Load cached results of checks.
+
+        Args:
+            source_hashes (typing.Iterable[str]): Hashes of source codes.
+
+        Returns:
+            typing.Dict[str, CheckResult]: Cached results found.
+        """
+
+    @abc.abstractmethod
+    def find_cached(self, source_hashes: typing.Iterable[str]) -> typing.Set[str]:
+        """Find hashes of source codes with cached results.
+
+        Times of uses are not updated.
+
+        Args:
+            source_hashes (typing.Iterable[str]): Hashes of source codes.
+
+        Returns:
+            typing.Set[str]: Hashes with cached results.
+        """
+
+    @abc.abstractmethod
+    def iterate_results(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+        """Iterate over cached results from the least recently used one.
+
+        Buffered results are written before iteration, and times of uses are
+        not updated.
+
+        Yields:
+            typing.Tuple[str, CheckResult]: Hashes of source codes and results.
+        """
+
+    def load(self, source_hash: str) -> typing.Optional[CheckResult]:
+        """Load a cached result of a check.
+
+        Args:
+            source_hash (str): Hash of source code.
+
+        Returns:
+            typing.Optional[CheckResult]: Cached result if found.
+        """
+        return self.load_many([source_hash]).get(source_hash)
+
+    def close(self) -> None:
+        """Write buffered results and release resources."""
+        self.flush()
+
+
+class BufferedCacheTable(ICacheTable):
+    """Base class of tables buffering writes in memory.
+
+    Saved results are buffered and written in batches of transactions.
+    Times of uses of loaded results are recorded in memory and written with
+    the results to avoid writing for each load.
+
+    Args:
+        max_cache_entries (int): Maximum number of entries in the cache.
+        max_cache_bytes (typing.Optional[int]): Maximum total size of outputs
+            in the cache in bytes. No limit if None.
+        write_batch_size (int): Number of results written in a transaction.
+    """
+
+    def __init__(
+        self,
+        max_cache_entries: int,
+        max_cache_bytes: typing.Optional[int],
+        write_batch_size: int,
+    ) -> None:
+        self._max_cache_entries = max_cache_entries
+        self._max_cache_bytes = max_cache_bytes
+        self._write_batch_size = write_batch_size
+        self._pending_results: typing.Dict[str, PendingResult] = {}
+        self._last_used_times: typing.Dict[str, datetime.datetime] = {}
+
+    def save(self, source_hash: str, result: CheckResult) -> None:
+        self._pending_results[source_hash] = PendingResult(
+            result=result, created_at=datetime.datetime.now()
+        )
+        if len(self._pending_results) >= self._write_batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending_results and not self._last_used_times:
+            return
+        pending_results = self._pending_results
+        self._pending_results = {}
+        last_used_times = self._last_used_times
+        self._last_used_times = {}
+        self._write(pending_results, last_used_times)
+
+    def load_many(
+        self, source_hashes: typing.Iterable[str]
+    ) -> typing.Dict[str, CheckResult]:
+        results: typing.Dict[str, CheckResult] = {}
+        remaining_hashes: typing.List[str] = []
+        for source_hash in set(source_hashes):
+            pending = self._pending_results.get(source_hash)
+            if pending is not None:
+                results[source_hash] = pending.result
+            else:
+                remaining_hashes.append(source_hash)
+        if not remaining_hashes:
+            return results
+
+        loaded_results = self._read(remaining_hashes)
+        now = datetime.datetime.now()
+        for source_hash in loaded_results:
+            self._last_used_times[source_hash] = now
+        results.update(loaded_results)
+        return results
+
+    def find_cached(self, source_hashes: typing.Iterable[str]) -> typing.Set[str]:
+        source_hashes = set(source_hashes)
+        found_hashes = source_hashes & self._pending_results.keys()
+        remaining_hashes = list(source_hashes - found_hashes)
+        if remaining_hashes:
+            found_hashes |= self._find_saved(remaining_hashes)
+        return found_hashes
+
+    def iterate_results(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+        self.flush()
+        yield from self._iterate()
+
+    @abc.abstractmethod
+    def _write(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        """Write results and times of uses, and remove old entries.
+
+        Args:
+            pending_results (typing.Dict[str, PendingResult]): Results to write.
+            last_used_times (typing.Dict[str, datetime.datetime]): Times of last
+                uses for hashes of source codes.
+        """
+
+    @abc.abstractmethod
+    def _read(self, source_hashes: typing.List[str]) -> typing.Dict[str, CheckResult]:
+        """Read results saved in the database.
+
+        Args:
+            source_hashes (typing.List[str]): Hashes of source codes.
+
+        Returns:
+            typing.Dict[str, CheckResult]: Results found.
+        """
+
+    @abc.abstractmethod
+    def _find_saved(self, source_hashes: typing.List[str]) -> typing.Set[str]:
+        """Find hashes of source codes with results saved in the database.
+
+        Args:
+            source_hashes (typing.List[str]): Hashes of source codes.
+
+        Returns:
+            typing.Set[str]: Hashes found.
+        """
+
+    @abc.abstractmethod
+    def _iterate(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+        """Iterate over results saved in the database in the order of last uses.
+
+        Yields:
+            typing.Tuple[str, CheckResult]: Hashes of source codes and results.
+        """
+
+    def _eviction_targets(
+        self, num_entries: int, total_bytes: int
+    ) -> typing.Optional[typing.Tuple[int, int]]:
+        """Calculate targets of eviction of least recently used entries.
+
+        When the total size exceeds the limit, results are removed until the
+        size becomes :py:data:`CACHE_SIZE_LOW_WATER_RATIO` times the limit.
+
+        Args:
+            num_entries (int): Current number of entries.
+            total_bytes (int): Current total size of outputs.
+
+        Returns:
+            typing.Optional[typing.Tuple[int, int]]: Minimum number of entries
+            to remove and maximum total size after removal.
+            None if no entry needs to be removed.
+        """
+        min_removed_entries = max(0, num_entries - self._max_cache_entries)
+        target_bytes = total_bytes
+        if self._max_cache_bytes is not None and total_bytes > self._max_cache_bytes:
+            target_bytes = int(self._max_cache_bytes * CACHE_SIZE_LOW_WATER_RATIO)
+        if min_removed_entries == 0 and target_bytes >= total_bytes:
+            return None
+        return min_removed_entries, target_bytes
+
+
+@dataclasses.dataclass
+class CacheStatistics:
+    """Statistics of entries in a cache.
+
+    ``age_counts[i]`` is the number of entries last used within ``age_bounds[i]``
+    and not within ``age_bounds[i - 1]``, and the last element is the number of
+    entries older than all bounds.
+    """
+
+    num_entries: int
+    total_bytes: int
+    age_counts: typing.List[int]
+
+
+@dataclasses.dataclass
+class PruneResult:
+    """Result of removal of entries in a cache."""
+
+    num_removed_entries: int
+    freed_bytes: int
+
+
+def count_ages(
+    last_used_times: typing.Iterable[datetime.datetime],
+    age_bounds: typing.Sequence[datetime.timedelta],
+) -> typing.List[int]:
+    """Count entries in ranges of ages.
+
+    Args:
+        last_used_times (typing.Iterable[datetime.datetime]): Times of last uses.
+        age_bounds (typing.Sequence[datetime.timedelta]): Bounds of ranges of
+            ages in ascending order.
+
+    Returns:
+        typing.List[int]: Numbers of entries (see :py:class:`CacheStatistics`).
+    """
+    now = datetime.datetime.now()
+    age_counts = [0] * (len(age_bounds) + 1)
+    for used_at in last_used_times:
+        age_counts[bisect.bisect_right(age_bounds, now - used_at)] += 1
+    return age_counts
+
+
+def calculate_prune_targets(
+    *,
+    num_entries: int,
+    total_bytes: int,
+    num_expired_entries: int,
+    max_entries: typing.Optional[int],
+    max_bytes: typing.Optional[int],
+) -> typing.Tuple[int, int]:
+    """Calculate targets of removal of least recently used entries in pruning.
+
+    Unlike eviction in writes, entries are removed just to the limits.
+
+    Args:
+        num_entries (int): Current number of entries.
+        total_bytes (int): Current total size of outputs.
+        num_expired_entries (int): Number of entries older than the maximum age.
+        max_entries (typing.Optional[int]): Maximum number of entries.
+        max_bytes (typing.Optional[int]): Maximum total size of outputs.
+
+    Returns:
+        typing.Tuple[int, int]: Minimum number of entries to remove and maximum
+        total size after removal.
+    """
+    min_removed_entries = num_expired_entries
+    if max_entries is not None:
+        min_removed_entries = max(min_removed_entries, num_entries - max_entries)
+    target_bytes = total_bytes
+    if max_bytes is not None:
+        target_bytes = min(target_bytes, max_bytes)
+    return min_removed_entries, target_bytes
+
+
+class IMaintainableCacheTable(ICacheTable):
+    """Interface of tables of cached results with operations of maintenance."""
+
+    @abc.abstractmethod
+    def get_statistics(
+        self, age_bounds: typing.Sequence[datetime.timedelta]
+    ) -> CacheStatistics:
+        """Get statistics of entries.
+
+        Args:
+            age_bounds (typing.Sequence[datetime.timedelta]): Bounds of ranges
+                of ages of last uses in ascending order.
+
+        Returns:
+            CacheStatistics: Statistics.
+        """
+
+    @abc.abstractmethod
+    def prune(
+        self,
+        *,
+        max_age: typing.Optional[datetime.timedelta] = None,
+        max_entries: typing.Optional[int] = None,
+        max_bytes: typing.Optional[int] = None,
+    ) -> PruneResult:
+        """Remove entries older than an age or least recently used entries
+        exceeding limits in a transaction.
+
+        Args:
+            max_age (typing.Optional[datetime.timedelta]): Maximum age of last
+                uses of entries.
+            max_entries (typing.Optional[int]): Maximum number of entries.
+            max_bytes (typing.Optional[int]): Maximum total size of outputs.
+
+        Returns:
+            PruneResult: Result.
+        """
+
+    @abc.abstractmethod
+    def compact(self) -> None:
+        """Compact storages to release unused spaces."""
+
+    @abc.abstractmethod
+    def verify(self) -> typing.List[str]:
+        """Verify integrity of the cache.
+
+        Returns:
+            typing.List[str]: Descriptions of problems found.
+        """
+
+
+class AsyncCacheTable:
+    """Class of an asynchronous interface of :py:class:`ICacheTable`.
+
+    Operations of the table are executed one by one in a dedicated thread,
+    so that queries, writes, and eviction of entries do not block the event
+    loop. The table must not be used directly while this object is used.
+
+    Args:
+        table (ICacheTable): Table.
+    """
+
+    def __init__(self, table: ICacheTable) -> None:
+        self._table = table
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="cache_table"
+        )
+
+    async def save(self, source_hash: str, result: CheckResult) -> None:
+        """Save a result of a check.
+
+        Args:
+            source_hash (str): Hash of source code.
+            result (CheckResult): Result.
+        """
+        await self._run(
+            lambda: self._table.save(source_hash, result), stage=STAGE_CACHE_SAVE
+        )
+
+    async def flush(self) -> None:
+        """Write buffered results and times of uses, and remove old entries."""
+        await self._run(self._table.flush, stage=STAGE_CACHE_FLUSH)
+
+    async def load_many(
+        self, source_hashes: typing.Iterable[str]
+    ) -> typing.Dict[str, CheckResult]:
+        """Load cached results of checks.
+
+        Args:
+            source_hashes (typing.Iterable[str]): Hashes of source codes.
+
+        Returns:
+            typing.Dict[str, CheckResult]: Cached results found.
+        """
+        source_hashes = list(source_hashes)
+        return await self._run(
+            lambda: self._table.load_many(source_hashes), stage=STAGE_CACHE_LOAD
+        )
+
+    async def close(self) -> None:
+        """Close the table and stop the thread."""
+        try:
+            await self._run(self._table.close, stage=STAGE_CACHE_FLUSH)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    async def _run(self, function: typing.Callable[[], T], *, stage: str) -> T:
+        """Run a function in the thread of the table.
+
+        Args:
+            function (typing.Callable[[], T]): Function.
+            stage (str): Name of the stage traced.
+
+        Returns:
+            T: Returned value.
+        """
+
+        def run() -> T:
+            with trace_span(stage):
+                return function()
+
+        # Pass the context for the tracer.
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, contextvars.copy_context().run, run
+        )
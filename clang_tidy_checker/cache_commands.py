@@ -0,0 +1,283 @@
+"""Commands to manage the cache."""
+
+import asyncio
+import contextlib
+import datetime
+import logging
+import os
+import sys
+import typing
+
+import click
+
+from clang_tidy_checker.cache_backend import (
+    CACHE_DATABASE_FILE_NAME,
+    ICacheTable,
+    IMaintainableCacheTable,
+)
+from clang_tidy_checker.cache_pack import InvalidPackError, export_pack, import_pack
+from clang_tidy_checker.clang_tidy_executor import create_local_cache_table
+from clang_tidy_checker.config import (
+    CACHE_BACKEND_DIRECTORY,
+    Config,
+    parse_byte_size,
+    parse_config_from_dict,
+    parse_duration,
+)
+from clang_tidy_checker.run_statistics import load_run_statistics
+
+LOGGER = logging.getLogger(__name__)
+
+# Ranges of ages of last uses of entries shown in statistics.
+AGE_RANGES = [
+    ("1 hour", datetime.timedelta(hours=1)),
+    ("1 day", datetime.timedelta(days=1)),
+    ("7 days", datetime.timedelta(days=7)),
+    ("30 days", datetime.timedelta(days=30)),
+]
+
+
+def load_cache_config(config_dict: dict) -> Config:
+    """Load the configuration requiring the cache directory.
+
+    clang-tidy is not searched, because commands of the cache do not execute it.
+
+    Args:
+        config_dict (dict): Dictionary of the configuration.
+
+    Raises:
+        click.UsageError: If no cache directory is configured.
+
+    Returns:
+        Config: Configuration.
+    """
+    config = asyncio.run(parse_config_from_dict(config_dict, resolve_clang_tidy=False))
+    if config.cache_dir is None:
+        raise click.UsageError("Cache directory is not configured.")
+    os.makedirs(config.cache_dir, exist_ok=True)
+    return config
+
+
+@contextlib.contextmanager
+def open_cache_table(config: Config) -> typing.Iterator[ICacheTable]:
+    """Open the table of caches in the cache directory.
+
+    Args:
+        config (Config): Configuration.
+
+    Yields:
+        ICacheTable: Table.
+    """
+    table = create_local_cache_table(config)
+    try:
+        yield table
+    finally:
+        table.close()
+
+
+@contextlib.contextmanager
+def open_maintainable_cache_table(
+    config: Config,
+) -> typing.Iterator[IMaintainableCacheTable]:
+    """Open the table of caches in the cache directory for maintenance.
+
+    Databases of ``sqlalchemy`` backend are maintained using ``sqlite3``
+    backend, because they have the same format.
+
+    Args:
+        config (Config): Configuration.
+
+    Yields:
+        IMaintainableCacheTable: Table.
+    """
+    # pylint: disable=import-outside-toplevel
+    assert config.cache_dir is not None
+    table: IMaintainableCacheTable
+    if config.cache_backend == CACHE_BACKEND_DIRECTORY:
+        from clang_tidy_checker.directory_cache_table import (
+            DIRECTORY_STORE_NAME,
+            DirectoryCacheTable,
+        )
+
+        table = DirectoryCacheTable(
+            os.path.join(config.cache_dir, DIRECTORY_STORE_NAME),
+            max_cache_entries=config.max_cache_entries,
+            max_cache_bytes=config.max_cache_bytes,
+        )
+    else:
+        from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+        table = SqliteCacheTable(
+            os.path.join(config.cache_dir, CACHE_DATABASE_FILE_NAME),
+            max_cache_entries=config.max_cache_entries,
+            max_cache_bytes=config.max_cache_bytes,
+        )
+    try:
+        yield table
+    finally:
+        table.close()
+
+
+def calculate_directory_size(directory: str) -> int:
+    """Calculate the total size of files in a directory.
+
+    Args:
+        directory (str): Directory.
+
+    Returns:
+        int: Total size in bytes.
+    """
+    total_size = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            try:
+                total_size += os.path.getsize(os.path.join(root, file))
+            except FileNotFoundError:
+                pass
+    return total_size
+
+
+@click.group()
+def cache() -> None:
+    """Manage the cache."""
+
+
+@cache.command("export")
+@click.argument("pack_path")
+@click.option("--append", is_flag=True, help="Append results to an existing pack.")
+@click.pass_obj
+def export_command(config_dict: dict, pack_path: str, append: bool) -> None:
+    """Export cached results to a pack file."""
+
+    with open_cache_table(load_cache_config(config_dict)) as table:
+        statistics = export_pack(table, pack_path, append=append)
+    LOGGER.info("Exported %d results to %s.", statistics.num_results, pack_path)
+
+
+@cache.command("import")
+@click.argument("pack_path", type=click.Path(exists=True, dir_okay=False))
+@click.pass_obj
+def import_command(config_dict: dict, pack_path: str) -> None:
+    """Import results in a pack file to the cache."""
+
+    with open_cache_table(load_cache_config(config_dict)) as table:
+        try:
+            statistics = import_pack(table, pack_path)
+        except InvalidPackError as error:
+            raise click.ClickException(str(error)) from error
+    LOGGER.info(
+        "Imported %d results from %s (skipped %d results already cached).",
+        statistics.num_results,
+        pack_path,
+        statistics.num_skipped_results,
+    )
+
+
+@cache.command("stats")
+@click.pass_obj
+def stats_command(config_dict: dict) -> None:
+    """Show statistics of the cache."""
+
+    config = load_cache_config(config_dict)
+    with open_maintainable_cache_table(config) as table:
+        statistics = table.get_statistics([bound for _, bound in AGE_RANGES])
+
+    click.echo(f"Entries: {statistics.num_entries}")
+    click.echo(
+        f"Size of outputs: {statistics.total_bytes} bytes "
+        f"({statistics.total_bytes / 1024**2:.1f} MiB)"
+    )
+    click.echo("Last used:")
+    labels = [f"within {label}" for label, _ in AGE_RANGES]
+    labels.append(f"before {AGE_RANGES[-1][0]}")
+    for label, count in zip(labels, statistics.age_counts):
+        click.echo(f"  {label:<16} {count:>10}")
+
+    assert config.cache_dir is not None
+    run_statistics = load_run_statistics(config.cache_dir)
+    if run_statistics is None or run_statistics.hit_rate is None:
+        click.echo("Hit rate of the last run: unknown")
+        return
+    assert run_statistics.finished_at is not None
+    click.echo(
+        f"Hit rate of the last run: {run_statistics.hit_rate:.1%} "
+        f"({run_statistics.num_hits} hits, {run_statistics.num_misses} misses, "
+        f"finished at {run_statistics.finished_at:%Y-%m-%d %H:%M:%S})"
+    )
+
+
+@cache.command("prune")
+@click.option(
+    "--max_age",
+    default="",
+    help="Remove entries not used for the duration. "
+    "Units s, m, h, d can be used (e.g., 30d).",
+)
+@click.option(
+    "--max_entries", type=int, default=None, help="Maximum number of entries."
+)
+@click.option(
+    "--max_bytes",
+    default="",
+    help="Maximum size of outputs in bytes. Units K, M, G can be used (e.g., 500M).",
+)
+@click.pass_obj
+def prune_command(
+    config_dict: dict, max_age: str, max_entries: typing.Optional[int], max_bytes: str
+) -> None:
+    """Remove old entries in the cache.
+
+    Entries not used for a duration and least recently used entries exceeding
+    limits are removed at once.
+    """
+
+    if not max_age and max_entries is None and not max_bytes:
+        raise click.UsageError("Specify --max_age, --max_entries, or --max_bytes.")
+    try:
+        max_age_duration = parse_duration(max_age) if max_age else None
+        max_bytes_value = parse_byte_size(max_bytes) if max_bytes else None
+    except ValueError as error:
+        raise click.BadParameter(str(error)) from error
+
+    with open_maintainable_cache_table(load_cache_config(config_dict)) as table:
+        result = table.prune(
+            max_age=max_age_duration, max_entries=max_entries, max_bytes=max_bytes_value
+        )
+    LOGGER.info(
+        "Removed %d entries (%d bytes).",
+        result.num_removed_entries,
+        result.freed_bytes,
+    )
+
+
+@cache.command("vacuum")
+@click.pass_obj
+def vacuum_command(config_dict: dict) -> None:
+    """Compact storages of the cache."""
+
+    config = load_cache_config(config_dict)
+    assert config.cache_dir is not None
+    size_before = calculate_directory_size(config.cache_dir)
+    with open_maintainable_cache_table(config) as table:
+        table.compact()
+    size_after = calculate_directory_size(config.cache_dir)
+    LOGGER.info(
+        "Compacted the cache directory from %d bytes to %d bytes.",
+        size_before,
+        size_after,
+    )
+
+
+@cache.command("verify")
+@click.pass_obj
+def verify_command(config_dict: dict) -> None:
+    """Verify integrity of the cache."""
+
+    with open_maintainable_cache_table(load_cache_config(config_dict)) as table:
+        problems = table.verify()
+    if not problems:
+        LOGGER.info("No problem found in the cache.")
+        return
+    for problem in problems:
+        LOGGER.error("%s", problem)
+    sys.exit(1)
@@ -2,7 +2,7 @@
 
 import datetime
 
-from sqlalchemy import String
+from sqlalchemy import ForeignKey, LargeBinary, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 # pylint: disable=too-few-public-methods
@@ -12,13 +12,51 @@ class ModelBase(DeclarativeBase):
     """Base class for ORM declarations."""
 
 
+class CachedBlobModel(ModelBase):
+    """Table of outputs shared among cached results.
+
+    Outputs are addressed by hashes of their contents and compressed using zlib.
+    ``size`` is the size of the compressed data, and ``ref_count`` is the number
+    of references from cached results.
+    """
+
+    __tablename__ = "cached_blob"
+
+    blob_hash: Mapped[str] = mapped_column(String(100), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    size: Mapped[int]
+    ref_count: Mapped[int]
+
+
 class CachedCheckResultModel(ModelBase):
-    """Table of cached results."""
+    """Table of cached results.
+
+    Standard output and standard error are saved in :py:class:`CachedBlobModel`.
+    ``last_used_at`` is the time when the result was saved or loaded last,
+    and indexed for eviction of least recently used results.
+    """
 
     __tablename__ = "cached_result"
 
     source_hash: Mapped[str] = mapped_column(String(100), primary_key=True)
     exit_code: Mapped[int]
-    stdout: Mapped[str]
-    stderr: Mapped[str]
+    stdout_hash: Mapped[str] = mapped_column(
+        String(100), ForeignKey(CachedBlobModel.blob_hash)
+    )
+    stderr_hash: Mapped[str] = mapped_column(
+        String(100), ForeignKey(CachedBlobModel.blob_hash)
+    )
     created_at: Mapped[datetime.datetime]
+    last_used_at: Mapped[datetime.datetime] = mapped_column(index=True)
+
+
+class CacheInfoModel(ModelBase):
+    """Table of statistics of the cache updated incrementally.
+
+    Statistics are saved to avoid scanning tables for each write.
+    """
+
+    __tablename__ = "cache_info"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    value: Mapped[int]
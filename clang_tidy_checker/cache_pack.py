@@ -0,0 +1,205 @@
+"""Packs of cached results to move caches among machines.
+
+A pack is a gzip file of lines of JSON records:
+
+- A header ``{"format": "clang-tidy-checker-cache-pack", "version": 1}``.
+- An output ``{"output": <hash>, "text": <text>}``, written once for each
+  content before results referring to it.
+- A result ``{"source_hash": <key>, "exit_code": <int>, "stdout": <hash>,
+  "stderr": <hash>}``.
+
+Packs are append-only. Each export writes a gzip member starting with a header,
+and gzip members concatenated in a file are read as a stream. Results are
+written from the least recently used one, so that later results in a pack are
+more recent.
+"""
+
+import dataclasses
+import gzip
+import io
+import json
+import logging
+import typing
+
+from clang_tidy_checker.cache_backend import (
+    DEFAULT_WRITE_BATCH_SIZE,
+    ICacheTable,
+    calculate_blob_hash,
+)
+from clang_tidy_checker.check_result import CheckResult
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the format of packs.
+PACK_FORMAT = "clang-tidy-checker-cache-pack"
+
+# Version of the format of packs.
+PACK_VERSION = 1
+
+# Level of compression of packs.
+# (Packs are transferred among machines, so they are compressed more than
+# outputs in caches.)
+PACK_COMPRESSION_LEVEL = 6
+
+# Number of results imported in a batch.
+IMPORT_BATCH_SIZE = DEFAULT_WRITE_BATCH_SIZE
+
+
+class InvalidPackError(Exception):
+    """Exception of invalid packs."""
+
+
+@dataclasses.dataclass
+class PackStatistics:
+    """Statistics of an export or an import of a pack."""
+
+    num_results: int = 0
+    num_skipped_results: int = 0
+
+
+def export_pack(
+    table: ICacheTable, filepath: str, append: bool = False
+) -> PackStatistics:
+    """Export cached results to a pack.
+
+    Args:
+        table (ICacheTable): Table of caches.
+        filepath (str): File path of the pack.
+        append (bool): Whether to append results to an existing pack.
+
+    Returns:
+        PackStatistics: Statistics.
+    """
+    statistics = PackStatistics()
+    written_outputs: typing.Set[str] = set()
+    with gzip.open(
+        filepath, mode="ab" if append else "wb", compresslevel=PACK_COMPRESSION_LEVEL
+    ) as binary_file, io.TextIOWrapper(binary_file, encoding="utf8") as file:
+        _write_record(file, {"format": PACK_FORMAT, "version": PACK_VERSION})
+        for source_hash, result in table.iterate_results():
+            output_hashes = []
+            for text in (result.stdout, result.stderr):
+                output_hash = calculate_blob_hash(text)
+                if output_hash not in written_outputs:
+                    _write_record(file, {"output": output_hash, "text": text})
+                    written_outputs.add(output_hash)
+                output_hashes.append(output_hash)
+            _write_record(
+                file,
+                {
+                    "source_hash": source_hash,
+                    "exit_code": result.exit_code,
+                    "stdout": output_hashes[0],
+                    "stderr": output_hashes[1],
+                },
+            )
+            statistics.num_results += 1
+    return statistics
+
+
+def import_pack(table: ICacheTable, filepath: str) -> PackStatistics:
+    """Import results in a pack to a table of caches.
+
+    Results already in the table are skipped. Results are saved in batches,
+    and old entries are removed by the table when the limits are exceeded.
+
+    Args:
+        table (ICacheTable): Table of caches.
+        filepath (str): File path of the pack.
+
+    Returns:
+        PackStatistics: Statistics.
+    """
+    statistics = PackStatistics()
+    batch: typing.Dict[str, CheckResult] = {}
+    for source_hash, result in read_pack(filepath):
+        batch[source_hash] = result
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _import_batch(table, batch, statistics)
+            batch = {}
+    _import_batch(table, batch, statistics)
+    table.flush()
+    return statistics
+
+
+def read_pack(filepath: str) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+    """Read results in a pack.
+
+    Args:
+        filepath (str): File path of the pack.
+
+    Raises:
+        InvalidPackError: If the pack is invalid.
+
+    Yields:
+        typing.Tuple[str, CheckResult]: Hashes of source codes and results.
+    """
+    outputs: typing.Dict[str, str] = {}
+    with gzip.open(filepath, mode="rt", encoding="utf8") as file:
+        for line_number, line in enumerate(file, start=1):
+            try:
+                record = json.loads(line)
+                if "format" in record:
+                    _check_header(record)
+                elif "output" in record:
+                    outputs[str(record["output"])] = str(record["text"])
+                else:
+                    yield str(record["source_hash"]), CheckResult(
+                        exit_code=int(record["exit_code"]),
+                        stdout=outputs[record["stdout"]],
+                        stderr=outputs[record["stderr"]],
+                    )
+            except (ValueError, KeyError, TypeError) as error:
+                raise InvalidPackError(
+                    f"Invalid record at line {line_number} of {filepath}: {error}"
+                ) from error
+
+
+def _write_record(file: typing.TextIO, record: dict) -> None:
+    """Write a record to a pack.
+
+    Args:
+        file (typing.TextIO): File.
+        record (dict): Record.
+    """
+    file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    file.write("\n")
+
+
+def _check_header(record: dict) -> None:
+    """Check a header of a pack.
+
+    Args:
+        record (dict): Record of the header.
+
+    Raises:
+        InvalidPackError: If the format is not supported.
+    """
+    if record["format"] != PACK_FORMAT or record.get("version") != PACK_VERSION:
+        raise InvalidPackError(
+            f"Unsupported format of packs: {record['format']} "
+            f"version {record.get('version')}"
+        )
+
+
+def _import_batch(
+    table: ICacheTable,
+    batch: typing.Dict[str, CheckResult],
+    statistics: PackStatistics,
+) -> None:
+    """Import a batch of results skipping results already in the table.
+
+    Args:
+        table (ICacheTable): Table of caches.
+        batch (typing.Dict[str, CheckResult]): Results.
+        statistics (PackStatistics): Statistics updated.
+    """
+    if not batch:
+        return
+    cached_hashes = table.find_cached(batch.keys())
+    for source_hash, result in batch.items():
+        if source_hash in cached_hashes:
+            statistics.num_skipped_results += 1
+        else:
+            table.save(source_hash, result)
+            statistics.num_results += 1
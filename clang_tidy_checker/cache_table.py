@@ -1,97 +1,625 @@
-"""Tables of cached results."""
+"""Tables of cached results using SQLAlchemy."""
 
 import datetime
+import logging
 import typing
 
 import sqlalchemy
+import sqlalchemy.dialects.sqlite
+import sqlalchemy.event
+import sqlalchemy.exc
 import sqlalchemy.orm
 
-from clang_tidy_checker.cache_model import CachedCheckResultModel, ModelBase
+from clang_tidy_checker.cache_backend import (
+    BUSY_TIMEOUT_SECONDS,
+    DEFAULT_WRITE_BATCH_SIZE,
+    MAX_QUERY_PARAMETERS,
+    NUM_ENTRIES_INFO,
+    TOTAL_BYTES_INFO,
+    BufferedCacheTable,
+    EvictionPlan,
+    PendingResult,
+    collect_outputs,
+    compress_text,
+    decompress_result,
+    retry_on_lock_error,
+)
+from clang_tidy_checker.cache_model import (
+    CachedBlobModel,
+    CachedCheckResultModel,
+    CacheInfoModel,
+    ModelBase,
+)
 from clang_tidy_checker.check_result import CheckResult
 
+LOGGER = logging.getLogger(__name__)
 
-class CacheTable:
-    """Tables of cached results."""
+# Execution option to start transactions with locks for writes.
+BEGIN_IMMEDIATE_OPTION = "clang_tidy_checker_begin_immediate"
 
-    def __init__(self, engine: sqlalchemy.Engine, max_cache_entries: int) -> None:
+# Aliases of the table of outputs used in joins.
+# (Created once for caches of compiled queries in SQLAlchemy.)
+_STDOUT_BLOB = sqlalchemy.orm.aliased(CachedBlobModel, name="stdout_blob")
+_STDERR_BLOB = sqlalchemy.orm.aliased(CachedBlobModel, name="stderr_blob")
+
+# Query of results with their outputs.
+_SELECT_RESULTS = (
+    sqlalchemy.select(
+        CachedCheckResultModel.source_hash,
+        CachedCheckResultModel.exit_code,
+        _STDOUT_BLOB.blob_hash,
+        _STDOUT_BLOB.data,
+        _STDERR_BLOB.blob_hash,
+        _STDERR_BLOB.data,
+    )
+    .join(
+        _STDOUT_BLOB,
+        CachedCheckResultModel.stdout_hash == _STDOUT_BLOB.blob_hash,
+    )
+    .join(
+        _STDERR_BLOB,
+        CachedCheckResultModel.stderr_hash == _STDERR_BLOB.blob_hash,
+    )
+)
+
+
+def _is_lock_error(error: Exception) -> bool:
+    """Check whether an error is caused by locks of the database.
+
+    Args:
+        error (Exception): Error.
+
+    Returns:
+        bool: True if caused by locks.
+    """
+    if not isinstance(error, sqlalchemy.exc.OperationalError):
+        return False
+    message = str(error.orig)
+    return "locked" in message or "busy" in message
+
+
+class CacheTable(BufferedCacheTable):
+    """Tables of cached results using SQLAlchemy.
+
+    Saved results are buffered and written in batches of transactions.
+    Call :py:meth:`flush` to write the remaining results.
+
+    Outputs of results are compressed and saved once for each content,
+    because many source codes have the same outputs (e.g., empty outputs).
+    Outputs are removed when no result refers to them.
+
+    Least recently used results are removed when the number of entries
+    or the total size of outputs exceeds the limit. Times of uses of loaded
+    results are recorded in memory and written in :py:meth:`flush` to avoid
+    writing for each load.
+
+    When the total size exceeds the limit, results are removed until the size
+    becomes ``CACHE_SIZE_LOW_WATER_RATIO`` times the limit in a pass.
+    The number of entries and the total size are saved in the database
+    and updated incrementally.
+
+    A database can be shared among processes if the engine is created by
+    :py:func:`create_engine_at`. Writes start transactions with locks for
+    writes (``BEGIN IMMEDIATE``) and are retried when the database is locked.
+
+    Args:
+        engine (sqlalchemy.Engine): Engine of the database.
+        max_cache_entries (int): Maximum number of entries in the cache.
+        max_cache_bytes (typing.Optional[int]): Maximum total size of outputs
+            in the cache in bytes. No limit if None.
+        write_batch_size (int): Number of results written in a transaction.
+    """
+
+    def __init__(
+        self,
+        engine: sqlalchemy.Engine,
+        max_cache_entries: int,
+        max_cache_bytes: typing.Optional[int] = None,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> None:
+        super().__init__(
+            max_cache_entries=max_cache_entries,
+            max_cache_bytes=max_cache_bytes,
+            write_batch_size=write_batch_size,
+        )
         self._engine = engine
-        ModelBase.metadata.create_all(engine)
-        self._max_cache_entries = max_cache_entries
+        # Transactions with writes after reads lock the database at first
+        # not to fail when other processes write between reads and writes.
+        self._write_engine = engine.execution_options(**{BEGIN_IMMEDIATE_OPTION: True})
+        retry_on_lock_error(
+            lambda: ModelBase.metadata.create_all(engine), _is_lock_error
+        )
+        retry_on_lock_error(self._initialize_info, _is_lock_error)
 
-    def save(self, source_hash: str, result: CheckResult) -> None:
-        """Save a result of a check."""
-        with sqlalchemy.orm.Session(self._engine) as session:
-            cached_result = CachedCheckResultModel(
-                source_hash=source_hash,
-                exit_code=result.exit_code,
-                stdout=result.stdout,
-                stderr=result.stderr,
-                created_at=datetime.datetime.now(),
+    def _write(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        retry_on_lock_error(
+            lambda: self._write_once(pending_results, last_used_times),
+            _is_lock_error,
+        )
+
+    def _write_once(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        """Write results and times of uses in a transaction.
+
+        Args:
+            pending_results (typing.Dict[str, PendingResult]): Results to write.
+            last_used_times (typing.Dict[str, datetime.datetime]): Times of last
+                uses for hashes of source codes.
+        """
+        last_used_times = dict(last_used_times)
+        with sqlalchemy.orm.Session(self._write_engine) as session:
+            # The same source can be checked concurrently, so existing entries
+            # are kept as they are.
+            existing_hashes = self._select_existing_hashes(
+                session, list(pending_results.keys())
             )
-            session.add(cached_result)
+            new_results: typing.Dict[str, PendingResult] = {}
+            for source_hash, pending in pending_results.items():
+                if source_hash in existing_hashes:
+                    last_used_times[source_hash] = pending.created_at
+                else:
+                    new_results[source_hash] = pending
+            if new_results:
+                self._insert_results(session, new_results)
+            if last_used_times:
+                self._update_last_used_times(session, last_used_times)
+            if new_results:
+                self._remove_old_entries(session)
             session.commit()
 
-        self._remove_old_entries()
+    def _read(self, source_hashes: typing.List[str]) -> typing.Dict[str, CheckResult]:
+        results: typing.Dict[str, CheckResult] = {}
+        with sqlalchemy.orm.Session(self._engine) as session:
+            for begin in range(0, len(source_hashes), MAX_QUERY_PARAMETERS):
+                results.update(
+                    self._select_results(
+                        session, source_hashes[begin : begin + MAX_QUERY_PARAMETERS]
+                    )
+                )
+        return results
 
-    def load(self, source_hash: str) -> typing.Optional[CheckResult]:
-        """Load a cached result of a check.
+    def _select_results(
+        self, session: sqlalchemy.orm.Session, source_hashes: typing.List[str]
+    ) -> typing.Dict[str, CheckResult]:
+        """Select results with their outputs.
 
         Args:
-            source_hash (str): Hash of source code.
+            session (sqlalchemy.orm.Session): Session.
+            source_hashes (typing.List[str]): Hashes of source codes.
 
         Returns:
-            typing.Optional[CheckResult]: Cached result if found.
+            typing.Dict[str, CheckResult]: Results found.
         """
+        statement = _SELECT_RESULTS.where(
+            CachedCheckResultModel.source_hash.in_(source_hashes)
+        )
+
+        # Outputs shared among results are decompressed once.
+        texts: typing.Dict[str, str] = {}
+        results: typing.Dict[str, CheckResult] = {}
+        for row in session.execute(statement):
+            source_hash, exit_code, stdout_hash, stdout, stderr_hash, stderr = row
+            results[source_hash] = decompress_result(
+                exit_code, (stdout_hash, stdout), (stderr_hash, stderr), texts
+            )
+        return results
+
+    def _find_saved(self, source_hashes: typing.List[str]) -> typing.Set[str]:
+        with sqlalchemy.orm.Session(self._engine) as session:
+            return self._select_existing_hashes(session, source_hashes)
+
+    def _iterate(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
         with sqlalchemy.orm.Session(self._engine) as session:
-            statement = sqlalchemy.select(CachedCheckResultModel).where(
-                CachedCheckResultModel.source_hash == source_hash
+            rows = session.execute(
+                _SELECT_RESULTS.order_by(
+                    CachedCheckResultModel.last_used_at.asc()
+                ).execution_options(yield_per=MAX_QUERY_PARAMETERS)
             )
-            cached_result = session.scalars(statement).one_or_none()
-            if cached_result is None:
-                return None
-            return CheckResult(
-                exit_code=cached_result.exit_code,
-                stdout=cached_result.stdout,
-                stderr=cached_result.stderr,
+            with rows:
+                for partition in rows.partitions():
+                    # Outputs shared among results in a partition are
+                    # decompressed once.
+                    texts: typing.Dict[str, str] = {}
+                    for (
+                        source_hash,
+                        exit_code,
+                        stdout_hash,
+                        stdout,
+                        stderr_hash,
+                        stderr,
+                    ) in partition:
+                        yield source_hash, decompress_result(
+                            exit_code,
+                            (stdout_hash, stdout),
+                            (stderr_hash, stderr),
+                            texts,
+                        )
+
+    def _select_existing_hashes(
+        self, session: sqlalchemy.orm.Session, source_hashes: typing.List[str]
+    ) -> typing.Set[str]:
+        """Select hashes of source codes already in the database.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            source_hashes (typing.List[str]): Hashes of source codes.
+
+        Returns:
+            typing.Set[str]: Hashes found in the database.
+        """
+        existing_hashes: typing.Set[str] = set()
+        for begin in range(0, len(source_hashes), MAX_QUERY_PARAMETERS):
+            existing_hashes.update(
+                session.scalars(
+                    sqlalchemy.select(CachedCheckResultModel.source_hash).where(
+                        CachedCheckResultModel.source_hash.in_(
+                            source_hashes[begin : begin + MAX_QUERY_PARAMETERS]
+                        )
+                    )
+                )
             )
+        return existing_hashes
 
-    def _remove_old_entries(self) -> None:
-        """Remove old entries."""
-        with sqlalchemy.orm.Session(self._engine) as session:
-            current_num_entries = typing.cast(
-                int,
-                session.scalar(
-                    sqlalchemy.select(
-                        # Pylint wrongly generate an error.
-                        # pylint: disable=not-callable
-                        sqlalchemy.func.count(CachedCheckResultModel.source_hash)
+    def _insert_results(
+        self,
+        session: sqlalchemy.orm.Session,
+        pending_results: typing.Dict[str, PendingResult],
+    ) -> None:
+        """Insert results and their outputs.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            pending_results (typing.Dict[str, PendingResult]): Results to insert.
+        """
+        output_hashes, blobs, ref_counts = collect_outputs(pending_results)
+        rows: typing.List[dict] = []
+        for source_hash, pending in pending_results.items():
+            stdout_hash, stderr_hash = output_hashes[source_hash]
+            rows.append(
+                {
+                    "source_hash": source_hash,
+                    "exit_code": pending.result.exit_code,
+                    "stdout_hash": stdout_hash,
+                    "stderr_hash": stderr_hash,
+                    "created_at": pending.created_at,
+                    "last_used_at": pending.created_at,
+                }
+            )
+
+        inserted_bytes = self._insert_blobs(session, blobs, ref_counts)
+        session.execute(sqlalchemy.insert(CachedCheckResultModel), rows)
+
+        self._add_info(session, NUM_ENTRIES_INFO, len(rows))
+        self._add_info(session, TOTAL_BYTES_INFO, inserted_bytes)
+
+    def _insert_blobs(
+        self,
+        session: sqlalchemy.orm.Session,
+        blobs: typing.Dict[str, str],
+        ref_counts: typing.Counter[str],
+    ) -> int:
+        """Insert outputs, or add reference counts of existing outputs.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            blobs (typing.Dict[str, str]): Outputs for their hashes.
+            ref_counts (typing.Counter[str]): Numbers of new references.
+
+        Returns:
+            int: Total size of inserted outputs.
+        """
+        blob_states = self._select_blob_states(session, list(blobs.keys()))
+        new_blobs: typing.List[dict] = []
+        for blob_hash, text in blobs.items():
+            if blob_hash in blob_states:
+                continue
+            data = compress_text(text)
+            new_blobs.append(
+                {
+                    "blob_hash": blob_hash,
+                    "data": data,
+                    "size": len(data),
+                    "ref_count": ref_counts[blob_hash],
+                }
+            )
+        if new_blobs:
+            session.execute(sqlalchemy.insert(CachedBlobModel), new_blobs)
+        if blob_states:
+            self._add_ref_counts(
+                session,
+                {blob_hash: ref_counts[blob_hash] for blob_hash in blob_states},
+            )
+        return sum(row["size"] for row in new_blobs)
+
+    def _update_last_used_times(
+        self,
+        session: sqlalchemy.orm.Session,
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        """Update times of last uses of results.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            last_used_times (typing.Dict[str, datetime.datetime]): Times of last
+                uses for hashes of source codes.
+        """
+        session.connection().execute(
+            sqlalchemy.update(CachedCheckResultModel)
+            .where(
+                CachedCheckResultModel.source_hash == sqlalchemy.bindparam("used_hash")
+            )
+            .values(last_used_at=sqlalchemy.bindparam("used_at")),
+            [
+                {"used_hash": source_hash, "used_at": used_at}
+                for source_hash, used_at in last_used_times.items()
+            ],
+        )
+
+    def _remove_old_entries(self, session: sqlalchemy.orm.Session) -> None:
+        """Remove least recently used entries.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+        """
+        total_bytes = self._get_info(session, TOTAL_BYTES_INFO)
+        targets = self._eviction_targets(
+            self._get_info(session, NUM_ENTRIES_INFO), total_bytes
+        )
+        if targets is None:
+            return
+        min_removed_entries, target_bytes = targets
+
+        plan = self._plan_eviction(
+            session,
+            min_removed_entries=min_removed_entries,
+            max_remaining_bytes=target_bytes,
+            total_bytes=total_bytes,
+        )
+
+        for begin in range(0, len(plan.removed_hashes), MAX_QUERY_PARAMETERS):
+            session.execute(
+                sqlalchemy.delete(CachedCheckResultModel).where(
+                    CachedCheckResultModel.source_hash.in_(
+                        plan.removed_hashes[begin : begin + MAX_QUERY_PARAMETERS]
                     )
-                ),
+                )
+            )
+        self._add_ref_counts(
+            session,
+            {blob_hash: -count for blob_hash, count in plan.released_counts.items()},
+        )
+        # Remove outputs no result refers to.
+        unreferenced_hashes = plan.unreferenced_hashes()
+        for begin in range(0, len(unreferenced_hashes), MAX_QUERY_PARAMETERS):
+            session.execute(
+                sqlalchemy.delete(CachedBlobModel).where(
+                    CachedBlobModel.blob_hash.in_(
+                        unreferenced_hashes[begin : begin + MAX_QUERY_PARAMETERS]
+                    )
+                )
             )
-            if current_num_entries <= self._max_cache_entries:
-                return
-            removed_entries = current_num_entries - self._max_cache_entries
-            statement = (
-                sqlalchemy.select(CachedCheckResultModel)
-                .order_by(CachedCheckResultModel.created_at.asc())
-                .limit(removed_entries)
+
+        self._add_info(session, NUM_ENTRIES_INFO, -len(plan.removed_hashes))
+        self._add_info(session, TOTAL_BYTES_INFO, -plan.freed_bytes)
+
+    def _plan_eviction(
+        self,
+        session: sqlalchemy.orm.Session,
+        *,
+        min_removed_entries: int,
+        max_remaining_bytes: int,
+        total_bytes: int,
+    ) -> EvictionPlan:
+        """Select entries to remove in a pass of the index of last uses.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            min_removed_entries (int): Minimum number of entries to remove.
+            max_remaining_bytes (int): Maximum total size after removal.
+            total_bytes (int): Current total size.
+
+        Returns:
+            EvictionPlan: Plan of removal.
+        """
+        plan = EvictionPlan()
+        candidates = session.execute(
+            sqlalchemy.select(
+                CachedCheckResultModel.source_hash,
+                CachedCheckResultModel.stdout_hash,
+                CachedCheckResultModel.stderr_hash,
             )
-            for entry in session.scalars(statement):
-                session.delete(entry)
+            .order_by(CachedCheckResultModel.last_used_at.asc())
+            .execution_options(yield_per=MAX_QUERY_PARAMETERS)
+        )
+        with candidates:
+            for partition in candidates.partitions():
+                new_blob_hashes = {
+                    blob_hash for row in partition for blob_hash in row[1:]
+                } - plan.blob_states.keys()
+                plan.blob_states.update(
+                    self._select_blob_states(session, list(new_blob_hashes))
+                )
+                for source_hash, stdout_hash, stderr_hash in partition:
+                    if (
+                        len(plan.removed_hashes) >= min_removed_entries
+                        and total_bytes - plan.freed_bytes <= max_remaining_bytes
+                    ):
+                        return plan
+                    plan.remove(source_hash, (stdout_hash, stderr_hash))
+        return plan
+
+    def _select_blob_states(
+        self, session: sqlalchemy.orm.Session, blob_hashes: typing.List[str]
+    ) -> typing.Dict[str, typing.Tuple[int, int]]:
+        """Select reference counts and sizes of outputs.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            blob_hashes (typing.List[str]): Hashes of outputs.
+
+        Returns:
+            typing.Dict[str, typing.Tuple[int, int]]: Reference counts and sizes
+            of outputs found in the database.
+        """
+        blob_states: typing.Dict[str, typing.Tuple[int, int]] = {}
+        for begin in range(0, len(blob_hashes), MAX_QUERY_PARAMETERS):
+            for blob_hash, ref_count, size in session.execute(
+                sqlalchemy.select(
+                    CachedBlobModel.blob_hash,
+                    CachedBlobModel.ref_count,
+                    CachedBlobModel.size,
+                ).where(
+                    CachedBlobModel.blob_hash.in_(
+                        blob_hashes[begin : begin + MAX_QUERY_PARAMETERS]
+                    )
+                )
+            ):
+                blob_states[blob_hash] = (ref_count, size)
+        return blob_states
+
+    def _add_ref_counts(
+        self, session: sqlalchemy.orm.Session, counts: typing.Dict[str, int]
+    ) -> None:
+        """Add numbers to reference counts of outputs.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            counts (typing.Dict[str, int]): Numbers added for hashes of outputs.
+        """
+        if not counts:
+            return
+        # Executed in the connection directly because updates of multiple rows
+        # in ORM require primary keys in parameters.
+        session.connection().execute(
+            sqlalchemy.update(CachedBlobModel)
+            .where(CachedBlobModel.blob_hash == sqlalchemy.bindparam("target_hash"))
+            .values(
+                ref_count=CachedBlobModel.ref_count + sqlalchemy.bindparam("count")
+            ),
+            [
+                {"target_hash": blob_hash, "count": count}
+                for blob_hash, count in counts.items()
+            ],
+        )
+
+    def _initialize_info(self) -> None:
+        """Initialize statistics of the cache if not saved."""
+        with sqlalchemy.orm.Session(self._write_engine) as session:
+            saved_names = set(session.scalars(sqlalchemy.select(CacheInfoModel.name)))
+            # Pylint wrongly generate an error.
+            # pylint: disable=not-callable
+            queries = {
+                NUM_ENTRIES_INFO: sqlalchemy.select(
+                    sqlalchemy.func.count(CachedCheckResultModel.source_hash)
+                ),
+                TOTAL_BYTES_INFO: sqlalchemy.select(
+                    sqlalchemy.func.coalesce(
+                        sqlalchemy.func.sum(CachedBlobModel.size), 0
+                    )
+                ),
+            }
+            for name, query in queries.items():
+                if name not in saved_names:
+                    session.add(
+                        CacheInfoModel(name=name, value=int(session.scalar(query) or 0))
+                    )
             session.commit()
 
+    def _get_info(self, session: sqlalchemy.orm.Session, name: str) -> int:
+        """Get a statistics of the cache.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            name (str): Name of the statistics.
+
+        Returns:
+            int: Value.
+        """
+        return int(
+            session.scalar(
+                sqlalchemy.select(CacheInfoModel.value).where(
+                    CacheInfoModel.name == name
+                )
+            )
+            or 0
+        )
+
+    def _add_info(self, session: sqlalchemy.orm.Session, name: str, value: int) -> None:
+        """Add a value to a statistics of the cache.
+
+        Args:
+            session (sqlalchemy.orm.Session): Session.
+            name (str): Name of the statistics.
+            value (int): Value to add.
+        """
+        session.execute(
+            sqlalchemy.update(CacheInfoModel)
+            .where(CacheInfoModel.name == name)
+            .values(value=CacheInfoModel.value + value)
+        )
+
+
+def create_engine_at(filepath: str) -> sqlalchemy.Engine:
+    """Create an engine of a database file shared among processes.
+
+    The database uses write-ahead logging (WAL) for reads concurrent with
+    writes, and waits for locks held by other processes. Connections are
+    pooled in the engine.
+
+    Args:
+        filepath (str): File path.
+
+    Returns:
+        sqlalchemy.Engine: Engine.
+    """
+    engine = sqlalchemy.create_engine(
+        f"sqlite:///{filepath}", connect_args={"timeout": BUSY_TIMEOUT_SECONDS}
+    )
+
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _) -> None:
+        # Disable transactions of the driver to start transactions below.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @sqlalchemy.event.listens_for(engine, "begin")
+    def on_begin(connection: sqlalchemy.Connection) -> None:
+        if connection.get_execution_options().get(BEGIN_IMMEDIATE_OPTION, False):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            connection.exec_driver_sql("BEGIN")
+
+    return engine
+
 
-def create_cache_table_at(filepath: str, max_cache_entries: int) -> CacheTable:
+def create_cache_table_at(
+    filepath: str,
+    max_cache_entries: int,
+    max_cache_bytes: typing.Optional[int] = None,
+) -> CacheTable:
     """Create a table of caches at a file path.
 
     Args:
         filepath (str): File path.
         max_cache_entries (int): Maximum number of entries in the cache.
+        max_cache_bytes (typing.Optional[int]): Maximum total size of outputs
+            in the cache in bytes. No limit if None.
 
     Returns:
         CacheTable: Created table.
     """
     return CacheTable(
-        engine=sqlalchemy.create_engine(f"sqlite:///{filepath}"),
+        engine=create_engine_at(filepath),
         max_cache_entries=max_cache_entries,
+        max_cache_bytes=max_cache_bytes,
     )
@@ -1,48 +1,94 @@
 """Check files.
 """
 
+import asyncio
 import typing
 
 import tqdm
 import tqdm.contrib.logging
 
+from clang_tidy_checker.check_result import CheckResult
 from clang_tidy_checker.clang_tidy_executor import (
     CachedClangTidyExecutor,
     ClangTidyExecutor,
     IClangTidyExecutor,
+    write_result_log,
 )
+from clang_tidy_checker.compile_database import CompileDatabase
 from clang_tidy_checker.config import Config
 
 
-async def check_files(*, config: Config, input_files: typing.List[str]) -> bool:
+async def check_files(
+    *,
+    config: Config,
+    input_files: typing.List[str],
+    compile_database: typing.Optional[CompileDatabase] = None,
+) -> bool:
     """Check files.
 
+    Files are checked in parallel.
+    The number of processes executed at once is limited by executors.
+    Checks are started from files estimated to be the slowest,
+    but results are written to logs in the order of the input files.
+
     Args:
         config (Config): Configuration.
         input_files (typing.List[str]): Files.
+        compile_database (typing.Optional[CompileDatabase]): Database of compile
+            commands. Loaded from the build directory when required if not given.
 
     Returns:
         bool: True if no error, False otherwise.
     """
 
-    has_error = False
-
     if config.cache_dir:
-        executor: IClangTidyExecutor = CachedClangTidyExecutor(config=config)
+        executor: IClangTidyExecutor = CachedClangTidyExecutor(
+            config=config, compile_database=compile_database
+        )
     else:
         executor = ClangTidyExecutor(config=config)
 
+    results: typing.List[typing.Optional[CheckResult]] = [None] * len(input_files)
+    next_logged_index = 0
+
+    def write_finished_logs() -> None:
+        nonlocal next_logged_index
+        while next_logged_index < len(results):
+            result = results[next_logged_index]
+            if result is None:
+                break
+            write_result_log(
+                input_file=input_files[next_logged_index],
+                exit_code=result.exit_code,
+                stdout=result.stdout,
+                stderr=result.stderr,
+            )
+            next_logged_index += 1
+
     async with executor:
         with tqdm.contrib.logging.logging_redirect_tqdm():
             tqdm_obj = tqdm.tqdm(
                 total=len(input_files), unit="file", disable=not config.show_progress
             )
-            # TODO: multiple files at once.
-            for input_file in input_files:
+
+            async def check_file(index: int, input_file: str) -> None:
                 result = await executor.execute(input_file=input_file)
-                if result.exit_code != 0:
-                    has_error = True
+                results[index] = result
                 tqdm_obj.update()
-            tqdm_obj.close()
+                write_finished_logs()
+
+            # Tasks wait for executors in the order of creation.
+            tasks = [
+                asyncio.create_task(check_file(index, input_files[index]))
+                for index in executor.order_checks(input_files)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # Stop remaining checks when one of them failed or was cancelled.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                tqdm_obj.close()
 
-    return not has_error
+    return all(result is not None and result.exit_code == 0 for result in results)
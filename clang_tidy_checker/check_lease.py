@@ -0,0 +1,217 @@
+"""Leases of checks shared among processes.
+
+A process checking a source code not found in the cache holds a lease of the
+key of the cache as a file in the cache directory, so that other processes
+wait for the result instead of checking the same source code.
+
+Holders renew leases periodically. Leases not renewed for
+:py:data:`LEASE_EXPIRY_SECONDS` and leases of terminated processes
+in the same host are regarded as stale and taken over, so that crashed
+processes do not block others forever. A stale lease is moved to a unique
+name before removal, so that only one of processes taking it over at once
+removes it.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import typing
+import uuid
+
+LOGGER = logging.getLogger(__name__)
+
+# Time after which leases not renewed are regarded as stale in seconds.
+LEASE_EXPIRY_SECONDS = 60.0
+
+# Interval of renewals of leases in seconds.
+LEASE_RENEWAL_INTERVAL_SECONDS = 10.0
+
+# Interval of checks of results while waiting for other processes in seconds.
+LEASE_POLL_INTERVAL_SECONDS = 0.5
+
+# Suffix of files of leases.
+LEASE_FILE_SUFFIX = ".lease"
+
+# Suffix of files of stale leases being removed.
+STALE_FILE_SUFFIX = ".stale"
+
+# Suffix of files marking that other processes are waiting for results.
+WAITING_FILE_SUFFIX = ".waiting"
+
+
+@dataclasses.dataclass
+class Lease:
+    """Class of a lease held by this process."""
+
+    key: str
+    path: str
+
+
+def _is_process_running(pid: int) -> bool:
+    """Check whether a process is running.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        bool: True if running.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LeaseStore:
+    """Class to manage leases in files.
+
+    Args:
+        directory (str): Directory of files of leases.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+        self._hostname = socket.gethostname()
+
+    def try_acquire(self, key: str) -> typing.Optional[Lease]:
+        """Try to acquire a lease.
+
+        Args:
+            key (str): Key of the cache.
+
+        Returns:
+            typing.Optional[Lease]: Lease if acquired.
+            None if another process holds the lease.
+        """
+        path = self._filepath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                file_descriptor = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._remove_stale(path):
+                    return None
+                continue
+            with os.fdopen(file_descriptor, mode="w", encoding="utf8") as file:
+                json.dump({"hostname": self._hostname, "pid": os.getpid()}, file)
+            return Lease(key=key, path=path)
+        return None
+
+    def renew(self, lease: Lease) -> None:
+        """Renew a lease.
+
+        Args:
+            lease (Lease): Lease.
+        """
+        try:
+            os.utime(lease.path)
+        except FileNotFoundError:
+            LOGGER.warning("Lease %s was removed by another process.", lease.path)
+
+    def release(self, lease: Lease) -> None:
+        """Release a lease.
+
+        Args:
+            lease (Lease): Lease.
+        """
+        for path in (lease.path, lease.path + WAITING_FILE_SUFFIX):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def mark_waiting(self, key: str) -> None:
+        """Mark that this process is waiting for the result of a lease.
+
+        Args:
+            key (str): Key of the cache.
+        """
+        path = self._filepath(key) + WAITING_FILE_SUFFIX
+        with open(path, mode="a", encoding="utf8"):
+            pass
+
+    def has_waiters(self, lease: Lease) -> bool:
+        """Check whether other processes are waiting for the result of a lease.
+
+        Args:
+            lease (Lease): Lease.
+
+        Returns:
+            bool: True if some processes are waiting.
+        """
+        return os.path.exists(lease.path + WAITING_FILE_SUFFIX)
+
+    def _remove_stale(self, path: str) -> bool:
+        """Remove a lease if stale.
+
+        The lease is renamed to a unique name at first. If another process took
+        over the lease and created a new one in the meantime, the renamed lease
+        is not the stale one, so it is restored instead of removed.
+
+        Args:
+            path (str): File path of the lease.
+
+        Returns:
+            bool: True if the lease was removed or no longer exists.
+            False if another process holds the lease.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return True
+        if not self._is_stale(path, stat):
+            return False
+        stale_path = f"{path}.{uuid.uuid4().hex}{STALE_FILE_SUFFIX}"
+        try:
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            return True
+        renamed_stat = os.stat(stale_path)
+        if (renamed_stat.st_ino, renamed_stat.st_mtime_ns) != (
+            stat.st_ino,
+            stat.st_mtime_ns,
+        ):
+            try:
+                os.link(stale_path, path)
+            except FileExistsError:
+                LOGGER.warning("Lease %s was taken over at once.", path)
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        LOGGER.debug("Took over a stale lease %s.", path)
+        return True
+
+    def _is_stale(self, path: str, stat: os.stat_result) -> bool:
+        """Check whether a lease is stale.
+
+        Args:
+            path (str): File path of the lease.
+            stat (os.stat_result): Status of the file of the lease.
+
+        Returns:
+            bool: True if stale.
+        """
+        if time.time() - stat.st_mtime > LEASE_EXPIRY_SECONDS:
+            return True
+        try:
+            with open(path, mode="r", encoding="utf8") as file:
+                holder = json.load(file)
+        except FileNotFoundError:
+            return True
+        except ValueError:
+            # The holder may be writing the file.
+            return False
+        return holder.get("hostname") == self._hostname and not _is_process_running(
+            int(holder.get("pid", 0))
+        )
+
+    def _filepath(self, key: str) -> str:
+        name = hashlib.sha3_256(key.encode()).hexdigest()
+        return os.path.join(self._directory, name[:2], name[2:] + LEASE_FILE_SUFFIX)
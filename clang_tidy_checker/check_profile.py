@@ -0,0 +1,186 @@
+"""Aggregation of profiles of checks of clang-tidy.
+
+clang-tidy with ``--enable-check-profile --store-check-profile=<dir>`` writes
+a JSON file of the time spent in each check for each source code, like::
+
+    {
+    "file": "/path/to/source.cpp",
+    "timestamp": "2024-01-02 03:04:05.678901",
+    "profile": {
+        "time.clang-tidy.misc-include-cleaner.wall": 1.2e-01,
+        "time.clang-tidy.misc-include-cleaner.user": 1.1e-01,
+        "time.clang-tidy.misc-include-cleaner.sys": 1.0e-02
+    }
+    }
+
+Wall time of checks is merged among source codes into a table of checks
+ranked by the total time.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import re
+import threading
+import typing
+
+LOGGER = logging.getLogger(__name__)
+
+# Pattern of keys of wall time of checks in profiles.
+WALL_TIME_KEY_PATTERN = re.compile(r"^time\.clang-tidy\.(?P<check>.+)\.wall$")
+
+# Number of checks written to logs.
+NUM_LOGGED_CHECKS = 10
+
+
+@dataclasses.dataclass
+class CheckProfile:
+    """Class of the aggregated profile of a check."""
+
+    check: str
+    total_seconds: float = 0.0
+    num_files: int = 0
+    max_seconds: float = 0.0
+    slowest_file: typing.Optional[str] = None
+
+    @property
+    def mean_seconds(self) -> float:
+        """Mean time per source code."""
+        if self.num_files == 0:
+            return 0.0
+        return self.total_seconds / self.num_files
+
+
+def parse_check_profile_file(
+    filepath: str,
+) -> typing.Tuple[str, typing.Dict[str, float]]:
+    """Parse a file of a profile written by clang-tidy.
+
+    Args:
+        filepath (str): File path.
+
+    Raises:
+        ValueError: If the file is invalid.
+
+    Returns:
+        typing.Tuple[str, typing.Dict[str, float]]: Profiled source code and
+        wall time of each check in seconds.
+    """
+    try:
+        with open(filepath, mode="r", encoding="utf8") as file:
+            data = json.load(file)
+        times: typing.Dict[str, float] = {}
+        for key, value in data["profile"].items():
+            match = WALL_TIME_KEY_PATTERN.match(key)
+            if match is not None:
+                times[match.group("check")] = float(value)
+        return str(data["file"]), times
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"Invalid profile of checks {filepath}: {error}") from error
+
+
+class CheckProfileAggregator:
+    """Class to merge profiles of checks among source codes.
+
+    Profiles can be added from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._profiles: typing.Dict[str, CheckProfile] = {}
+        self._num_files = 0
+        self._lock = threading.Lock()
+
+    def add(self, input_file: str, times: typing.Mapping[str, float]) -> None:
+        """Add a profile of a source code.
+
+        Args:
+            input_file (str): Source code.
+            times (typing.Mapping[str, float]): Wall time of each check in seconds.
+        """
+        with self._lock:
+            self._num_files += 1
+            for check, seconds in times.items():
+                profile = self._profiles.setdefault(check, CheckProfile(check=check))
+                profile.total_seconds += seconds
+                profile.num_files += 1
+                if profile.slowest_file is None or seconds > profile.max_seconds:
+                    profile.max_seconds = seconds
+                    profile.slowest_file = input_file
+
+    def add_directory(self, directory: str) -> None:
+        """Add profiles in files written by clang-tidy to a directory.
+
+        Invalid files are skipped with warnings.
+
+        Args:
+            directory (str): Directory.
+        """
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            filepath = os.path.join(directory, name)
+            try:
+                input_file, times = parse_check_profile_file(filepath)
+            except ValueError as error:
+                LOGGER.warning("%s", error)
+                continue
+            self.add(input_file, times)
+
+    @property
+    def num_files(self) -> int:
+        """Number of profiled source codes."""
+        return self._num_files
+
+    def ranked_profiles(self) -> typing.List[CheckProfile]:
+        """Get profiles of checks from the slowest one.
+
+        Returns:
+            typing.List[CheckProfile]: Profiles ranked by the total time.
+        """
+        with self._lock:
+            return sorted(
+                (dataclasses.replace(profile) for profile in self._profiles.values()),
+                key=lambda profile: (-profile.total_seconds, profile.check),
+            )
+
+    def write_report(self, filepath: str) -> None:
+        """Write the merged profiles in JSON.
+
+        Args:
+            filepath (str): File path.
+        """
+        profiles = self.ranked_profiles()
+        report = {
+            "num_files": self.num_files,
+            "total_seconds": sum(profile.total_seconds for profile in profiles),
+            "checks": [
+                {
+                    "check": profile.check,
+                    "total_seconds": profile.total_seconds,
+                    "mean_seconds": profile.mean_seconds,
+                    "max_seconds": profile.max_seconds,
+                    "num_files": profile.num_files,
+                    "slowest_file": profile.slowest_file,
+                }
+                for profile in profiles
+            ],
+        }
+        with open(filepath, mode="w", encoding="utf8") as file:
+            json.dump(report, file, indent=2)
+
+    def log_summary(self) -> None:
+        """Write the slowest checks to logs."""
+        if self.num_files == 0:
+            LOGGER.warning(
+                "No check was profiled. "
+                "Files with results found in the cache are not profiled."
+            )
+            return
+        lines = [f"Slowest checks in {self.num_files} files:"]
+        for profile in self.ranked_profiles()[:NUM_LOGGED_CHECKS]:
+            lines.append(
+                f"  {profile.total_seconds:>10.3f} s total "
+                f"{profile.mean_seconds:>8.3f} s mean  {profile.check}"
+            )
+        LOGGER.info("%s", "\n".join(lines))
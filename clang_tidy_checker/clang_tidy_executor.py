@@ -1,15 +1,48 @@
 """Class to execute clang-tidy."""
 
 import abc
+import asyncio
+import contextlib
+import dataclasses
 import logging
 import os
+import tempfile
+import time
 import typing
 
-from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.cache_backend import (
+    CACHE_DATABASE_FILE_NAME,
+    AsyncCacheTable,
+    ICacheTable,
+)
+from clang_tidy_checker.check_lease import (
+    LEASE_POLL_INTERVAL_SECONDS,
+    LEASE_RENEWAL_INTERVAL_SECONDS,
+    Lease,
+    LeaseStore,
+)
+from clang_tidy_checker.check_profile import CheckProfileAggregator
 from clang_tidy_checker.check_result import CheckResult
-from clang_tidy_checker.command_executor import CommandExecutor
-from clang_tidy_checker.config import Config
+from clang_tidy_checker.command_executor import CommandExecutor, CommandResult
+from clang_tidy_checker.compile_database import CompileDatabase
+from clang_tidy_checker.config import (
+    CACHE_BACKEND_DIRECTORY,
+    CACHE_BACKEND_SQLALCHEMY,
+    CACHE_BACKEND_SQLITE3,
+    Config,
+)
+from clang_tidy_checker.direct_mode import ManifestStore
+from clang_tidy_checker.file_costs import FileCostStore, order_by_cost
+from clang_tidy_checker.path_normalizer import create_path_normalizer
+from clang_tidy_checker.remote_cache import AsyncTieredCacheTable, RemoteCache
+from clang_tidy_checker.run_statistics import RunStatistics, save_run_statistics
 from clang_tidy_checker.source_hash_calculator import SourceHashCalculator
+from clang_tidy_checker.tool_fingerprint import (
+    ClangTidyConfigHasher,
+    calculate_tool_fingerprint,
+    create_cache_key,
+)
+from clang_tidy_checker.tracer import STAGE_CLANG_TIDY, trace_span
 
 try:
     from typing import Self
@@ -19,6 +52,14 @@ except ImportError:
 LOGGER = logging.getLogger(__name__)
 
 
+@dataclasses.dataclass
+class CheckInProgress:
+    """Class of a check shared by requests of the same key of the cache."""
+
+    task: asyncio.Task[CheckResult]
+    num_waiters: int = 0
+
+
 class IClangTidyExecutor(abc.ABC):
     """Interface for clang-tidy executor."""
 
@@ -34,6 +75,9 @@ class IClangTidyExecutor(abc.ABC):
     async def execute(self, *, input_file: str) -> CheckResult:
         """Execute clang-tidy.
 
+        This function can be called concurrently.
+        Implementations limit the number of processes executed at once.
+
         Args:
             input_file (str): Input file path.
 
@@ -41,6 +85,17 @@ class IClangTidyExecutor(abc.ABC):
             CheckResult: Result.
         """
 
+    @abc.abstractmethod
+    def order_checks(self, input_files: typing.List[str]) -> typing.List[int]:
+        """Order files to start checks from the slowest one.
+
+        Args:
+            input_files (typing.List[str]): Files.
+
+        Returns:
+            typing.List[int]: Indices of the files in the order to start checks.
+        """
+
 
 def write_result_log(input_file: str, exit_code: int, stdout: str, stderr: str) -> None:
     """Write log of the result.
@@ -68,12 +123,100 @@ def write_result_log(input_file: str, exit_code: int, stdout: str, stderr: str)
         )
 
 
+def create_cache_table(config: Config) -> AsyncCacheTable:
+    """Create a table of caches.
+
+    When ``config.remote_cache_url`` is set, the table in the cache directory
+    is used in front of the remote cache.
+
+    Args:
+        config (Config): Configuration.
+
+    Returns:
+        AsyncCacheTable: Created table.
+    """
+    local_table = create_local_cache_table(config)
+    if config.remote_cache_url is None:
+        return AsyncCacheTable(local_table)
+    return AsyncTieredCacheTable(local_table, RemoteCache(config.remote_cache_url))
+
+
+def create_local_cache_table(config: Config) -> ICacheTable:
+    """Create a table of caches in the cache directory.
+
+    The module of the backend selected by ``config.cache_backend`` is imported
+    here not to import unused libraries of databases.
+
+    Args:
+        config (Config): Configuration.
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    Returns:
+        ICacheTable: Created table.
+    """
+    # pylint: disable=import-outside-toplevel
+    assert config.cache_dir is not None
+    filepath = os.path.join(config.cache_dir, CACHE_DATABASE_FILE_NAME)
+    if config.cache_backend == CACHE_BACKEND_SQLALCHEMY:
+        from clang_tidy_checker.cache_table import create_cache_table_at
+
+        return create_cache_table_at(
+            filepath,
+            max_cache_entries=config.max_cache_entries,
+            max_cache_bytes=config.max_cache_bytes,
+        )
+    if config.cache_backend == CACHE_BACKEND_SQLITE3:
+        from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+        return SqliteCacheTable(
+            filepath,
+            max_cache_entries=config.max_cache_entries,
+            max_cache_bytes=config.max_cache_bytes,
+        )
+    if config.cache_backend == CACHE_BACKEND_DIRECTORY:
+        from clang_tidy_checker.directory_cache_table import (
+            DIRECTORY_STORE_NAME,
+            DirectoryCacheTable,
+        )
+
+        return DirectoryCacheTable(
+            os.path.join(config.cache_dir, DIRECTORY_STORE_NAME),
+            max_cache_entries=config.max_cache_entries,
+            max_cache_bytes=config.max_cache_bytes,
+        )
+    raise ValueError(f"Unknown backend of caches: {config.cache_backend}")
+
+
 class ClangTidyExecutor(IClangTidyExecutor):
-    """Class to execute clang-tidy."""
+    """Class to execute clang-tidy.
+
+    At most ``config.jobs`` processes of clang-tidy are executed at once.
+
+    If ``file_cost_store`` is given, wall time and peak memory usage of
+    clang-tidy are recorded for each file, and used to order checks.
+
+    If ``config.profile_checks`` is set, time spent in each check of clang-tidy
+    is profiled, and profiles merged among files are written to the file
+    at the exit.
 
-    def __init__(self, config: Config) -> None:
+    Args:
+        config (Config): Configuration.
+        file_cost_store (typing.Optional[FileCostStore]): Store of costs of
+            checks of files. Defaults to None.
+    """
+
+    def __init__(
+        self, config: Config, file_cost_store: typing.Optional[FileCostStore] = None
+    ) -> None:
         self._config = config
         self._command_executor = CommandExecutor()
+        self._semaphore = asyncio.Semaphore(config.jobs)
+        self._file_cost_store = file_cost_store
+        self._check_profile_aggregator: typing.Optional[CheckProfileAggregator] = None
+        if config.profile_checks is not None:
+            self._check_profile_aggregator = CheckProfileAggregator()
 
     async def __aenter__(self) -> Self:
         await self._command_executor.__aenter__()
@@ -81,6 +224,14 @@ class ClangTidyExecutor(IClangTidyExecutor):
 
     async def __aexit__(self, exc_type, exc_value, traceback) -> None:
         await self._command_executor.__aexit__(exc_type, exc_value, traceback)
+        if self._check_profile_aggregator is not None:
+            assert self._config.profile_checks is not None
+            await asyncio.to_thread(
+                self._check_profile_aggregator.write_report,
+                self._config.profile_checks,
+            )
+            self._check_profile_aggregator.log_summary()
+            LOGGER.info("Wrote profiles of checks to %s.", self._config.profile_checks)
 
     async def execute(self, *, input_file: str) -> CheckResult:
         command = (
@@ -97,62 +248,356 @@ class ClangTidyExecutor(IClangTidyExecutor):
             ]
         )
 
-        result = await self._command_executor.execute(
-            command=command, cwd=self._config.build_dir
-        )
-        exit_code = result.exit_code
-        stdout = result.stdout
-        stderr = result.stderr
-
-        write_result_log(
-            exit_code=exit_code,
-            input_file=input_file,
-            stdout=stdout,
-            stderr=stderr,
+        if self._check_profile_aggregator is None:
+            result, wall_seconds = await self._execute_command(command, input_file)
+        else:
+            # Each process writes profiles to its own directory, because names
+            # of files of profiles are not unique among processes.
+            with tempfile.TemporaryDirectory() as profile_dir:
+                result, wall_seconds = await self._execute_command(
+                    command[:1]
+                    + [
+                        "--enable-check-profile",
+                        f"--store-check-profile={profile_dir}",
+                    ]
+                    + command[1:],
+                    input_file,
+                )
+                await asyncio.to_thread(
+                    self._check_profile_aggregator.add_directory, profile_dir
+                )
+        if self._file_cost_store is not None:
+            self._file_cost_store.record(
+                input_file,
+                wall_seconds=wall_seconds,
+                peak_rss_bytes=result.peak_rss_bytes,
+            )
+        return CheckResult(
+            exit_code=result.exit_code, stdout=result.stdout, stderr=result.stderr
         )
 
-        return CheckResult(exit_code=exit_code, stdout=stdout, stderr=stderr)
+    async def _execute_command(
+        self, command: typing.List[str], input_file: str
+    ) -> typing.Tuple[CommandResult, float]:
+        """Execute a command of clang-tidy limiting the number of processes.
+
+        Args:
+            command (typing.List[str]): Command.
+            input_file (str): Input file path.
+
+        Returns:
+            typing.Tuple[CommandResult, float]: Result and wall time in seconds.
+        """
+        async with self._semaphore:
+            with trace_span(STAGE_CLANG_TIDY, input_file):
+                start_time = time.perf_counter()
+                result = await self._command_executor.execute(
+                    command=command,
+                    cwd=self._config.build_dir,
+                    measure_peak_rss=self._file_cost_store is not None,
+                )
+                return result, time.perf_counter() - start_time
+
+    def order_checks(self, input_files: typing.List[str]) -> typing.List[int]:
+        if self._file_cost_store is None:
+            return order_by_cost(input_files, {})
+        return self._file_cost_store.order(input_files)
 
 
 class CachedClangTidyExecutor(IClangTidyExecutor):
-    """Class to execute clang-tidy but with caching of results."""
+    """Class to execute clang-tidy but with caching of results.
+
+    Checks are executed in a pipeline of two stages:
 
-    def __init__(self, config: Config) -> None:
-        self._clang_tidy_executor = ClangTidyExecutor(config=config)
-        self._source_hash_calculator = SourceHashCalculator(config=config)
+    1. Preprocessing and hashing of source codes, executed at most
+       ``config.preprocess_jobs`` files at once.
+    2. Execution of clang-tidy, executed at most ``config.jobs`` files at once.
+
+    Results found in the cache are returned just after the first stage,
+    so only files not found in the cache wait for the second stage.
+    As the stages are limited separately, preprocessing of files proceeds
+    during executions of clang-tidy for other files.
+
+    Lookups of the cache requested at the same time are resolved together
+    in a query, and results are written to the cache in batches.
+    Operations of the cache are executed in a dedicated thread not to block
+    the event loop.
+
+    If ``config.relocatable_cache`` is enabled, paths in results are saved
+    with placeholders and restored to the current directories when loaded.
+
+    Keys of the cache include a fingerprint of clang-tidy and extra arguments
+    calculated once in a run, and hashes of ``.clang-tidy`` files applied to
+    source codes, so changes of them invalidate only related results.
+
+    Before executing clang-tidy, a lease of the key of the cache is acquired
+    so that processes sharing the cache directory do not check the same source
+    code at once. Processes failed to acquire the lease wait for the result
+    of the holder. Checks of the same key in a process are coalesced into
+    a check, which is cancelled when all requests of it are cancelled.
+
+    Costs of checks of files are recorded in the cache directory,
+    so that slow files are checked first in the next run.
+
+    Args:
+        config (Config): Configuration.
+        compile_database (typing.Optional[CompileDatabase]): Database of compile
+            commands. Loaded from the build directory if not given.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        compile_database: typing.Optional[CompileDatabase] = None,
+    ) -> None:
+        self._config = config
         if config.cache_dir is None:
             raise ValueError("Cache directory is required for CachedClangTidyExecutor.")
         self._cache_dir = config.cache_dir
         os.makedirs(config.cache_dir, exist_ok=True)
-        self._cache_table = create_cache_table_at(
-            f"{config.cache_dir}/clang_tidy_cache_v2.db",
-            max_cache_entries=config.max_cache_entries,
+        self._file_cost_store = FileCostStore(config.cache_dir)
+        self._clang_tidy_executor = ClangTidyExecutor(
+            config=config, file_cost_store=self._file_cost_store
+        )
+        manifest_store: typing.Optional[ManifestStore] = None
+        if config.direct_mode:
+            manifest_store = ManifestStore(os.path.join(config.cache_dir, "manifests"))
+        self._source_hash_calculator = SourceHashCalculator(
+            config=config,
+            compile_database=compile_database,
+            manifest_store=manifest_store,
         )
+        self._preprocess_semaphore = asyncio.Semaphore(config.preprocess_jobs)
+        self._path_normalizer = create_path_normalizer(config)
+        self._tool_fingerprint = ""
+        self._config_hasher = ClangTidyConfigHasher()
+        self._cache_table = create_cache_table(config)
+        self._pending_loads: typing.Dict[
+            str, asyncio.Future[typing.Optional[CheckResult]]
+        ] = {}
+        self._load_tasks: typing.Set[asyncio.Task[None]] = set()
+        self._lease_store = LeaseStore(os.path.join(config.cache_dir, "leases"))
+        self._checks_in_progress: typing.Dict[str, CheckInProgress] = {}
+        self._check_tasks: typing.Set[asyncio.Task[CheckResult]] = set()
+        self._run_statistics = RunStatistics()
 
     async def __aenter__(self) -> Self:
         await self._clang_tidy_executor.__aenter__()
         await self._source_hash_calculator.__aenter__()
+        self._tool_fingerprint = await calculate_tool_fingerprint(
+            self._config, self._path_normalizer
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        # Stop checks before killing processes and closing the table,
+        # so that no process is started and no result is saved after them.
+        check_tasks = list(self._check_tasks)
+        for task in check_tasks:
+            task.cancel()
+        await asyncio.gather(*check_tasks, return_exceptions=True)
         await self._clang_tidy_executor.__aexit__(exc_type, exc_value, traceback)
         await self._source_hash_calculator.__aexit__(exc_type, exc_value, traceback)
+        await self._cache_table.close()
+        if self._run_statistics.hit_rate is not None:
+            await asyncio.to_thread(
+                save_run_statistics, self._cache_dir, self._run_statistics
+            )
+        await asyncio.to_thread(self._file_cost_store.save)
 
     async def execute(self, *, input_file: str) -> CheckResult:
-        source_hash = await self._source_hash_calculator.calculate(
-            input_file=input_file
+        async with self._preprocess_semaphore:
+            source_hash = await self._source_hash_calculator.calculate(
+                input_file=input_file
+            )
+        cache_key = create_cache_key(
+            tool_fingerprint=self._tool_fingerprint,
+            config_hash=self._config_hasher.calculate_for_file(input_file),
+            source_hash=source_hash,
         )
 
-        result = self._cache_table.load(source_hash=source_hash)
-        if result is None:
+        result = await self._load_cached_result(cache_key)
+        if result is not None:
+            self._run_statistics.num_hits += 1
+            return result
+        self._run_statistics.num_misses += 1
+        return await self._check_once(input_file=input_file, cache_key=cache_key)
+
+    def order_checks(self, input_files: typing.List[str]) -> typing.List[int]:
+        return self._clang_tidy_executor.order_checks(input_files)
+
+    async def _check_once(self, *, input_file: str, cache_key: str) -> CheckResult:
+        """Check a file, sharing the check with other requests of the same key.
+
+        Args:
+            input_file (str): Input file path.
+            cache_key (str): Key of the cache.
+
+        Returns:
+            CheckResult: Result.
+        """
+        check = self._checks_in_progress.get(cache_key)
+        if check is None:
+            task = asyncio.create_task(
+                self._check_exclusively(input_file=input_file, cache_key=cache_key)
+            )
+            check = CheckInProgress(task=task)
+            self._checks_in_progress[cache_key] = check
+            self._check_tasks.add(task)
+            task.add_done_callback(self._check_tasks.discard)
+            task.add_done_callback(lambda _: self._forget_check(cache_key, check))
+        else:
+            LOGGER.debug("Reuse the check in progress for %s.", input_file)
+        check.num_waiters += 1
+        try:
+            # Shield the check shared with other callers from cancellation.
+            return await asyncio.shield(check.task)
+        finally:
+            check.num_waiters -= 1
+            if check.num_waiters == 0 and not check.task.done():
+                # All callers were cancelled, so nobody uses the result.
+                self._forget_check(cache_key, check)
+                check.task.cancel()
+
+    def _forget_check(self, cache_key: str, check: CheckInProgress) -> None:
+        """Remove a check from checks in progress.
+
+        Args:
+            cache_key (str): Key of the cache.
+            check (CheckInProgress): Check.
+        """
+        if self._checks_in_progress.get(cache_key) is check:
+            del self._checks_in_progress[cache_key]
+
+    async def _check_exclusively(
+        self, *, input_file: str, cache_key: str
+    ) -> CheckResult:
+        """Check a file holding the lease, or wait for the result of another holder.
+
+        Args:
+            input_file (str): Input file path.
+            cache_key (str): Key of the cache.
+
+        Returns:
+            CheckResult: Result.
+        """
+        is_waiting = False
+        while True:
+            lease = await asyncio.to_thread(self._lease_store.try_acquire, cache_key)
+            if lease is not None:
+                return await self._check_with_lease(
+                    input_file=input_file, cache_key=cache_key, lease=lease
+                )
+            if not is_waiting:
+                LOGGER.debug("Waiting for another process checking %s.", input_file)
+                await asyncio.to_thread(self._lease_store.mark_waiting, cache_key)
+                is_waiting = True
+            await asyncio.sleep(LEASE_POLL_INTERVAL_SECONDS)
+            result = await self._load_cached_result(cache_key)
+            if result is not None:
+                return result
+
+    async def _check_with_lease(
+        self, *, input_file: str, cache_key: str, lease: Lease
+    ) -> CheckResult:
+        """Check a file holding a lease.
+
+        Args:
+            input_file (str): Input file path.
+            cache_key (str): Key of the cache.
+            lease (Lease): Lease.
+
+        Returns:
+            CheckResult: Result.
+        """
+        renewal_task = asyncio.create_task(self._renew_lease(lease))
+        try:
+            # The result may have been saved by the previous holder.
+            result = await self._load_cached_result(cache_key)
+            if result is not None:
+                return result
+
             result = await self._clang_tidy_executor.execute(input_file=input_file)
-            self._cache_table.save(source_hash=source_hash, result=result)
+            if result.exit_code < 0:
+                # Results of processes killed by signals are not cached.
+                LOGGER.debug(
+                    "clang-tidy for %s was killed by signal %d.",
+                    input_file,
+                    -result.exit_code,
+                )
+                return result
+            saved_result = result
+            if self._path_normalizer is not None:
+                saved_result = self._path_normalizer.normalize_result(result)
+            await self._cache_table.save(source_hash=cache_key, result=saved_result)
+            # Write the result at once for processes waiting for it.
+            if await asyncio.to_thread(self._lease_store.has_waiters, lease):
+                await self._cache_table.flush()
+            return result
+        finally:
+            # Wait for the renewal in progress not to touch the lease after release.
+            renewal_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await renewal_task
+            await asyncio.to_thread(self._lease_store.release, lease)
+
+    async def _renew_lease(self, lease: Lease) -> None:
+        """Renew a lease periodically.
 
-        write_result_log(
-            exit_code=result.exit_code,
-            input_file=input_file,
-            stdout=result.stdout,
-            stderr=result.stderr,
-        )
+        Args:
+            lease (Lease): Lease.
+        """
+        while True:
+            await asyncio.sleep(LEASE_RENEWAL_INTERVAL_SECONDS)
+            renewal = asyncio.ensure_future(
+                asyncio.to_thread(self._lease_store.renew, lease)
+            )
+            try:
+                await asyncio.shield(renewal)
+            except asyncio.CancelledError:
+                # Threads cannot be cancelled, so finish the renewal in progress.
+                await renewal
+                raise
+
+    async def _load_cached_result(self, cache_key: str) -> typing.Optional[CheckResult]:
+        """Load a cached result.
+
+        Lookups requested in an iteration of the event loop are resolved together.
+        Paths in results are restored if ``config.relocatable_cache`` is enabled.
+
+        Args:
+            cache_key (str): Key of the cache.
 
+        Returns:
+            typing.Optional[CheckResult]: Cached result if found.
+        """
+        future = self._pending_loads.get(cache_key)
+        if future is None:
+            if not self._pending_loads:
+                task = asyncio.create_task(self._resolve_pending_loads())
+                self._load_tasks.add(task)
+                task.add_done_callback(self._load_tasks.discard)
+            future = asyncio.get_running_loop().create_future()
+            self._pending_loads[cache_key] = future
+        # Shield the future shared with other callers from cancellation.
+        result = await asyncio.shield(future)
+        if result is not None and self._path_normalizer is not None:
+            result = self._path_normalizer.restore_result(result)
         return result
+
+    async def _resolve_pending_loads(self) -> None:
+        """Resolve pending lookups of the cache."""
+        # Wait for lookups requested in the current iteration of the event loop.
+        await asyncio.sleep(0)
+        pending_loads = self._pending_loads
+        self._pending_loads = {}
+        try:
+            results = await self._cache_table.load_many(pending_loads.keys())
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for future in pending_loads.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for cache_key, future in pending_loads.items():
+            if not future.done():
+                future.set_result(results.get(cache_key))
@@ -2,6 +2,7 @@
 
 import asyncio
 import asyncio.subprocess
+import contextlib
 import dataclasses
 import logging
 import typing
@@ -21,11 +22,41 @@ class CommandResult:
     exit_code: int
     stdout: str
     stderr: str
+    peak_rss_bytes: typing.Optional[int] = None
 
 
 # TODO: better handling.
 CONSOLE_ENCODING = "utf8"
 
+# Maximum size of chunks of standard output passed to consumers.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Interval to read peak memory usage of processes in seconds.
+# (The peak is read from /proc while processes are running, so growth of memory
+# just before exits may be missed.)
+PEAK_RSS_POLL_INTERVAL_SECONDS = 0.05
+
+
+def read_peak_rss(pid: int) -> typing.Optional[int]:
+    """Read the peak resident set size of a running process.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        typing.Optional[int]: Peak resident set size in bytes.
+        None if not available (e.g., on platforms without /proc).
+    """
+    try:
+        with open(f"/proc/{pid}/status", mode="r", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    # The value is written in kB.
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
 
 class CommandExecutor:
     """Class to execute commands."""
@@ -46,16 +77,125 @@ class CommandExecutor:
         command: typing.List[str],
         *,
         cwd: typing.Optional[str] = None,
+        measure_peak_rss: bool = False,
     ) -> CommandResult:
         """Execute a command.
 
         Args:
             command (typing.List[str]): Command.
             cwd (typing.Optional[str]): Working directory. Defaults to None.
+            measure_peak_rss (bool): Whether to measure the peak resident set
+                size of the process. Defaults to False.
 
         Returns:
             CommandResult: Result.
         """
+        peak_rss_bytes: typing.Optional[int] = None
+
+        async def monitor_peak_rss(pid: int) -> None:
+            nonlocal peak_rss_bytes
+            while True:
+                value = read_peak_rss(pid)
+                if value is not None:
+                    peak_rss_bytes = max(peak_rss_bytes or 0, value)
+                await asyncio.sleep(PEAK_RSS_POLL_INTERVAL_SECONDS)
+
+        async with self._start(command, cwd=cwd) as process:
+            monitor_task: typing.Optional[asyncio.Task[None]] = None
+            if measure_peak_rss:
+                monitor_task = asyncio.create_task(monitor_peak_rss(process.pid))
+            try:
+                stdout_binary, stderr_binary = await process.communicate()
+            finally:
+                if monitor_task is not None:
+                    monitor_task.cancel()
+                    await asyncio.wait([monitor_task])
+
+        exit_code = typing.cast(int, process.returncode)
+        stdout = stdout_binary.decode(CONSOLE_ENCODING)
+        stderr = stderr_binary.decode(CONSOLE_ENCODING)
+
+        return CommandResult(
+            exit_code=exit_code,
+            stdout=stdout,
+            stderr=stderr,
+            peak_rss_bytes=peak_rss_bytes,
+        )
+
+    async def execute_streaming(
+        self,
+        command: typing.List[str],
+        *,
+        stdout_consumer: typing.Callable[[bytes], None],
+        cwd: typing.Optional[str] = None,
+    ) -> CommandResult:
+        """Execute a command passing chunks of standard output to a consumer.
+
+        Standard output is not kept in memory, so this function can be used
+        for commands writing large outputs.
+
+        The consumer is called in a worker thread not to block the event loop
+        (consumers like hashing take CPU time for large outputs).
+        Chunks are passed in order, and the next chunk is read while the
+        consumer processes the previous one.
+
+        Args:
+            command (typing.List[str]): Command.
+            stdout_consumer (typing.Callable[[bytes], None]): Function called
+                with each chunk of standard output in a worker thread.
+            cwd (typing.Optional[str]): Working directory. Defaults to None.
+
+        Returns:
+            CommandResult: Result. ``stdout`` is always empty.
+        """
+        async with self._start(command, cwd=cwd) as process:
+            stdout = typing.cast(asyncio.StreamReader, process.stdout)
+            stderr = typing.cast(asyncio.StreamReader, process.stderr)
+            # Read standard error concurrently to prevent the process from
+            # blocking on a full pipe.
+            stderr_task = asyncio.create_task(stderr.read())
+            consumer_task: typing.Optional[asyncio.Future[None]] = None
+            try:
+                while True:
+                    chunk = await stdout.read(STREAM_CHUNK_SIZE)
+                    if consumer_task is not None:
+                        await consumer_task
+                        consumer_task = None
+                    if not chunk:
+                        break
+                    consumer_task = asyncio.ensure_future(
+                        asyncio.to_thread(stdout_consumer, chunk)
+                    )
+                stderr_binary = await stderr_task
+            finally:
+                stderr_task.cancel()
+                waited_tasks: typing.List[asyncio.Future] = [stderr_task]
+                if consumer_task is not None:
+                    consumer_task.cancel()
+                    waited_tasks.append(consumer_task)
+                await asyncio.wait(waited_tasks)
+            await process.wait()
+
+        exit_code = typing.cast(int, process.returncode)
+        return CommandResult(
+            exit_code=exit_code,
+            stdout="",
+            stderr=stderr_binary.decode(CONSOLE_ENCODING),
+        )
+
+    @contextlib.asynccontextmanager
+    async def _start(
+        self, command: typing.List[str], *, cwd: typing.Optional[str]
+    ) -> typing.AsyncIterator[asyncio.subprocess.Process]:  # pylint: disable=E1101
+        """Start a process and kill it if not finished at the end of the context.
+
+        Args:
+            command (typing.List[str]): Command.
+            cwd (typing.Optional[str]): Working directory.
+
+        Yields:
+            asyncio.subprocess.Process: Process.
+        """
         process = await asyncio.create_subprocess_exec(
             *command,
             stdout=asyncio.subprocess.PIPE,
@@ -64,16 +204,23 @@ class CommandExecutor:
         )
 
         self._processes.append(process)
-        stdout_binary, stderr_binary = await process.communicate()
-        self._processes.remove(process)
-
-        exit_code = typing.cast(int, process.returncode)
-        stdout = stdout_binary.decode(CONSOLE_ENCODING)
-        stderr = stderr_binary.decode(CONSOLE_ENCODING)
-
-        return CommandResult(exit_code=exit_code, stdout=stdout, stderr=stderr)
+        try:
+            yield process
+        finally:
+            self._processes.remove(process)
+            if process.returncode is None:
+                # Cancelled while the process is running.
+                process.kill()
+                # Read remaining outputs so that pipes are closed.
+                await process.communicate()
 
     def kill_all(self) -> None:
         """Kill all remaining processes."""
-        for process in self._processes:
-            process.kill()
+        for process in list(self._processes):
+            if process.returncode is not None:
+                continue
+            try:
+                process.kill()
+            except ProcessLookupError:
+                # The process has already exited.
+                pass
@@ -0,0 +1,148 @@
+"""Database of compile commands."""
+
+import dataclasses
+import json
+import logging
+import os
+import shlex
+import typing
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the file of compile commands.
+COMPILE_COMMANDS_FILE_NAME = "compile_commands.json"
+
+
+@dataclasses.dataclass
+class CompileCommand:
+    """Class of a compile command of a file."""
+
+    directory: str
+    file: str
+    arguments: typing.List[str]
+
+
+def normalize_path(path: str, *, directory: typing.Optional[str] = None) -> str:
+    """Normalize a file path to an absolute path.
+
+    Args:
+        path (str): File path.
+        directory (typing.Optional[str]): Directory used as the base of relative paths.
+            Defaults to the current working directory.
+
+    Returns:
+        str: Normalized absolute path.
+    """
+    if directory is not None:
+        path = os.path.join(directory, path)
+    return os.path.normpath(os.path.abspath(path))
+
+
+def parse_compile_command(entry: dict) -> CompileCommand:
+    """Parse an entry of compile_commands.json.
+
+    Args:
+        entry (dict): Entry.
+
+    Returns:
+        CompileCommand: Compile command.
+    """
+    directory = str(entry["directory"])
+    if "arguments" in entry:
+        arguments = [str(arg) for arg in entry["arguments"]]
+    else:
+        arguments = shlex.split(entry["command"])
+    return CompileCommand(
+        directory=directory,
+        file=normalize_path(str(entry["file"]), directory=directory),
+        arguments=arguments,
+    )
+
+
+class CompileDatabase:
+    """Database of compile commands indexed by file paths.
+
+    Args:
+        compile_commands (typing.List[dict]): Entries of compile_commands.json.
+    """
+
+    def __init__(self, compile_commands: typing.List[dict]) -> None:
+        # Commands are parsed on lookups because splitting command lines of
+        # all entries is much slower than indexing them.
+        self._entries: typing.Dict[str, dict] = {}
+        for entry in compile_commands:
+            file = normalize_path(str(entry["file"]), directory=entry["directory"])
+            # Use the first entry of a file as in clang tools.
+            self._entries.setdefault(file, entry)
+
+    def find(self, input_file: str) -> typing.Optional[CompileCommand]:
+        """Find the compile command of a file.
+
+        Args:
+            input_file (str): Input file path.
+
+        Returns:
+            typing.Optional[CompileCommand]: Compile command if found.
+        """
+        entry = self._entries.get(normalize_path(input_file))
+        if entry is None:
+            return None
+        return parse_compile_command(entry)
+
+    def get(self, input_file: str) -> CompileCommand:
+        """Get the compile command of a file.
+
+        Args:
+            input_file (str): Input file path.
+
+        Raises:
+            ValueError: If the file is not found.
+
+        Returns:
+            CompileCommand: Compile command.
+        """
+        command = self.find(input_file)
+        if command is None:
+            raise ValueError(
+                f"{normalize_path(input_file)} is not found in "
+                f"{COMPILE_COMMANDS_FILE_NAME}"
+            )
+        return command
+
+    def __contains__(self, input_file: str) -> bool:
+        return normalize_path(input_file) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def load_compile_database(build_dir: str) -> CompileDatabase:
+    """Load compile_commands.json in a build directory.
+
+    Args:
+        build_dir (str): Build directory.
+
+    Returns:
+        CompileDatabase: Database.
+    """
+    with open(
+        os.path.join(build_dir, COMPILE_COMMANDS_FILE_NAME), encoding="utf8"
+    ) as file:
+        compile_commands = json.load(file)
+    database = CompileDatabase(compile_commands)
+    LOGGER.debug("Loaded %d compile commands from %s.", len(database), build_dir)
+    return database
+
+
+def try_load_compile_database(build_dir: str) -> typing.Optional[CompileDatabase]:
+    """Load compile_commands.json in a build directory if exists.
+
+    Args:
+        build_dir (str): Build directory.
+
+    Returns:
+        typing.Optional[CompileDatabase]: Database if exists.
+    """
+    if not os.path.exists(os.path.join(build_dir, COMPILE_COMMANDS_FILE_NAME)):
+        return None
+    return load_compile_database(build_dir)
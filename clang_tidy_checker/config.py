@@ -2,6 +2,8 @@
 """
 
 import dataclasses
+import datetime
+import os
 import typing
 
 from clang_tidy_checker.search_clang_tidy import search_clang_tidy
@@ -47,6 +49,144 @@ MAX_CACHE_ENTRIES_KEY = "max_cache_entries"
 # Default value of the maximum number of entries in the cache.
 DEFAULT_MAX_CACHE_ENTRIES_KEY = 1000
 
+# Key of the maximum total size of outputs in the cache in bytes.
+MAX_CACHE_BYTES_KEY = "max_cache_bytes"
+
+# Units of sizes in bytes.
+BYTE_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+# Units of durations in seconds.
+DURATION_UNITS = {"S": 1, "M": 60, "H": 60 * 60, "D": 24 * 60 * 60}
+
+# Key of the number of files checked in parallel.
+JOBS_KEY = "jobs"
+
+# Key of the number of files preprocessed in parallel for caching.
+PREPROCESS_JOBS_KEY = "preprocess_jobs"
+
+# Key of the flag to enable direct mode of caches.
+DIRECT_MODE_KEY = "direct_mode"
+
+# Default flag value to enable direct mode of caches.
+DEFAULT_DIRECT_MODE = False
+
+# Key of the method to calculate hashes of source codes for caches.
+HASH_METHOD_KEY = "hash_method"
+
+# Method to calculate hashes from preprocessed source codes.
+HASH_METHOD_PREPROCESS = "preprocess"
+
+# Method to calculate hashes from contents of source codes and included headers.
+HASH_METHOD_DEPENDENCIES = "dependencies"
+
+# Default method to calculate hashes of source codes.
+DEFAULT_HASH_METHOD = HASH_METHOD_PREPROCESS
+
+# Key of the flag to normalize paths in caches.
+RELOCATABLE_CACHE_KEY = "relocatable_cache"
+
+# Default flag value to normalize paths in caches.
+DEFAULT_RELOCATABLE_CACHE = False
+
+# Key of the root directory of source codes.
+SOURCE_ROOT_KEY = "source_root"
+
+# Default root directory of source codes.
+DEFAULT_SOURCE_ROOT = "."
+
+# Key of the backend of caches.
+CACHE_BACKEND_KEY = "cache_backend"
+
+# Backend using SQLAlchemy.
+CACHE_BACKEND_SQLALCHEMY = "sqlalchemy"
+
+# Backend using sqlite3 module in the standard library.
+CACHE_BACKEND_SQLITE3 = "sqlite3"
+
+# Backend saving files in directories.
+CACHE_BACKEND_DIRECTORY = "directory"
+
+# Default backend of caches.
+DEFAULT_CACHE_BACKEND = CACHE_BACKEND_SQLALCHEMY
+
+# Key of the URL of the remote cache.
+REMOTE_CACHE_URL_KEY = "remote_cache_url"
+
+# Key of the file path to write profiles of checks of clang-tidy.
+PROFILE_CHECKS_KEY = "profile_checks"
+
+
+def parse_byte_size(value: typing.Union[str, int]) -> int:
+    """Parse a size in bytes.
+
+    Args:
+        value (typing.Union[str, int]): Size in bytes, or a string with a unit
+            (K, M, G) like ``500M``.
+
+    Raises:
+        ValueError: If the value is invalid.
+
+    Returns:
+        int: Size in bytes.
+    """
+    text = str(value).strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    unit = BYTE_SIZE_UNITS.get(text[-1:], 1)
+    if unit != 1:
+        text = text[:-1]
+    size = int(float(text) * unit)
+    if size < 1:
+        raise ValueError(f"Invalid size in bytes: {value}")
+    return size
+
+
+def parse_duration(value: typing.Union[str, int]) -> datetime.timedelta:
+    """Parse a duration.
+
+    Args:
+        value (typing.Union[str, int]): Duration in seconds, or a string with
+            a unit (s, m, h, d) like ``30d``.
+
+    Raises:
+        ValueError: If the value is invalid.
+
+    Returns:
+        datetime.timedelta: Duration.
+    """
+    text = str(value).strip().upper()
+    unit = 1
+    if text[-1:] in DURATION_UNITS:
+        unit = DURATION_UNITS[text[-1:]]
+        text = text[:-1]
+    seconds = float(text) * unit
+    if seconds <= 0:
+        raise ValueError(f"Invalid duration: {value}")
+    return datetime.timedelta(seconds=seconds)
+
+
+def _parse_choice(
+    config: dict, key: str, default: str, choices: typing.List[str]
+) -> str:
+    """Parse a configuration chosen from some values.
+
+    Args:
+        config (dict): Input dictionary.
+        key (str): Key of the configuration.
+        default (str): Default value.
+        choices (typing.List[str]): Valid values.
+
+    Raises:
+        ValueError: If the value is invalid.
+
+    Returns:
+        str: Value.
+    """
+    value = str(config.get(key, default))
+    if value not in choices:
+        raise ValueError(f"Invalid {key}: {value}")
+    return value
+
 
 @dataclasses.dataclass
 class Config:
@@ -59,13 +199,44 @@ class Config:
     extra_args: typing.List[str]
     cache_dir: typing.Optional[str]
     max_cache_entries: int
+    max_cache_bytes: typing.Optional[int]
+    jobs: int
+    preprocess_jobs: int
+    direct_mode: bool
+    hash_method: str
+    relocatable_cache: bool
+    source_root: str
+    cache_backend: str
+    remote_cache_url: typing.Optional[str]
+    profile_checks: typing.Optional[str]
 
 
-async def parse_config_from_dict(config: dict) -> Config:
+def _parse_optional_str(config: dict, key: str) -> typing.Optional[str]:
+    """Parse an optional string configuration.
+
+    Args:
+        config (dict): Input dictionary.
+        key (str): Key of the configuration.
+
+    Returns:
+        typing.Optional[str]: Value. None if not set.
+    """
+    value = config.get(key, None)
+    if value is None:
+        return None
+    return str(value)
+
+
+async def parse_config_from_dict(
+    config: dict, *, resolve_clang_tidy: bool = True
+) -> Config:
     """Parse configuration from dictionaries.
 
     Args:
         config (dict): Input dictionary.
+        resolve_clang_tidy (bool): Whether to search the clang-tidy executable.
+            If False, the configured name is used as is, so that commands not
+            executing clang-tidy work without it. Defaults to True.
 
     Returns:
         Config: Configuration.
@@ -74,7 +245,8 @@ async def parse_config_from_dict(config: dict) -> Config:
     clang_tidy_path = str(
         config.get(CLANG_TIDY_EXECUTABLE_KEY, DEFAULT_CLANG_TIDY_EXECUTABLE)
     )
-    clang_tidy_path = await search_clang_tidy(clang_tidy_path)
+    if resolve_clang_tidy:
+        clang_tidy_path = await search_clang_tidy(clang_tidy_path)
 
     build_dir = str(config.get(BUILD_DIR_KEY, DEFAULT_BUILD_DIR))
 
@@ -94,6 +266,32 @@ async def parse_config_from_dict(config: dict) -> Config:
         config.get(MAX_CACHE_ENTRIES_KEY, DEFAULT_MAX_CACHE_ENTRIES_KEY)
     )
 
+    max_cache_bytes = config.get(MAX_CACHE_BYTES_KEY, None)
+    if max_cache_bytes is not None:
+        max_cache_bytes = parse_byte_size(max_cache_bytes)
+
+    jobs = config.get(JOBS_KEY, None)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = int(jobs)
+    if jobs < 1:
+        raise ValueError(f"{JOBS_KEY} must be a positive integer.")
+
+    preprocess_jobs = config.get(PREPROCESS_JOBS_KEY, None)
+    if preprocess_jobs is None:
+        preprocess_jobs = jobs
+    preprocess_jobs = int(preprocess_jobs)
+    if preprocess_jobs < 1:
+        raise ValueError(f"{PREPROCESS_JOBS_KEY} must be a positive integer.")
+
+    direct_mode = bool(config.get(DIRECT_MODE_KEY, DEFAULT_DIRECT_MODE))
+
+    relocatable_cache = bool(
+        config.get(RELOCATABLE_CACHE_KEY, DEFAULT_RELOCATABLE_CACHE)
+    )
+
+    source_root = str(config.get(SOURCE_ROOT_KEY, DEFAULT_SOURCE_ROOT))
+
     return Config(
         clang_tidy_path=clang_tidy_path,
         build_dir=build_dir,
@@ -102,4 +300,24 @@ async def parse_config_from_dict(config: dict) -> Config:
         extra_args=extra_args,
         cache_dir=cache_dir,
         max_cache_entries=max_cache_entries,
+        max_cache_bytes=max_cache_bytes,
+        jobs=jobs,
+        preprocess_jobs=preprocess_jobs,
+        direct_mode=direct_mode,
+        hash_method=_parse_choice(
+            config,
+            HASH_METHOD_KEY,
+            DEFAULT_HASH_METHOD,
+            [HASH_METHOD_PREPROCESS, HASH_METHOD_DEPENDENCIES],
+        ),
+        relocatable_cache=relocatable_cache,
+        source_root=source_root,
+        cache_backend=_parse_choice(
+            config,
+            CACHE_BACKEND_KEY,
+            DEFAULT_CACHE_BACKEND,
+            [CACHE_BACKEND_SQLALCHEMY, CACHE_BACKEND_SQLITE3, CACHE_BACKEND_DIRECTORY],
+        ),
+        remote_cache_url=_parse_optional_str(config, REMOTE_CACHE_URL_KEY),
+        profile_checks=_parse_optional_str(config, PROFILE_CHECKS_KEY),
     )
@@ -0,0 +1,386 @@
+"""Direct mode to reuse hashes of source codes without preprocessing.
+
+Similar to the direct mode of ccache, a manifest is saved for each compile
+command with the hash of the preprocessed source code and the states of
+files the source code depends on. When all the dependencies are unchanged,
+the hash in the manifest is reused without executing the preprocessor.
+"""
+
+import base64
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import typing
+
+from clang_tidy_checker.compile_database import CompileCommand, normalize_path
+from clang_tidy_checker.config import Config
+from clang_tidy_checker.path_normalizer import PathNormalizer
+
+LOGGER = logging.getLogger(__name__)
+
+# Version of the format of manifests.
+MANIFEST_VERSION = 1
+
+# Size of chunks to read files.
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass
+class Dependency:
+    """Class of the state of a file a source code depends on."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    content_hash: str
+
+
+@dataclasses.dataclass
+class Manifest:
+    """Class of manifests of compile commands."""
+
+    source_hash: str
+    dependencies: typing.List[Dependency]
+
+
+def calculate_hash_of_file(filepath: str) -> str:
+    """Calculate a hash of the content of a file.
+
+    Args:
+        filepath (str): File path.
+
+    Returns:
+        str: Hash.
+    """
+    hasher = hashlib.sha3_512()
+    with open(filepath, mode="rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            hasher.update(chunk)
+    return base64.b64encode(hasher.digest()).decode("ascii")
+
+
+def calculate_manifest_key(compile_command: CompileCommand, config: Config) -> str:
+    """Calculate a key of the manifest of a compile command.
+
+    The key includes the compiler executable in addition to the command,
+    because the compiler determines predefined macros.
+    Configurations changing the calculation of hashes of source codes are
+    also included, so that hashes calculated in other rules are not reused.
+
+    Args:
+        compile_command (CompileCommand): Compile command.
+        config (Config): Configuration.
+
+    Returns:
+        str: Key.
+    """
+    hash_rules: typing.List[typing.Union[str, bool]] = [
+        config.hash_method,
+        config.relocatable_cache,
+    ]
+    if config.relocatable_cache:
+        hash_rules += [
+            normalize_path(config.source_root),
+            normalize_path(config.build_dir),
+        ]
+    data = json.dumps(
+        [
+            MANIFEST_VERSION,
+            compile_command.directory,
+            compile_command.file,
+            compile_command.arguments,
+            get_compiler_state(compile_command),
+            hash_rules,
+        ]
+    )
+    return hashlib.sha3_256(data.encode()).hexdigest()
+
+
+def find_compiler(compile_command: CompileCommand) -> typing.Optional[str]:
+    """Find the compiler executable of a compile command.
+
+    Args:
+        compile_command (CompileCommand): Compile command.
+
+    Returns:
+        typing.Optional[str]: Path of the compiler. None if not found.
+    """
+    compiler_name = compile_command.arguments[0]
+    if os.path.dirname(compiler_name):
+        # Relative paths are executed from the directory of the command.
+        compiler_name = normalize_path(
+            compiler_name, directory=compile_command.directory
+        )
+    return shutil.which(compiler_name)
+
+
+def get_compiler_state(
+    compile_command: CompileCommand,
+) -> typing.List[typing.Union[str, int]]:
+    """Get the state of the compiler executable of a compile command.
+
+    Args:
+        compile_command (CompileCommand): Compile command.
+
+    Returns:
+        typing.List[typing.Union[str, int]]: Path, size, and modification time
+        of the compiler. Empty if the compiler is not found.
+    """
+    compiler = find_compiler(compile_command)
+    if compiler is None:
+        return []
+    compiler_stat = os.stat(compiler)
+    return [compiler, compiler_stat.st_size, compiler_stat.st_mtime_ns]
+
+
+def parse_dependency_file(contents: str) -> typing.List[str]:
+    """Parse a dependency file written by ``-MD`` option of compilers.
+
+    Args:
+        contents (str): Contents of the file in Makefile syntax.
+
+    Returns:
+        typing.List[str]: Paths of the dependencies.
+    """
+    dependencies: typing.List[str] = []
+    contents = contents.replace("\\\r\n", " ").replace("\\\n", " ")
+    for line in contents.splitlines():
+        tokens: typing.List[str] = []
+        token = ""
+        index = 0
+        while index < len(line):
+            char = line[index]
+            if char == "\\" and index + 1 < len(line) and line[index + 1] in " #":
+                token += line[index + 1]
+                index += 2
+                continue
+            if char == "$" and index + 1 < len(line) and line[index + 1] == "$":
+                token += "$"
+                index += 2
+                continue
+            if char in " \t":
+                if token:
+                    tokens.append(token)
+                    token = ""
+            else:
+                token += char
+            index += 1
+        if token:
+            tokens.append(token)
+
+        # Remove targets.
+        for target_end, token in enumerate(tokens):
+            if token.endswith(":"):
+                dependencies += tokens[target_end + 1 :]
+                break
+    return dependencies
+
+
+class DependencyChecker:
+    """Class to check states of dependencies.
+
+    Hashes of files are memoized during a run because headers are shared
+    among many source codes, so each file is read and hashed only once.
+    Functions in this class can be called from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._content_hashes: typing.Dict[typing.Tuple[str, int, int, int], str] = {}
+        self._file_locks: typing.Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_state(self, path: str) -> Dependency:
+        """Get the current state of a file.
+
+        Args:
+            path (str): File path.
+
+        Returns:
+            Dependency: State.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            file_lock = self._file_locks.setdefault(path, threading.Lock())
+        with file_lock:
+            content_hash = self._content_hashes.get(key)
+            if content_hash is None:
+                content_hash = calculate_hash_of_file(path)
+                self._content_hashes[key] = content_hash
+        return Dependency(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            inode=stat.st_ino,
+            content_hash=content_hash,
+        )
+
+    def is_up_to_date(self, manifest: Manifest) -> bool:
+        """Check whether all dependencies in a manifest are unchanged.
+
+        Args:
+            manifest (Manifest): Manifest.
+
+        Returns:
+            bool: True if unchanged.
+        """
+        for dependency in manifest.dependencies:
+            try:
+                stat = os.stat(dependency.path)
+            except OSError:
+                return False
+            if stat.st_size != dependency.size:
+                return False
+            if (
+                stat.st_mtime_ns == dependency.mtime_ns
+                and stat.st_ino == dependency.inode
+            ):
+                continue
+            # Files can be touched without changes (e.g., by git checkout).
+            if self.get_state(dependency.path).content_hash != dependency.content_hash:
+                return False
+        return True
+
+    def calculate_hash_of_dependencies(
+        self,
+        *,
+        args: typing.List[str],
+        compiler: typing.Optional[str],
+        dependency_paths: typing.List[str],
+        directory: str,
+        path_normalizer: typing.Optional[PathNormalizer] = None,
+    ) -> str:
+        """Calculate a hash of a source code from its dependencies.
+
+        The hash is calculated from arguments and the content of the compiler
+        and contents of the source code and headers it includes, instead of
+        the preprocessed source code. The path and the state of the file of the
+        compiler are not included, so that machines with the same compiler
+        installed at different paths or times calculate the same hash.
+
+        Args:
+            args (typing.List[str]): Arguments of the compiler.
+            compiler (typing.Optional[str]): Path of the compiler executable.
+                None if not found.
+            dependency_paths (typing.List[str]): Paths of dependencies.
+            directory (str): Directory used as the base of relative paths.
+            path_normalizer (typing.Optional[PathNormalizer]): Normalizer of
+                paths in arguments and paths of dependencies.
+
+        Returns:
+            str: Hash.
+        """
+
+        def normalize(text: str) -> str:
+            if path_normalizer is None:
+                return text
+            return path_normalizer.normalize(text)
+
+        compiler_hash: typing.Optional[str] = None
+        if compiler is not None:
+            compiler_hash = self.get_state(compiler).content_hash
+        hasher = hashlib.sha3_512()
+        hasher.update(
+            json.dumps([[normalize(arg) for arg in args], compiler_hash]).encode()
+        )
+        for path in dict.fromkeys(dependency_paths):
+            dependency = self.get_state(normalize_path(path, directory=directory))
+            hasher.update(
+                json.dumps(
+                    [normalize(dependency.path), dependency.content_hash]
+                ).encode()
+            )
+        return base64.b64encode(hasher.digest()).decode("ascii")
+
+    def create_manifest(
+        self,
+        *,
+        source_hash: str,
+        dependency_paths: typing.List[str],
+        directory: str,
+        start_time_ns: int,
+    ) -> typing.Optional[Manifest]:
+        """Create a manifest.
+
+        Args:
+            source_hash (str): Hash of the preprocessed source code.
+            dependency_paths (typing.List[str]): Paths of dependencies.
+            directory (str): Directory used as the base of relative paths.
+            start_time_ns (int): Time when preprocessing started.
+
+        Returns:
+            typing.Optional[Manifest]: Manifest. None if some dependencies
+            were modified during preprocessing.
+        """
+        dependencies: typing.List[Dependency] = []
+        for path in dict.fromkeys(dependency_paths):
+            dependency = self.get_state(normalize_path(path, directory=directory))
+            if dependency.mtime_ns >= start_time_ns:
+                # The file may have been modified during preprocessing.
+                LOGGER.debug("%s is too new for direct mode.", dependency.path)
+                return None
+            dependencies.append(dependency)
+        return Manifest(source_hash=source_hash, dependencies=dependencies)
+
+
+class ManifestStore:
+    """Class to store manifests in files.
+
+    Args:
+        directory (str): Directory of manifests.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+
+    def load(self, key: str) -> typing.Optional[Manifest]:
+        """Load a manifest.
+
+        Args:
+            key (str): Key.
+
+        Returns:
+            typing.Optional[Manifest]: Manifest if found.
+        """
+        try:
+            with open(self._filepath(key), mode="r", encoding="utf8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            LOGGER.warning("Ignored a broken manifest %s.", self._filepath(key))
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return Manifest(
+            source_hash=data["source_hash"],
+            dependencies=[Dependency(**entry) for entry in data["dependencies"]],
+        )
+
+    def save(self, key: str, manifest: Manifest) -> None:
+        """Save a manifest.
+
+        Args:
+            key (str): Key.
+            manifest (Manifest): Manifest.
+        """
+        filepath = self._filepath(key)
+        directory = os.path.dirname(filepath)
+        os.makedirs(directory, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, **dataclasses.asdict(manifest)}
+        # Write to a temporary file and rename it to prevent other processes
+        # from reading incomplete files.
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf8", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(data, file)
+        os.replace(file.name, filepath)
+
+    def _filepath(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], f"{key[2:]}.json")
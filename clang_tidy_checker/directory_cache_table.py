@@ -0,0 +1,575 @@
+"""Tables of cached results saved as files in directories.
+
+This backend is for cache directories shared among machines on network file
+systems, on which SQLite is unsafe and slow.
+
+Results and their outputs are saved in files addressed by hashes and sharded
+by the first two characters of the hashes::
+
+    <directory>/results/ab/cdef...   (JSON of a result)
+    <directory>/blobs/ab/cdef...     (compressed output)
+
+Files are written to temporary files and renamed atomically, so that readers
+see only complete files without locks.
+"""
+
+import collections
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import typing
+
+from clang_tidy_checker.cache_backend import (
+    CACHE_SIZE_LOW_WATER_RATIO,
+    DEFAULT_WRITE_BATCH_SIZE,
+    BufferedCacheTable,
+    CacheStatistics,
+    EvictionPlan,
+    IMaintainableCacheTable,
+    PendingResult,
+    PruneResult,
+    calculate_prune_targets,
+    collect_outputs,
+    compress_text,
+    count_ages,
+    decompress_result,
+    is_valid_blob,
+)
+from clang_tidy_checker.check_result import CheckResult
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the directory of the store in the cache directory.
+# The version is incremented when the layout is changed.
+DIRECTORY_STORE_NAME = "clang_tidy_cache_store_v1"
+
+# Name of the directory of results.
+RESULTS_DIR_NAME = "results"
+
+# Name of the directory of outputs.
+BLOBS_DIR_NAME = "blobs"
+
+# Prefix of temporary files.
+TEMP_FILE_PREFIX = ".tmp-"
+
+# Keys in files of results.
+RESULT_FILE_KEYS = {"source_hash", "exit_code", "stdout_hash", "stderr_hash"}
+
+# Time in seconds to keep files not referred to from results.
+# (Outputs are written before results referring to them, possibly in other
+# machines, so new outputs must not be removed.)
+UNREFERENCED_FILE_GRACE_SECONDS = 3600.0
+
+
+def _sharded_path(directory: str, name: str) -> str:
+    """Get the path of a file sharded by the first two characters of the name.
+
+    Args:
+        directory (str): Directory.
+        name (str): Name of the file.
+
+    Returns:
+        str: Path.
+    """
+    return os.path.join(directory, name[:2], name[2:])
+
+
+def _write_file_atomically(path: str, data: bytes) -> None:
+    """Write a file via a temporary file renamed atomically.
+
+    Args:
+        path (str): Path of the file.
+        data (bytes): Data.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=TEMP_FILE_PREFIX
+    )
+    try:
+        with os.fdopen(file_descriptor, mode="wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _read_file_if_exists(path: str) -> typing.Optional[bytes]:
+    """Read a file if exists.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        typing.Optional[bytes]: Data if exists.
+    """
+    try:
+        with open(path, mode="rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _remove_file_if_exists(path: str) -> None:
+    """Remove a file if exists.
+
+    Args:
+        path (str): Path of the file.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _scan_shards(directory: str) -> typing.Iterator[os.DirEntry]:
+    """List files in shards of a directory.
+
+    Args:
+        directory (str): Directory.
+
+    Yields:
+        os.DirEntry: Files.
+    """
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as shards:
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            with os.scandir(shard.path) as entries:
+                yield from entries
+
+
+class DirectoryCacheTable(BufferedCacheTable, IMaintainableCacheTable):
+    """Tables of cached results saved as files in directories.
+
+    Outputs are compressed and saved once for each content as in other
+    backends. Times of the last uses of results are saved as modification
+    times of files of results.
+
+    No statistics are shared among processes, so files are scanned to remove
+    least recently used results at the first write and when the estimated
+    number of entries or size exceeds the limit. Entries are removed until
+    they become :py:data:`CACHE_SIZE_LOW_WATER_RATIO` times the limits to
+    avoid scans for each write.
+
+    Args:
+        directory (str): Directory of the store.
+        max_cache_entries (int): Maximum number of entries in the cache.
+        max_cache_bytes (typing.Optional[int]): Maximum total size of outputs
+            in the cache in bytes. No limit if None.
+        write_batch_size (int): Number of results written in a batch.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_cache_entries: int,
+        max_cache_bytes: typing.Optional[int] = None,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> None:
+        super().__init__(
+            max_cache_entries=max_cache_entries,
+            max_cache_bytes=max_cache_bytes,
+            write_batch_size=write_batch_size,
+        )
+        self._results_dir = os.path.join(directory, RESULTS_DIR_NAME)
+        self._blobs_dir = os.path.join(directory, BLOBS_DIR_NAME)
+        # Estimated statistics (None until scanned).
+        self._num_entries: typing.Optional[int] = None
+        self._total_bytes = 0
+
+    def get_statistics(
+        self, age_bounds: typing.Sequence[datetime.timedelta]
+    ) -> CacheStatistics:
+        self.flush()
+        results, blob_states = self._scan(remove_garbage=False)
+        return CacheStatistics(
+            num_entries=len(results),
+            total_bytes=sum(size for _, size in blob_states.values()),
+            age_counts=count_ages(
+                (datetime.datetime.fromtimestamp(result[0]) for result in results),
+                age_bounds,
+            ),
+        )
+
+    def prune(
+        self,
+        *,
+        max_age: typing.Optional[datetime.timedelta] = None,
+        max_entries: typing.Optional[int] = None,
+        max_bytes: typing.Optional[int] = None,
+    ) -> PruneResult:
+        self.flush()
+        results, blob_states = self._scan()
+        num_expired_entries = 0
+        if max_age is not None:
+            expiry = (datetime.datetime.now() - max_age).timestamp()
+            num_expired_entries = sum(1 for result in results if result[0] < expiry)
+        targets = calculate_prune_targets(
+            num_entries=len(results),
+            total_bytes=sum(size for _, size in blob_states.values()),
+            num_expired_entries=num_expired_entries,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+        )
+        plan = self._remove_entries(results, blob_states, *targets)
+        return PruneResult(
+            num_removed_entries=len(plan.removed_hashes), freed_bytes=plan.freed_bytes
+        )
+
+    def compact(self) -> None:
+        self.flush()
+        self._scan()
+        # Remove empty directories of shards.
+        for directory in (self._results_dir, self._blobs_dir):
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as shards:
+                for shard in shards:
+                    try:
+                        os.rmdir(shard.path)
+                    except OSError:
+                        pass
+
+    def verify(self) -> typing.List[str]:
+        self.flush()
+        problem_counts: typing.Counter[str] = collections.Counter()
+        for entry in _scan_shards(self._results_dir):
+            if not entry.name.startswith(TEMP_FILE_PREFIX):
+                problem = self._verify_result_file(entry.path)
+                if problem is not None:
+                    problem_counts[problem] += 1
+        for entry in _scan_shards(self._blobs_dir):
+            if entry.name.startswith(TEMP_FILE_PREFIX):
+                continue
+            blob_hash = os.path.basename(os.path.dirname(entry.path)) + entry.name
+            if not is_valid_blob(blob_hash, _read_file_if_exists(entry.path) or b""):
+                problem_counts["outputs are broken."] += 1
+        return [f"{count} {problem}" for problem, count in problem_counts.items()]
+
+    def _write(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        last_used_times = dict(last_used_times)
+        output_hashes, blobs, _ = collect_outputs(pending_results)
+        written_blobs: typing.Set[str] = set()
+        num_written_results = 0
+        for source_hash, pending in pending_results.items():
+            path = self._result_path(source_hash)
+            # The same source can be checked concurrently, so existing entries
+            # are kept as they are unless their outputs were removed.
+            saved_data = self._read_result_file(path)
+            if saved_data is not None and self._renew_outputs(saved_data):
+                last_used_times[source_hash] = pending.created_at
+                continue
+            for blob_hash in output_hashes[source_hash]:
+                if blob_hash not in written_blobs:
+                    self._total_bytes += self._write_blob(blob_hash, blobs[blob_hash])
+                    written_blobs.add(blob_hash)
+            data = {
+                "source_hash": source_hash,
+                "exit_code": pending.result.exit_code,
+                "stdout_hash": output_hashes[source_hash][0],
+                "stderr_hash": output_hashes[source_hash][1],
+            }
+            _write_file_atomically(path, json.dumps(data).encode("utf8"))
+            if saved_data is None:
+                num_written_results += 1
+
+        self._update_last_used_times(last_used_times)
+
+        if num_written_results == 0:
+            return
+        if self._num_entries is not None:
+            self._num_entries += num_written_results
+            if self._eviction_targets(self._num_entries, self._total_bytes) is None:
+                return
+        self._remove_old_entries()
+
+    def _update_last_used_times(
+        self, last_used_times: typing.Dict[str, datetime.datetime]
+    ) -> None:
+        """Update times of last uses of results.
+
+        Args:
+            last_used_times (typing.Dict[str, datetime.datetime]): Times of last
+                uses for hashes of source codes.
+        """
+        for source_hash, used_at in last_used_times.items():
+            timestamp = used_at.timestamp()
+            try:
+                os.utime(self._result_path(source_hash), (timestamp, timestamp))
+            except FileNotFoundError:
+                pass
+
+    def _read(self, source_hashes: typing.List[str]) -> typing.Dict[str, CheckResult]:
+        # Outputs shared among results are decompressed once.
+        texts: typing.Dict[str, str] = {}
+        results: typing.Dict[str, CheckResult] = {}
+        for source_hash in source_hashes:
+            loaded = self._load_result(self._result_path(source_hash), texts)
+            if loaded is not None and loaded[0] == source_hash:
+                results[source_hash] = loaded[1]
+        return results
+
+    def _find_saved(self, source_hashes: typing.List[str]) -> typing.Set[str]:
+        return {
+            source_hash
+            for source_hash in source_hashes
+            if os.path.exists(self._result_path(source_hash))
+        }
+
+    def _iterate(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+        paths = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in _scan_shards(self._results_dir)
+            if not entry.name.startswith(TEMP_FILE_PREFIX)
+        )
+        for _, path in paths:
+            loaded = self._load_result(path, {})
+            if loaded is not None:
+                yield loaded
+
+    def _load_result(
+        self, path: str, texts: typing.Dict[str, str]
+    ) -> typing.Optional[typing.Tuple[str, CheckResult]]:
+        """Load a result with its outputs.
+
+        Args:
+            path (str): Path of the file of the result.
+            texts (typing.Dict[str, str]): Decompressed outputs for their hashes.
+
+        Returns:
+            typing.Optional[typing.Tuple[str, CheckResult]]: Hash of the source
+            code and the result if found.
+        """
+        data = self._read_result_file(path)
+        if data is None:
+            return None
+        stdout_hash = str(data["stdout_hash"])
+        stderr_hash = str(data["stderr_hash"])
+        stdout = _read_file_if_exists(self._blob_path(stdout_hash))
+        stderr = _read_file_if_exists(self._blob_path(stderr_hash))
+        # Outputs may be removed by other processes.
+        if stdout is None or stderr is None:
+            return None
+        return str(data["source_hash"]), decompress_result(
+            int(data["exit_code"]),
+            (stdout_hash, stdout),
+            (stderr_hash, stderr),
+            texts,
+        )
+
+    def _renew_outputs(self, data: dict) -> bool:
+        """Renew times of outputs of a saved result.
+
+        Args:
+            data (dict): Data of the result.
+
+        Returns:
+            bool: True if all outputs exist.
+        """
+        try:
+            for key in ("stdout_hash", "stderr_hash"):
+                # Renew the time not to be removed as an unreferenced output.
+                os.utime(self._blob_path(str(data[key])))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _write_blob(self, blob_hash: str, text: str) -> int:
+        """Write an output if not saved.
+
+        Args:
+            blob_hash (str): Hash of the output.
+            text (str): Output.
+
+        Returns:
+            int: Size of the written file. Zero if already saved.
+        """
+        path = self._blob_path(blob_hash)
+        try:
+            # Renew the time not to be removed as an unreferenced output.
+            os.utime(path)
+            return 0
+        except FileNotFoundError:
+            pass
+        data = compress_text(text)
+        _write_file_atomically(path, data)
+        return len(data)
+
+    def _remove_old_entries(self) -> None:
+        """Scan files and remove least recently used entries."""
+        results, blob_states = self._scan()
+        num_entries = len(results)
+        total_bytes = sum(size for _, size in blob_states.values())
+        self._num_entries = num_entries
+        self._total_bytes = total_bytes
+
+        targets = self._eviction_targets(num_entries, total_bytes)
+        if targets is None:
+            return
+        min_removed_entries, target_bytes = targets
+        if min_removed_entries > 0:
+            min_removed_entries = num_entries - int(
+                self._max_cache_entries * CACHE_SIZE_LOW_WATER_RATIO
+            )
+        self._remove_entries(results, blob_states, min_removed_entries, target_bytes)
+
+    def _remove_entries(
+        self,
+        results: typing.List[typing.Tuple[float, str, str, str]],
+        blob_states: typing.Dict[str, typing.Tuple[int, int]],
+        min_removed_entries: int,
+        max_remaining_bytes: int,
+    ) -> EvictionPlan:
+        """Remove least recently used entries to targets.
+
+        Args:
+            results (typing.List[typing.Tuple[float, str, str, str]]): Results
+                scanned by :py:meth:`_scan`.
+            blob_states (typing.Dict[str, typing.Tuple[int, int]]): Reference
+                counts and sizes of outputs scanned by :py:meth:`_scan`.
+            min_removed_entries (int): Minimum number of entries to remove.
+            max_remaining_bytes (int): Maximum total size after removal.
+
+        Returns:
+            EvictionPlan: Removed entries.
+        """
+        total_bytes = sum(size for _, size in blob_states.values())
+        plan = EvictionPlan(blob_states=blob_states)
+        for _, path, stdout_hash, stderr_hash in sorted(results):
+            if (
+                len(plan.removed_hashes) >= min_removed_entries
+                and total_bytes - plan.freed_bytes <= max_remaining_bytes
+            ):
+                break
+            plan.remove(path, (stdout_hash, stderr_hash))
+
+        LOGGER.debug("Remove %d entries from the cache.", len(plan.removed_hashes))
+        for path in plan.removed_hashes:
+            _remove_file_if_exists(path)
+        # Outputs may be referred to by results written by other processes
+        # after the scan, so new outputs are kept as in :py:meth:`_scan`.
+        expiry = time.time() - UNREFERENCED_FILE_GRACE_SECONDS
+        for blob_hash in plan.unreferenced_hashes():
+            blob_path = self._blob_path(blob_hash)
+            try:
+                if os.path.getmtime(blob_path) >= expiry:
+                    plan.freed_bytes -= plan.blob_states[blob_hash][1]
+                    continue
+            except FileNotFoundError:
+                continue
+            _remove_file_if_exists(blob_path)
+        self._num_entries = len(results) - len(plan.removed_hashes)
+        self._total_bytes = total_bytes - plan.freed_bytes
+        return plan
+
+    def _scan(self, remove_garbage: bool = True) -> typing.Tuple[
+        typing.List[typing.Tuple[float, str, str, str]],
+        typing.Dict[str, typing.Tuple[int, int]],
+    ]:
+        """Scan files of results and outputs.
+
+        Outputs not referred to from results and temporary files are removed
+        if they are older than :py:data:`UNREFERENCED_FILE_GRACE_SECONDS`.
+
+        Args:
+            remove_garbage (bool): Whether to remove unreferenced outputs and
+                temporary files.
+
+        Returns:
+            typing.Tuple[typing.List[typing.Tuple[float, str, str, str]],
+            typing.Dict[str, typing.Tuple[int, int]]]: Modification times, paths,
+            and hashes of outputs of results, and reference counts and sizes of
+            outputs.
+        """
+        expiry = time.time() - UNREFERENCED_FILE_GRACE_SECONDS
+        results: typing.List[typing.Tuple[float, str, str, str]] = []
+        ref_counts: typing.Dict[str, int] = {}
+        for entry in _scan_shards(self._results_dir):
+            if entry.name.startswith(TEMP_FILE_PREFIX):
+                if remove_garbage and entry.stat().st_mtime < expiry:
+                    _remove_file_if_exists(entry.path)
+                continue
+            data = self._read_result_file(entry.path)
+            if data is None:
+                continue
+            stdout_hash = str(data["stdout_hash"])
+            stderr_hash = str(data["stderr_hash"])
+            results.append(
+                (entry.stat().st_mtime, entry.path, stdout_hash, stderr_hash)
+            )
+            for blob_hash in (stdout_hash, stderr_hash):
+                ref_counts[blob_hash] = ref_counts.get(blob_hash, 0) + 1
+
+        blob_states: typing.Dict[str, typing.Tuple[int, int]] = {}
+        for entry in _scan_shards(self._blobs_dir):
+            stat = entry.stat()
+            blob_hash = os.path.basename(os.path.dirname(entry.path)) + entry.name
+            ref_count = ref_counts.get(blob_hash, 0)
+            if ref_count == 0:
+                if remove_garbage and stat.st_mtime < expiry:
+                    _remove_file_if_exists(entry.path)
+                continue
+            blob_states[blob_hash] = (ref_count, stat.st_size)
+        # Outputs may be removed by other processes.
+        for blob_hash, ref_count in ref_counts.items():
+            blob_states.setdefault(blob_hash, (ref_count, 0))
+        return results, blob_states
+
+    def _verify_result_file(self, path: str) -> typing.Optional[str]:
+        """Verify a file of a result.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            typing.Optional[str]: Description of the problem if found.
+        """
+        data = self._read_result_file(path)
+        if (
+            not isinstance(data, dict)
+            or not RESULT_FILE_KEYS <= data.keys()
+            or self._result_path(str(data["source_hash"])) != path
+        ):
+            return "results are broken."
+        for key in ("stdout_hash", "stderr_hash"):
+            if not os.path.exists(self._blob_path(str(data[key]))):
+                return "results refer to missing outputs."
+        return None
+
+    def _read_result_file(self, path: str) -> typing.Optional[dict]:
+        """Read a file of a result.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            typing.Optional[dict]: Data of the result if exists.
+        """
+        data = _read_file_if_exists(path)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            LOGGER.warning("Ignored a broken file in the cache: %s", path)
+            return None
+
+    def _result_path(self, source_hash: str) -> str:
+        # Keys of caches may contain characters invalid in file names.
+        name = hashlib.sha3_256(source_hash.encode("utf8")).hexdigest()
+        return _sharded_path(self._results_dir, name)
+
+    def _blob_path(self, blob_hash: str) -> str:
+        return _sharded_path(self._blobs_dir, blob_hash)
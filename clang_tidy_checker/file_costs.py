@@ -0,0 +1,215 @@
+"""Costs of checks of files to schedule slow files first.
+
+Wall time and peak memory usage of clang-tidy are recorded for each file
+in the cache directory. In the next run, files are started in the order of
+the longest processing time first (LPT), so that a slow file started last
+does not determine the total time of parallel checks. Costs of files not
+recorded yet are estimated from the sizes of the files.
+"""
+
+import dataclasses
+import datetime
+import json
+import logging
+import os
+import threading
+import typing
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the file of costs in the cache directory.
+FILE_COSTS_FILE_NAME = "file_costs.json"
+
+# Version of the format of the file of costs.
+FILE_COSTS_VERSION = 1
+
+# Weight of a new measurement in the moving average of wall time.
+# (Wall time varies with the load of machines, so measurements are smoothed.)
+WALL_TIME_SMOOTHING_FACTOR = 0.5
+
+
+@dataclasses.dataclass
+class FileCost:
+    """Class of the cost of a check of a file."""
+
+    wall_seconds: float
+    peak_rss_bytes: typing.Optional[int] = None
+    updated_at: typing.Optional[datetime.datetime] = None
+
+
+class FileCostStore:
+    """Class of costs of checks of files saved in the cache directory.
+
+    Costs are merged with the file written by other processes when saved.
+
+    Args:
+        cache_dir (str): Cache directory.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self._filepath = os.path.join(cache_dir, FILE_COSTS_FILE_NAME)
+        self._costs = self._load()
+        self._updated_costs: typing.Dict[str, FileCost] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filepath: str) -> typing.Optional[FileCost]:
+        """Get the cost of a file.
+
+        Args:
+            filepath (str): File path.
+
+        Returns:
+            typing.Optional[FileCost]: Cost if recorded.
+        """
+        return self._costs.get(filepath)
+
+    def record(
+        self,
+        filepath: str,
+        *,
+        wall_seconds: float,
+        peak_rss_bytes: typing.Optional[int] = None,
+    ) -> None:
+        """Record a cost of a check of a file.
+
+        Args:
+            filepath (str): File path.
+            wall_seconds (float): Wall time of clang-tidy in seconds.
+            peak_rss_bytes (typing.Optional[int]): Peak resident set size of
+                clang-tidy in bytes, if measured.
+        """
+        with self._lock:
+            previous = self._costs.get(filepath)
+            if previous is not None:
+                wall_seconds = (
+                    WALL_TIME_SMOOTHING_FACTOR * wall_seconds
+                    + (1.0 - WALL_TIME_SMOOTHING_FACTOR) * previous.wall_seconds
+                )
+            cost = FileCost(
+                wall_seconds=wall_seconds,
+                peak_rss_bytes=peak_rss_bytes,
+                updated_at=datetime.datetime.now(),
+            )
+            self._costs[filepath] = cost
+            self._updated_costs[filepath] = cost
+
+    def save(self) -> None:
+        """Save recorded costs.
+
+        Costs of files no longer existing are removed.
+        The file is replaced atomically, because processes may finish at once.
+        """
+        with self._lock:
+            if not self._updated_costs:
+                return
+            costs = self._load()
+            costs.update(self._updated_costs)
+            self._updated_costs = {}
+        data = {
+            "version": FILE_COSTS_VERSION,
+            "files": {
+                filepath: {
+                    "wall_seconds": cost.wall_seconds,
+                    "peak_rss_bytes": cost.peak_rss_bytes,
+                    "updated_at": (
+                        cost.updated_at.isoformat() if cost.updated_at else None
+                    ),
+                }
+                for filepath, cost in costs.items()
+                if os.path.exists(filepath)
+            },
+        }
+        temp_path = f"{self._filepath}.{os.getpid()}.tmp"
+        with open(temp_path, mode="w", encoding="utf8") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self._filepath)
+
+    def order(self, input_files: typing.List[str]) -> typing.List[int]:
+        """Order files from the longest estimated cost.
+
+        Args:
+            input_files (typing.List[str]): Files.
+
+        Returns:
+            typing.List[int]: Indices of the files in the order to start checks.
+        """
+        return order_by_cost(input_files, self._costs)
+
+    def _load(self) -> typing.Dict[str, FileCost]:
+        """Load costs from the file.
+
+        Returns:
+            typing.Dict[str, FileCost]: Costs of files. Empty if not saved.
+        """
+        try:
+            with open(self._filepath, mode="r", encoding="utf8") as file:
+                data = json.load(file)
+            if data["version"] != FILE_COSTS_VERSION:
+                return {}
+            return {
+                str(filepath): FileCost(
+                    wall_seconds=float(cost["wall_seconds"]),
+                    peak_rss_bytes=(
+                        int(cost["peak_rss_bytes"])
+                        if cost["peak_rss_bytes"] is not None
+                        else None
+                    ),
+                    updated_at=(
+                        datetime.datetime.fromisoformat(cost["updated_at"])
+                        if cost["updated_at"] is not None
+                        else None
+                    ),
+                )
+                for filepath, cost in data["files"].items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            LOGGER.warning("Ignored broken costs of files: %s", error)
+            return {}
+
+
+def order_by_cost(
+    input_files: typing.List[str], costs: typing.Mapping[str, FileCost]
+) -> typing.List[int]:
+    """Order files from the longest estimated cost.
+
+    Costs of files not in ``costs`` are estimated from the sizes of the files
+    using the average wall time per byte of recorded files.
+    When no file is recorded, files are ordered by their sizes.
+    Files with the same cost keep their order.
+
+    Args:
+        input_files (typing.List[str]): Files.
+        costs (typing.Mapping[str, FileCost]): Recorded costs of files.
+
+    Returns:
+        typing.List[int]: Indices of the files in the order to start checks.
+    """
+    sizes: typing.Dict[str, int] = {}
+
+    def get_size(filepath: str) -> int:
+        if filepath not in sizes:
+            try:
+                sizes[filepath] = os.path.getsize(filepath)
+            except OSError:
+                sizes[filepath] = 0
+        return sizes[filepath]
+
+    recorded_files = [filepath for filepath in input_files if filepath in costs]
+    recorded_bytes = sum(get_size(filepath) for filepath in recorded_files)
+    seconds_per_byte = 1.0
+    if recorded_bytes > 0:
+        seconds_per_byte = (
+            sum(costs[filepath].wall_seconds for filepath in recorded_files)
+            / recorded_bytes
+        )
+
+    def estimate(index: int) -> float:
+        filepath = input_files[index]
+        cost = costs.get(filepath)
+        if cost is not None:
+            return cost.wall_seconds
+        return get_size(filepath) * seconds_per_byte
+
+    return sorted(range(len(input_files)), key=estimate, reverse=True)
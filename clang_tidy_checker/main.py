@@ -10,33 +10,77 @@ import typing
 import click
 import yaml
 
+from clang_tidy_checker.cache_commands import cache
 from clang_tidy_checker.check_files import check_files
+from clang_tidy_checker.compile_database import try_load_compile_database
 from clang_tidy_checker.config import (
     BUILD_DIR_KEY,
     CACHE_DIR_KEY,
     CHECKED_FILE_PATTERNS_KEY,
     EXTRA_ARGS_KEY,
+    JOBS_KEY,
+    MAX_CACHE_BYTES_KEY,
+    PROFILE_CHECKS_KEY,
     SHOW_PROGRESS_KEY,
     parse_config_from_dict,
 )
 from clang_tidy_checker.search_checked_files import search_checked_files
+from clang_tidy_checker.tracer import (
+    STAGE_LOAD_COMPILE_DATABASE,
+    Tracer,
+    trace_span,
+    use_tracer,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
-async def async_main(config_dict: dict) -> bool:
+async def async_main(config_dict: dict, tracer: typing.Optional[Tracer] = None) -> bool:
     """Main function.
 
     Args:
         config_dict (dict): Dictionary of the configuration.
+        tracer (typing.Optional[Tracer]): Tracer of stages. Defaults to None.
 
     Returns:
         bool: True if no error, False otherwise.
     """
 
-    config = await parse_config_from_dict(config_dict)
-    checked_files = await search_checked_files(config=config)
-    return await check_files(config=config, input_files=checked_files)
+    with use_tracer(tracer):
+        config = await parse_config_from_dict(config_dict)
+        with trace_span(STAGE_LOAD_COMPILE_DATABASE):
+            compile_database = try_load_compile_database(config.build_dir)
+        checked_files = await search_checked_files(
+            config=config, compile_database=compile_database
+        )
+        return await check_files(
+            config=config, input_files=checked_files, compile_database=compile_database
+        )
+
+
+def run_checks(config_dict: dict, *, trace_file: str, show_timings: bool) -> bool:
+    """Check files, tracing stages if requested.
+
+    Args:
+        config_dict (dict): Dictionary of the configuration.
+        trace_file (str): File to write the trace. Empty not to write.
+        show_timings (bool): Whether to show timings of stages.
+
+    Returns:
+        bool: True if no error, False otherwise.
+    """
+
+    tracer: typing.Optional[Tracer] = None
+    if trace_file or show_timings:
+        tracer = Tracer()
+    is_success = asyncio.run(async_main(config_dict, tracer=tracer))
+    if tracer is not None:
+        if trace_file:
+            tracer.write_chrome_trace(trace_file)
+            LOGGER.info("Wrote the trace to %s.", trace_file)
+        if show_timings:
+            LOGGER.info("%s", tracer.format_timings())
+    return is_success
 
 
 def load_config_file(*config_files) -> dict:
@@ -55,7 +99,7 @@ def load_config_file(*config_files) -> dict:
     return {}
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("--config", "-c", default="", help="Configuration file path.")
 @click.option("--build_dir", "-b", default="", help="Build directory.")
 @click.option("--pattern", "-p", multiple=True, help="Checked file pattern.")
@@ -63,18 +107,53 @@ def load_config_file(*config_files) -> dict:
     "--extra_arg", multiple=True, help="Extra argument to clang-tidy command."
 )
 @click.option("--cache_dir", default="", help="Cache directory.")
+@click.option(
+    "--max_cache_bytes",
+    default="",
+    help="Maximum size of the cache in bytes. Units K, M, G can be used (e.g., 500M).",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Number of files checked in parallel. [default: number of CPUs]",
+)
 @click.option(
     "--no-ascii", is_flag=True, help="Prevent writing ASCII escape sequences."
 )
+@click.option(
+    "--trace-file",
+    default="",
+    help="File to write timings of stages in Chrome trace-event format.",
+)
+@click.option(
+    "--timings", is_flag=True, help="Show timings of stages and the slowest files."
+)
+@click.option(
+    "--profile-checks",
+    default="",
+    help="File to write time spent in each check of clang-tidy in JSON.",
+)
+@click.pass_context
 def main(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    context: click.Context,
     config: str,
     build_dir: str,
     pattern: typing.List[str],
     extra_arg: typing.List[str],
     cache_dir: str,
+    max_cache_bytes: str,
+    jobs: typing.Optional[int],
     no_ascii: bool,
+    trace_file: str,
+    timings: bool,
+    profile_checks: str,
 ):
-    """Check files using clang-tidy."""
+    """Check files using clang-tidy.
+
+    Files are checked if no command is given.
+    """
 
     logging.basicConfig(level=logging.INFO, format="%(message)s")
 
@@ -87,10 +166,20 @@ def main(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         config_dict[EXTRA_ARGS_KEY] = extra_arg
     if cache_dir:
         config_dict[CACHE_DIR_KEY] = cache_dir
+    if max_cache_bytes:
+        config_dict[MAX_CACHE_BYTES_KEY] = max_cache_bytes
+    if jobs is not None:
+        config_dict[JOBS_KEY] = jobs
     if no_ascii:
         config_dict[SHOW_PROGRESS_KEY] = False
+    if profile_checks:
+        config_dict[PROFILE_CHECKS_KEY] = profile_checks
 
-    is_success = asyncio.run(async_main(config_dict))
+    if context.invoked_subcommand is not None:
+        context.obj = config_dict
+        return
+
+    is_success = run_checks(config_dict, trace_file=trace_file, show_timings=timings)
 
     if is_success:
         LOGGER.info("No error detected.")
@@ -98,3 +187,6 @@ def main(  # pylint: disable=too-many-arguments,too-many-positional-arguments
     else:
         LOGGER.error("Some errors detected.")
         sys.exit(1)
+
+
+main.add_command(cache)
@@ -0,0 +1,184 @@
+"""Normalization of paths for caches shared among directories.
+
+Paths of the source root and the build directory are replaced with
+placeholders before calculating hashes and saving results, so that caches
+can be shared among checkouts of a project in different directories.
+"""
+
+import os
+import re
+import typing
+
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.compile_database import normalize_path
+from clang_tidy_checker.config import Config
+
+# Placeholder of the build directory.
+BUILD_DIR_PLACEHOLDER = "<clang-tidy-checker:build_dir>"
+
+# Placeholder of the root directory of source codes.
+SOURCE_ROOT_PLACEHOLDER = "<clang-tidy-checker:source_root>"
+
+# Pattern to check that a path is not followed by characters of file names.
+END_OF_PATH_PATTERN = r"(?![\w.\-])"
+
+
+class PathNormalizer:
+    """Class to replace directories in texts with placeholders.
+
+    Directories are replaced only when they are not followed by characters
+    of file names, so that ``/src/proj`` does not match ``/src/proj2``.
+    The build directory is replaced first because it is usually in the
+    source root.
+
+    Args:
+        source_root (str): Root directory of source codes.
+        build_dir (str): Build directory.
+    """
+
+    def __init__(self, *, source_root: str, build_dir: str) -> None:
+        replacements = sorted(
+            [
+                (normalize_path(build_dir), BUILD_DIR_PLACEHOLDER),
+                (normalize_path(source_root), SOURCE_ROOT_PLACEHOLDER),
+            ],
+            key=lambda replacement: len(replacement[0]),
+            reverse=True,
+        )
+        self._replacements = [
+            (re.compile(re.escape(path) + END_OF_PATH_PATTERN), placeholder)
+            for path, placeholder in replacements
+        ]
+        self._byte_replacements = [
+            (
+                re.compile(re.escape(os.fsencode(path)) + END_OF_PATH_PATTERN.encode()),
+                placeholder.encode(),
+            )
+            for path, placeholder in replacements
+        ]
+        self._restorations = [
+            (placeholder, path) for path, placeholder in reversed(replacements)
+        ]
+
+    def normalize(self, text: str) -> str:
+        """Replace directories in a text with placeholders.
+
+        Args:
+            text (str): Text.
+
+        Returns:
+            str: Normalized text.
+        """
+        for pattern, placeholder in self._replacements:
+            text = pattern.sub(placeholder, text)
+        return text
+
+    def normalize_bytes(self, data: bytes) -> bytes:
+        """Replace directories in binary data with placeholders.
+
+        Args:
+            data (bytes): Data.
+
+        Returns:
+            bytes: Normalized data.
+        """
+        for pattern, placeholder in self._byte_replacements:
+            data = pattern.sub(placeholder, data)
+        return data
+
+    def restore(self, text: str) -> str:
+        """Replace placeholders in a text with directories.
+
+        Args:
+            text (str): Normalized text.
+
+        Returns:
+            str: Text with directories of the current environment.
+        """
+        for placeholder, path in self._restorations:
+            text = text.replace(placeholder, path)
+        return text
+
+    def normalize_result(self, result: CheckResult) -> CheckResult:
+        """Normalize paths in a result of a check.
+
+        Args:
+            result (CheckResult): Result.
+
+        Returns:
+            CheckResult: Normalized result.
+        """
+        return CheckResult(
+            exit_code=result.exit_code,
+            stdout=self.normalize(result.stdout),
+            stderr=self.normalize(result.stderr),
+        )
+
+    def restore_result(self, result: CheckResult) -> CheckResult:
+        """Restore paths in a normalized result of a check.
+
+        Args:
+            result (CheckResult): Normalized result.
+
+        Returns:
+            CheckResult: Result with directories of the current environment.
+        """
+        return CheckResult(
+            exit_code=result.exit_code,
+            stdout=self.restore(result.stdout),
+            stderr=self.restore(result.stderr),
+        )
+
+
+class StreamNormalizer:
+    """Class to normalize paths in streams of binary data.
+
+    Data are normalized line by line not to miss paths split into chunks.
+
+    Args:
+        normalizer (PathNormalizer): Normalizer of paths.
+        consumer (typing.Callable[[bytes], None]): Function to receive
+            normalized data.
+    """
+
+    def __init__(
+        self,
+        normalizer: PathNormalizer,
+        consumer: typing.Callable[[bytes], None],
+    ) -> None:
+        self._normalizer = normalizer
+        self._consumer = consumer
+        self._buffer = b""
+
+    def __call__(self, chunk: bytes) -> None:
+        """Receive a chunk of data.
+
+        Args:
+            chunk (bytes): Chunk.
+        """
+        data = self._buffer + chunk
+        end = data.rfind(b"\n") + 1
+        self._buffer = data[end:]
+        if end > 0:
+            self._consumer(self._normalizer.normalize_bytes(data[:end]))
+
+    def flush(self) -> None:
+        """Normalize the remaining data without line breaks."""
+        if self._buffer:
+            self._consumer(self._normalizer.normalize_bytes(self._buffer))
+            self._buffer = b""
+
+
+def create_path_normalizer(config: Config) -> typing.Optional[PathNormalizer]:
+    """Create a normalizer of paths if enabled in the configuration.
+
+    Args:
+        config (Config): Configuration.
+
+    Returns:
+        typing.Optional[PathNormalizer]: Normalizer of paths.
+        None if ``relocatable_cache`` is disabled.
+    """
+    if not config.relocatable_cache:
+        return None
+    return PathNormalizer(source_root=config.source_root, build_dir=config.build_dir)
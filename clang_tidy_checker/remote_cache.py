@@ -0,0 +1,369 @@
+"""Remote caches shared via HTTP.
+
+Remote caches use a simple protocol like remote caches of Bazel and sccache:
+
+- ``GET <url>/<hash>`` returns a result (200) or nothing (404).
+- ``PUT <url>/<hash>`` saves a result.
+
+``<hash>`` is the SHA-256 hash of the key of the cache in hexadecimal,
+and the body is a JSON of the result compressed using zlib.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import http.client
+import json
+import logging
+import queue
+import typing
+import urllib.parse
+
+from clang_tidy_checker.cache_backend import (
+    AsyncCacheTable,
+    ICacheTable,
+    compress_text,
+    decompress_text,
+)
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.tracer import (
+    STAGE_CACHE_SAVE,
+    STAGE_REMOTE_CACHE_LOAD,
+    trace_span,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Maximum number of connections to the remote cache.
+# (Requests are sent in parallel using these connections.)
+REMOTE_MAX_CONNECTIONS = 8
+
+# Timeout of requests to the remote cache in seconds.
+REMOTE_TIMEOUT_SECONDS = 10.0
+
+# Content type of bodies.
+REMOTE_CONTENT_TYPE = "application/octet-stream"
+
+# Errors of communications with the remote cache.
+REMOTE_ERRORS = (OSError, http.client.HTTPException)
+
+
+class RemoteCacheError(Exception):
+    """Exception of unexpected responses of the remote cache."""
+
+
+def encode_remote_result(source_hash: str, result: CheckResult) -> bytes:
+    """Encode a result for the remote cache.
+
+    Args:
+        source_hash (str): Key of the cache.
+        result (CheckResult): Result.
+
+    Returns:
+        bytes: Body of the request.
+    """
+    return compress_text(
+        json.dumps(
+            {
+                "source_hash": source_hash,
+                "exit_code": result.exit_code,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+            }
+        )
+    )
+
+
+def decode_remote_result(source_hash: str, body: bytes) -> CheckResult:
+    """Decode a result from the remote cache.
+
+    Args:
+        source_hash (str): Key of the cache.
+        body (bytes): Body of the response.
+
+    Raises:
+        RemoteCacheError: If the body is invalid.
+
+    Returns:
+        CheckResult: Result.
+    """
+    try:
+        data = json.loads(decompress_text(body))
+        if data["source_hash"] != source_hash:
+            raise RemoteCacheError(f"Unexpected key of the result: {source_hash}")
+        return CheckResult(
+            exit_code=int(data["exit_code"]),
+            stdout=str(data["stdout"]),
+            stderr=str(data["stderr"]),
+        )
+    except (ValueError, KeyError, TypeError) as error:
+        raise RemoteCacheError(f"Invalid result of {source_hash}: {error}") from error
+
+
+class RemoteCache:
+    """Class of clients of remote caches via HTTP.
+
+    Requests are sent in parallel from threads using a pool of persistent
+    connections, so that lookups of many results do not wait for round trips
+    one by one. Uploads are sent in background.
+
+    When a request fails, the remote cache is disabled for the rest of the run
+    so that failures of the network do not slow down checks.
+
+    Args:
+        url (str): Base URL of the remote cache (``http`` or ``https``).
+        max_connections (int): Maximum number of connections.
+        timeout (float): Timeout of requests in seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = REMOTE_MAX_CONNECTIONS,
+        timeout: float = REMOTE_TIMEOUT_SECONDS,
+    ) -> None:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"Invalid URL of the remote cache: {url}")
+        self._is_https = parts.scheme == "https"
+        self._netloc = parts.netloc
+        self._base_path = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._connections: queue.SimpleQueue[http.client.HTTPConnection] = (
+            queue.SimpleQueue()
+        )
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="remote_cache"
+        )
+        self._uploads: typing.List[concurrent.futures.Future[None]] = []
+        self._is_available = True
+
+    @property
+    def is_available(self) -> bool:
+        """Whether the remote cache is available."""
+        return self._is_available
+
+    def get_many(
+        self, source_hashes: typing.List[str]
+    ) -> typing.Dict[str, CheckResult]:
+        """Get results from the remote cache.
+
+        Args:
+            source_hashes (typing.List[str]): Keys of the cache.
+
+        Returns:
+            typing.Dict[str, CheckResult]: Results found.
+        """
+        if not self._is_available:
+            return {}
+        futures = {
+            source_hash: self._executor.submit(self._get, source_hash)
+            for source_hash in source_hashes
+        }
+        results: typing.Dict[str, CheckResult] = {}
+        for source_hash, future in futures.items():
+            try:
+                result = future.result()
+            except RemoteCacheError as error:
+                LOGGER.warning("%s", error)
+                continue
+            except REMOTE_ERRORS as error:
+                self._disable(error)
+                continue
+            if result is not None:
+                results[source_hash] = result
+        return results
+
+    def put(self, source_hash: str, result: CheckResult) -> None:
+        """Upload a result to the remote cache in background.
+
+        Args:
+            source_hash (str): Key of the cache.
+            result (CheckResult): Result.
+        """
+        if not self._is_available:
+            return
+        self._uploads = [upload for upload in self._uploads if not upload.done()]
+        self._uploads.append(self._executor.submit(self._put, source_hash, result))
+
+    def close(self) -> None:
+        """Wait for uploads and close connections."""
+        for upload in self._uploads:
+            try:
+                upload.result()
+            except REMOTE_ERRORS as error:
+                self._disable(error)
+        self._uploads = []
+        self._executor.shutdown(wait=True)
+        while not self._connections.empty():
+            self._connections.get().close()
+
+    def _get(self, source_hash: str) -> typing.Optional[CheckResult]:
+        """Get a result.
+
+        Args:
+            source_hash (str): Key of the cache.
+
+        Returns:
+            typing.Optional[CheckResult]: Result if found.
+        """
+        if not self._is_available:
+            return None
+        status, body = self._request("GET", source_hash)
+        if status == http.HTTPStatus.NOT_FOUND:
+            return None
+        if status != http.HTTPStatus.OK:
+            raise http.client.HTTPException(f"GET returned status {status}.")
+        return decode_remote_result(source_hash, body)
+
+    def _put(self, source_hash: str, result: CheckResult) -> None:
+        """Upload a result.
+
+        Args:
+            source_hash (str): Key of the cache.
+            result (CheckResult): Result.
+        """
+        if not self._is_available:
+            return
+        status, _ = self._request(
+            "PUT", source_hash, encode_remote_result(source_hash, result)
+        )
+        if not 200 <= status < 300:
+            raise http.client.HTTPException(f"PUT returned status {status}.")
+
+    def _request(
+        self, method: str, source_hash: str, body: typing.Optional[bytes] = None
+    ) -> typing.Tuple[int, bytes]:
+        """Send a request using a connection in the pool.
+
+        Args:
+            method (str): Method.
+            source_hash (str): Key of the cache.
+            body (typing.Optional[bytes]): Body.
+
+        Returns:
+            typing.Tuple[int, bytes]: Status and body of the response.
+        """
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            connection = self._create_connection()
+        path = (
+            self._base_path
+            + "/"
+            + hashlib.sha256(source_hash.encode("utf8")).hexdigest()
+        )
+        try:
+            connection.request(
+                method, path, body=body, headers={"Content-Type": REMOTE_CONTENT_TYPE}
+            )
+            response = connection.getresponse()
+            response_body = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        self._connections.put(connection)
+        return response.status, response_body
+
+    def _create_connection(self) -> http.client.HTTPConnection:
+        """Create a connection.
+
+        Returns:
+            http.client.HTTPConnection: Connection.
+        """
+        if self._is_https:
+            return http.client.HTTPSConnection(self._netloc, timeout=self._timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self._timeout)
+
+    def _disable(self, error: Exception) -> None:
+        """Disable the remote cache after an error.
+
+        Args:
+            error (Exception): Error.
+        """
+        if self._is_available:
+            self._is_available = False
+            LOGGER.warning(
+                "Failed to communicate with the remote cache. "
+                "Use only the local cache: %s",
+                error,
+            )
+
+
+class AsyncTieredCacheTable(AsyncCacheTable):
+    """Tables of caches using a local cache in front of a remote cache.
+
+    Results are looked up in the local cache at first, and results not found
+    are looked up in the remote cache at once. Results found in the remote
+    cache are saved to the local cache. Saved results are written to both.
+
+    Operations of the local cache are executed in the thread of the table as
+    :py:class:`AsyncCacheTable`, but requests to the remote cache are sent
+    from other threads, so that lookups and saves of the local cache are not
+    queued behind round trips of the network.
+
+    Args:
+        local_table (ICacheTable): Local cache.
+        remote_cache (RemoteCache): Remote cache.
+    """
+
+    def __init__(self, local_table: ICacheTable, remote_cache: RemoteCache) -> None:
+        super().__init__(local_table)
+        self._remote_cache = remote_cache
+
+    async def save(self, source_hash: str, result: CheckResult) -> None:
+        await super().save(source_hash, result)
+        self._remote_cache.put(source_hash, result)
+
+    async def load_many(
+        self, source_hashes: typing.Iterable[str]
+    ) -> typing.Dict[str, CheckResult]:
+        source_hashes = list(set(source_hashes))
+        results = await super().load_many(source_hashes)
+        missed_hashes = [
+            source_hash for source_hash in source_hashes if source_hash not in results
+        ]
+        if not missed_hashes:
+            return results
+        remote_results = await asyncio.to_thread(self._get_remote, missed_hashes)
+        if remote_results:
+            await self._run(
+                lambda: self._save_local(remote_results), stage=STAGE_CACHE_SAVE
+            )
+        results.update(remote_results)
+        return results
+
+    async def close(self) -> None:
+        try:
+            await asyncio.to_thread(self._remote_cache.close)
+        finally:
+            await super().close()
+
+    def _get_remote(
+        self, source_hashes: typing.List[str]
+    ) -> typing.Dict[str, CheckResult]:
+        """Get results from the remote cache.
+
+        Args:
+            source_hashes (typing.List[str]): Keys of the cache.
+
+        Returns:
+            typing.Dict[str, CheckResult]: Results found.
+        """
+        with trace_span(STAGE_REMOTE_CACHE_LOAD):
+            results = self._remote_cache.get_many(source_hashes)
+        LOGGER.debug(
+            "Found %d of %d results in the remote cache.",
+            len(results),
+            len(source_hashes),
+        )
+        return results
+
+    def _save_local(self, results: typing.Dict[str, CheckResult]) -> None:
+        """Save results found in the remote cache to the local cache.
+
+        Args:
+            results (typing.Dict[str, CheckResult]): Results.
+        """
+        for source_hash, result in results.items():
+            self._table.save(source_hash, result)
@@ -0,0 +1,79 @@
+"""Statistics of runs saved in the cache directory."""
+
+import dataclasses
+import datetime
+import json
+import logging
+import os
+import typing
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the file of statistics of the last run in the cache directory.
+RUN_STATISTICS_FILE_NAME = "last_run.json"
+
+
+@dataclasses.dataclass
+class RunStatistics:
+    """Statistics of lookups of caches in a run."""
+
+    num_hits: int = 0
+    num_misses: int = 0
+    finished_at: typing.Optional[datetime.datetime] = None
+
+    @property
+    def hit_rate(self) -> typing.Optional[float]:
+        """Ratio of hits in lookups. None if no lookup."""
+        num_lookups = self.num_hits + self.num_misses
+        if num_lookups == 0:
+            return None
+        return self.num_hits / num_lookups
+
+
+def save_run_statistics(cache_dir: str, statistics: RunStatistics) -> None:
+    """Save statistics of a run.
+
+    The file is replaced atomically, because processes may finish at once.
+
+    Args:
+        cache_dir (str): Cache directory.
+        statistics (RunStatistics): Statistics.
+    """
+    path = os.path.join(cache_dir, RUN_STATISTICS_FILE_NAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    finished_at = statistics.finished_at or datetime.datetime.now()
+    with open(temp_path, mode="w", encoding="utf8") as file:
+        json.dump(
+            {
+                "num_hits": statistics.num_hits,
+                "num_misses": statistics.num_misses,
+                "finished_at": finished_at.isoformat(),
+            },
+            file,
+        )
+    os.replace(temp_path, path)
+
+
+def load_run_statistics(cache_dir: str) -> typing.Optional[RunStatistics]:
+    """Load statistics of the last run.
+
+    Args:
+        cache_dir (str): Cache directory.
+
+    Returns:
+        typing.Optional[RunStatistics]: Statistics if saved.
+    """
+    path = os.path.join(cache_dir, RUN_STATISTICS_FILE_NAME)
+    try:
+        with open(path, mode="r", encoding="utf8") as file:
+            data = json.load(file)
+        return RunStatistics(
+            num_hits=int(data["num_hits"]),
+            num_misses=int(data["num_misses"]),
+            finished_at=datetime.datetime.fromisoformat(data["finished_at"]),
+        )
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as error:
+        LOGGER.warning("Ignored broken statistics of the last run: %s", error)
+        return None
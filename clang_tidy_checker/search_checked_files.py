@@ -1,17 +1,28 @@
 """Search checked files.
 """
 
+import logging
 import pathlib
 import typing
 
+from clang_tidy_checker.compile_database import CompileDatabase
 from clang_tidy_checker.config import Config
+from clang_tidy_checker.tracer import STAGE_SEARCH_FILES, trace_span
 
+LOGGER = logging.getLogger(__name__)
 
-async def search_checked_files(*, config: Config) -> typing.List[str]:
+
+async def search_checked_files(
+    *,
+    config: Config,
+    compile_database: typing.Optional[CompileDatabase] = None,
+) -> typing.List[str]:
     """Search checked files.
 
     Args:
         config (Config): Configuration.
+        compile_database (typing.Optional[CompileDatabase]): Database of compile
+            commands. If given, files not in the database are reported.
 
     Returns:
         typing.List[str]: Checked files.
@@ -22,8 +33,16 @@ async def search_checked_files(*, config: Config) -> typing.List[str]:
     cwd = pathlib.Path.cwd()
     cwd = cwd.absolute()
 
-    for pattern in config.checked_file_patterns:
-        paths = cwd.glob(pattern)
-        checked_files += sorted([str(path.absolute()) for path in paths])
+    with trace_span(STAGE_SEARCH_FILES):
+        for pattern in config.checked_file_patterns:
+            paths = cwd.glob(pattern)
+            checked_files += sorted([str(path.absolute()) for path in paths])
+
+    if compile_database is not None:
+        for checked_file in checked_files:
+            if checked_file not in compile_database:
+                LOGGER.warning(
+                    "%s is not found in compile_commands.json.", checked_file
+                )
 
     return checked_files
@@ -3,14 +3,33 @@
 import asyncio
 import base64
 import hashlib
-import json
 import logging
 import os
-import shlex
+import tempfile
+import time
 import typing
 
-from clang_tidy_checker.command_executor import CommandExecutor
-from clang_tidy_checker.config import Config
+from clang_tidy_checker.command_executor import CommandExecutor, CommandResult
+from clang_tidy_checker.compile_database import (
+    CompileCommand,
+    CompileDatabase,
+    load_compile_database,
+)
+from clang_tidy_checker.config import HASH_METHOD_DEPENDENCIES, Config
+from clang_tidy_checker.direct_mode import (
+    DependencyChecker,
+    ManifestStore,
+    calculate_manifest_key,
+    find_compiler,
+    parse_dependency_file,
+)
+from clang_tidy_checker.path_normalizer import StreamNormalizer, create_path_normalizer
+from clang_tidy_checker.tracer import (
+    STAGE_HASH_HEADERS,
+    STAGE_HASH_SOURCE,
+    STAGE_PREPROCESS,
+    trace_span,
+)
 
 try:
     from typing import Self
@@ -19,23 +38,90 @@ except ImportError:
 
 LOGGER = logging.getLogger(__name__)
 
+# Options of compilers to write dependencies.
+DEPENDENCY_OPTIONS = {"-M", "-MM", "-MD", "-MMD", "-MP", "-MG"}
+
+# Options of compilers to write dependencies with values.
+DEPENDENCY_OPTIONS_WITH_VALUE = {"-MF", "-MT", "-MQ"}
+
+
+def create_preprocess_args(compile_command: CompileCommand) -> typing.List[str]:
+    """Create arguments to preprocess a source code writing to stdout.
+
+    Args:
+        compile_command (CompileCommand): Compile command.
+
+    Returns:
+        typing.List[str]: Arguments.
+    """
+    args: typing.List[str] = []
+    skip_next = False
+    for arg in compile_command.arguments:
+        if skip_next:
+            skip_next = False
+            continue
+        # Remove output file option to get the result from stdout.
+        if arg == "-o":
+            skip_next = True
+            continue
+        # Remove options to write dependencies not to overwrite files of builds.
+        if arg in DEPENDENCY_OPTIONS:
+            continue
+        if arg in DEPENDENCY_OPTIONS_WITH_VALUE:
+            skip_next = True
+            continue
+        if any(
+            arg.startswith(option) and len(arg) > len(option)
+            for option in DEPENDENCY_OPTIONS_WITH_VALUE
+        ):
+            continue
+        args.append(arg)
+    args.append("-E")
+    return args
+
 
 class SourceHashCalculator:
     """Class to calculate hash of source codes.
 
+    Hashes are calculated using one of the following methods
+    selected by ``config.hash_method``:
+
+    - ``preprocess``: hashes of preprocessed source codes.
+    - ``dependencies``: hashes of arguments of compilers and contents of source
+      codes and headers included. Hashes of headers are calculated only once
+      in a run.
+
+    If a store of manifests is given, hashes are reused without preprocessing
+    when dependencies of source codes are unchanged (direct mode).
+
+    If ``config.relocatable_cache`` is enabled, paths of the source root and
+    the build directory are replaced with placeholders before hashing,
+    so that hashes are independent of the directory of the checkout.
+
     Args:
         config: Configuration.
+        compile_database: Database of compile commands.
+            Loaded from the build directory if not given.
+        manifest_store: Store of manifests for direct mode.
+            Direct mode is disabled if not given.
     """
 
-    def __init__(self, config: Config) -> None:
+    def __init__(
+        self,
+        config: Config,
+        compile_database: typing.Optional[CompileDatabase] = None,
+        manifest_store: typing.Optional[ManifestStore] = None,
+    ) -> None:
         self._command_executor = CommandExecutor()
         self._config = config
 
-        with open(
-            os.path.join(self._config.build_dir, "compile_commands.json"),
-            encoding="utf8",
-        ) as file:
-            self._compile_commands = json.load(file)
+        if compile_database is None:
+            compile_database = load_compile_database(self._config.build_dir)
+        self._compile_database = compile_database
+
+        self._manifest_store = manifest_store
+        self._dependency_checker = DependencyChecker()
+        self._path_normalizer = create_path_normalizer(config)
 
     async def __aenter__(self) -> Self:
         await self._command_executor.__aenter__()
@@ -53,47 +139,170 @@ class SourceHashCalculator:
         Returns:
             str: Hash.
         """
-        absolute_input_file = os.path.abspath(input_file)
-        for compile_command in self._compile_commands:
-            if compile_command["file"] == absolute_input_file:
-                break
-        else:
-            raise ValueError(
-                f"{absolute_input_file} is not found in compile_commands.json"
+        with trace_span(STAGE_HASH_SOURCE, input_file):
+            compile_command = self._compile_database.get(input_file)
+            if self._manifest_store is None:
+                return await self._calculate(input_file, compile_command)
+
+            manifest_key = calculate_manifest_key(compile_command, self._config)
+            manifest = await asyncio.to_thread(self._manifest_store.load, manifest_key)
+            if manifest is not None and await asyncio.to_thread(
+                self._dependency_checker.is_up_to_date, manifest
+            ):
+                LOGGER.debug("Reused the hash of %s in direct mode.", input_file)
+                return manifest.source_hash
+
+            start_time_ns = time.time_ns()
+            source_hash, dependency_paths = await self._calculate_with_dependencies(
+                input_file, compile_command
             )
-        args = shlex.split(compile_command["command"])
 
-        # Remove output file option to get the result from stdout.
-        for index, arg in enumerate(args):
-            if arg == "-o":
-                del args[index : index + 2]
-                break
+            manifest = await asyncio.to_thread(
+                self._dependency_checker.create_manifest,
+                source_hash=source_hash,
+                dependency_paths=dependency_paths,
+                directory=compile_command.directory,
+                start_time_ns=start_time_ns,
+            )
+            if manifest is not None:
+                await asyncio.to_thread(
+                    self._manifest_store.save, manifest_key, manifest
+                )
+            return source_hash
 
-        args.append("-E")
+    async def _calculate(self, input_file: str, compile_command: CompileCommand) -> str:
+        """Calculate a hash of a source code.
 
-        preprocess_result = await self._command_executor.execute(
-            args, cwd=compile_command["directory"]
-        )
+        Args:
+            input_file (str): Input file path.
+            compile_command (CompileCommand): Compile command.
 
-        if preprocess_result.exit_code != 0:
-            LOGGER.error("Failed to preprocess %s.", input_file)
-            LOGGER.error(preprocess_result.stderr)
-            raise RuntimeError(f"Failed to preprocess {input_file}.")
+        Returns:
+            str: Hash.
+        """
+        if self._config.hash_method == HASH_METHOD_DEPENDENCIES:
+            source_hash, _ = await self._calculate_with_dependencies(
+                input_file, compile_command
+            )
+            return source_hash
+        return await self._preprocess(input_file, compile_command)
 
-        return await asyncio.to_thread(
-            self._calculate_hash_of_string, preprocess_result.stdout
-        )
+    async def _calculate_with_dependencies(
+        self, input_file: str, compile_command: CompileCommand
+    ) -> typing.Tuple[str, typing.List[str]]:
+        """Calculate a hash of a source code and get its dependencies.
 
-    @staticmethod
-    def _calculate_hash_of_string(string: str) -> str:
-        """Calculate a hash of a string.
+        Args:
+            input_file (str): Input file path.
+            compile_command (CompileCommand): Compile command.
+
+        Returns:
+            typing.Tuple[str, typing.List[str]]: Hash and paths of dependencies.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dependency_file = os.path.join(temp_dir, "dependencies.d")
+            if self._config.hash_method == HASH_METHOD_DEPENDENCIES:
+                await self._list_dependencies(
+                    input_file, compile_command, dependency_file
+                )
+                dependency_paths = _read_dependency_file(dependency_file)
+                with trace_span(STAGE_HASH_HEADERS, input_file):
+                    source_hash = await asyncio.to_thread(
+                        self._dependency_checker.calculate_hash_of_dependencies,
+                        args=create_preprocess_args(compile_command),
+                        path_normalizer=self._path_normalizer,
+                        compiler=find_compiler(compile_command),
+                        dependency_paths=dependency_paths,
+                        directory=compile_command.directory,
+                    )
+            else:
+                source_hash = await self._preprocess(
+                    input_file,
+                    compile_command,
+                    extra_args=["-MD", "-MF", dependency_file],
+                )
+                dependency_paths = _read_dependency_file(dependency_file)
+        return source_hash, dependency_paths
+
+    async def _preprocess(
+        self,
+        input_file: str,
+        compile_command: CompileCommand,
+        *,
+        extra_args: typing.Optional[typing.List[str]] = None,
+    ) -> str:
+        """Preprocess a source code and calculate the hash of the result.
 
         Args:
-            string (str): Input.
+            input_file (str): Input file path.
+            compile_command (CompileCommand): Compile command.
+            extra_args (typing.Optional[typing.List[str]]): Additional arguments.
 
         Returns:
             str: Hash.
         """
-        return base64.b64encode(hashlib.sha3_512(string.encode()).digest()).decode(
-            "ascii"
-        )
+        args = create_preprocess_args(compile_command)
+        if extra_args:
+            args += extra_args
+
+        # Preprocessed sources can be large, so they are hashed while reading.
+        hasher = hashlib.sha3_512()
+        stdout_consumer: typing.Callable[[bytes], None] = hasher.update
+        if self._path_normalizer is not None:
+            stdout_consumer = StreamNormalizer(self._path_normalizer, hasher.update)
+        with trace_span(STAGE_PREPROCESS, input_file):
+            preprocess_result = await self._command_executor.execute_streaming(
+                args, stdout_consumer=stdout_consumer, cwd=compile_command.directory
+            )
+        if isinstance(stdout_consumer, StreamNormalizer):
+            await asyncio.to_thread(stdout_consumer.flush)
+        _check_preprocess_result(input_file, preprocess_result)
+
+        return base64.b64encode(hasher.digest()).decode("ascii")
+
+    async def _list_dependencies(
+        self, input_file: str, compile_command: CompileCommand, dependency_file: str
+    ) -> None:
+        """Write dependencies of a source code without preprocessed outputs.
+
+        Args:
+            input_file (str): Input file path.
+            compile_command (CompileCommand): Compile command.
+            dependency_file (str): Path of the file to write dependencies.
+        """
+        with trace_span(STAGE_PREPROCESS, input_file):
+            result = await self._command_executor.execute(
+                create_preprocess_args(compile_command)
+                + ["-M", "-MF", dependency_file],
+                cwd=compile_command.directory,
+            )
+        _check_preprocess_result(input_file, result)
+
+
+def _check_preprocess_result(input_file: str, result: CommandResult) -> None:
+    """Check the result of preprocessing.
+
+    Args:
+        input_file (str): Input file path.
+        result (CommandResult): Result.
+
+    Raises:
+        RuntimeError: If preprocessing failed.
+    """
+    if result.exit_code != 0:
+        LOGGER.error("Failed to preprocess %s.", input_file)
+        LOGGER.error(result.stderr)
+        raise RuntimeError(f"Failed to preprocess {input_file}.")
+
+
+def _read_dependency_file(filepath: str) -> typing.List[str]:
+    """Read a dependency file written by compilers.
+
+    Args:
+        filepath (str): File path.
+
+    Returns:
+        typing.List[str]: Paths of the dependencies.
+    """
+    with open(filepath, mode="r", encoding="utf8") as file:
+        return parse_dependency_file(file.read())
@@ -0,0 +1,703 @@
+"""Tables of cached results using sqlite3 module in the standard library.
+
+The schema is the same as the one created by :py:mod:`clang_tidy_checker.cache_table`,
+so databases can be used by both backends.
+"""
+
+import contextlib
+import datetime
+import sqlite3
+import typing
+
+from clang_tidy_checker.cache_backend import (
+    BUSY_TIMEOUT_SECONDS,
+    DEFAULT_WRITE_BATCH_SIZE,
+    NUM_ENTRIES_INFO,
+    TOTAL_BYTES_INFO,
+    BufferedCacheTable,
+    CacheStatistics,
+    EvictionPlan,
+    IMaintainableCacheTable,
+    PendingResult,
+    PruneResult,
+    calculate_prune_targets,
+    collect_outputs,
+    compress_text,
+    count_ages,
+    decompress_result,
+    is_valid_blob,
+    retry_on_lock_error,
+)
+from clang_tidy_checker.check_result import CheckResult
+
+# Statements to create tables.
+# (Same as tables created by SQLAlchemy from cache_model.py.)
+CREATE_TABLE_STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS cached_blob (
+    blob_hash VARCHAR(100) NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    ref_count INTEGER NOT NULL,
+    PRIMARY KEY (blob_hash)
+)""",
+    """CREATE TABLE IF NOT EXISTS cache_info (
+    name VARCHAR(100) NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (name)
+)""",
+    """CREATE TABLE IF NOT EXISTS cached_result (
+    source_hash VARCHAR(100) NOT NULL,
+    exit_code INTEGER NOT NULL,
+    stdout_hash VARCHAR(100) NOT NULL,
+    stderr_hash VARCHAR(100) NOT NULL,
+    created_at DATETIME NOT NULL,
+    last_used_at DATETIME NOT NULL,
+    PRIMARY KEY (source_hash),
+    FOREIGN KEY(stdout_hash) REFERENCES cached_blob (blob_hash),
+    FOREIGN KEY(stderr_hash) REFERENCES cached_blob (blob_hash)
+)""",
+    """CREATE INDEX IF NOT EXISTS ix_cached_result_last_used_at
+ON cached_result (last_used_at)""",
+]
+
+# Statement to select a result with its outputs.
+SELECT_RESULT_STATEMENT = """SELECT
+    cached_result.exit_code,
+    stdout_blob.blob_hash, stdout_blob.data,
+    stderr_blob.blob_hash, stderr_blob.data
+FROM cached_result
+JOIN cached_blob AS stdout_blob ON cached_result.stdout_hash = stdout_blob.blob_hash
+JOIN cached_blob AS stderr_blob ON cached_result.stderr_hash = stderr_blob.blob_hash
+WHERE cached_result.source_hash = ?"""
+
+# Statement to select results with their outputs in the order of last uses.
+SELECT_ALL_RESULTS_STATEMENT = """SELECT
+    cached_result.source_hash, cached_result.exit_code,
+    stdout_blob.blob_hash, stdout_blob.data,
+    stderr_blob.blob_hash, stderr_blob.data
+FROM cached_result
+JOIN cached_blob AS stdout_blob ON cached_result.stdout_hash = stdout_blob.blob_hash
+JOIN cached_blob AS stderr_blob ON cached_result.stderr_hash = stderr_blob.blob_hash
+ORDER BY cached_result.last_used_at ASC"""
+
+# Number of rows fetched at once in iteration of results.
+FETCH_SIZE = 500
+
+# Statement to check whether a result exists.
+SELECT_EXISTING_HASH_STATEMENT = (
+    "SELECT 1 FROM cached_result WHERE cached_result.source_hash = ?"
+)
+
+# Statement to select the reference count and the size of an output.
+SELECT_BLOB_STATE_STATEMENT = (
+    "SELECT ref_count, size FROM cached_blob WHERE cached_blob.blob_hash = ?"
+)
+
+# Statement to insert an output.
+INSERT_BLOB_STATEMENT = (
+    "INSERT INTO cached_blob (blob_hash, data, size, ref_count) VALUES (?, ?, ?, ?)"
+)
+
+# Statement to add a number to the reference count of an output.
+ADD_REF_COUNT_STATEMENT = (
+    "UPDATE cached_blob SET ref_count = ref_count + ? WHERE blob_hash = ?"
+)
+
+# Statement to insert a result.
+INSERT_RESULT_STATEMENT = """INSERT INTO cached_result
+(source_hash, exit_code, stdout_hash, stderr_hash, created_at, last_used_at)
+VALUES (?, ?, ?, ?, ?, ?)"""
+
+# Statement to update the time of the last use of a result.
+UPDATE_LAST_USED_TIME_STATEMENT = (
+    "UPDATE cached_result SET last_used_at = ? WHERE source_hash = ?"
+)
+
+# Statement to select results in the order of last uses.
+SELECT_EVICTION_CANDIDATES_STATEMENT = """SELECT source_hash, stdout_hash, stderr_hash
+FROM cached_result ORDER BY last_used_at ASC"""
+
+# Statement to delete a result.
+DELETE_RESULT_STATEMENT = "DELETE FROM cached_result WHERE source_hash = ?"
+
+# Statement to delete an output.
+DELETE_BLOB_STATEMENT = "DELETE FROM cached_blob WHERE blob_hash = ?"
+
+# Statement to select a statistics.
+SELECT_INFO_STATEMENT = "SELECT value FROM cache_info WHERE name = ?"
+
+# Statement to add a value to a statistics.
+ADD_INFO_STATEMENT = "UPDATE cache_info SET value = value + ? WHERE name = ?"
+
+# Statements to calculate statistics not saved yet.
+CALCULATE_INFO_STATEMENTS = {
+    NUM_ENTRIES_INFO: "SELECT count(source_hash) FROM cached_result",
+    TOTAL_BYTES_INFO: "SELECT coalesce(sum(size), 0) FROM cached_blob",
+}
+
+# Statement to select times of last uses of results.
+SELECT_LAST_USED_TIMES_STATEMENT = "SELECT last_used_at FROM cached_result"
+
+# Statement to count results not used since a time.
+COUNT_EXPIRED_RESULTS_STATEMENT = (
+    "SELECT count(*) FROM cached_result WHERE last_used_at < ?"
+)
+
+# Statement to count results referring to missing outputs.
+COUNT_RESULTS_WITHOUT_OUTPUTS_STATEMENT = """SELECT count(*) FROM cached_result
+WHERE NOT EXISTS (
+    SELECT 1 FROM cached_blob WHERE cached_blob.blob_hash = cached_result.stdout_hash
+) OR NOT EXISTS (
+    SELECT 1 FROM cached_blob WHERE cached_blob.blob_hash = cached_result.stderr_hash
+)"""
+
+# Statement to count outputs with reference counts different from references.
+COUNT_WRONG_REF_COUNTS_STATEMENT = """SELECT count(*) FROM cached_blob
+LEFT JOIN (
+    SELECT referred_hash, count(*) AS num_refs FROM (
+        SELECT stdout_hash AS referred_hash FROM cached_result
+        UNION ALL SELECT stderr_hash AS referred_hash FROM cached_result
+    ) GROUP BY referred_hash
+) AS refs ON refs.referred_hash = cached_blob.blob_hash
+WHERE cached_blob.ref_count != coalesce(refs.num_refs, 0)"""
+
+# Statement to select outputs.
+SELECT_BLOBS_STATEMENT = "SELECT blob_hash, data, size FROM cached_blob"
+
+# Format of times in the database.
+# (Same as the format of DATETIME type in SQLAlchemy.)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _is_lock_error(error: Exception) -> bool:
+    """Check whether an error is caused by locks of the database.
+
+    Args:
+        error (Exception): Error.
+
+    Returns:
+        bool: True if caused by locks.
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+def _parse_time(text: str) -> datetime.datetime:
+    """Parse a time in the database.
+
+    Args:
+        text (str): Formatted time.
+
+    Returns:
+        datetime.datetime: Time.
+    """
+    return datetime.datetime.strptime(text, TIME_FORMAT)
+
+
+def _format_time(time: datetime.datetime) -> str:
+    """Format a time for the database.
+
+    Args:
+        time (datetime.datetime): Time.
+
+    Returns:
+        str: Formatted time.
+    """
+    return time.strftime(TIME_FORMAT)
+
+
+class SqliteCacheTable(BufferedCacheTable, IMaintainableCacheTable):
+    """Tables of cached results using sqlite3 module in the standard library.
+
+    This class has the same behavior as
+    :py:class:`clang_tidy_checker.cache_table.CacheTable` without costs of
+    ORM and importing SQLAlchemy. Statements are constant strings and
+    executed for each key, so that they are prepared once and reused from
+    the cache of statements in sqlite3 module.
+
+    The database uses write-ahead logging (WAL) and waits for locks held by
+    other processes. Writes start transactions with locks for writes
+    (``BEGIN IMMEDIATE``) and are retried when the database is locked.
+
+    Args:
+        filepath (str): File path of the database.
+        max_cache_entries (int): Maximum number of entries in the cache.
+        max_cache_bytes (typing.Optional[int]): Maximum total size of outputs
+            in the cache in bytes. No limit if None.
+        write_batch_size (int): Number of results written in a transaction.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        max_cache_entries: int,
+        max_cache_bytes: typing.Optional[int] = None,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> None:
+        super().__init__(
+            max_cache_entries=max_cache_entries,
+            max_cache_bytes=max_cache_bytes,
+            write_batch_size=write_batch_size,
+        )
+        # Transactions are started explicitly, and the connection is used
+        # in a thread at once (see AsyncCacheTable).
+        self._connection = sqlite3.connect(
+            filepath,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        retry_on_lock_error(self._initialize, _is_lock_error)
+
+    def close(self) -> None:
+        """Write buffered results and close the connection."""
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+    def get_statistics(
+        self, age_bounds: typing.Sequence[datetime.timedelta]
+    ) -> CacheStatistics:
+        self.flush()
+        with self._transaction("BEGIN") as cursor:
+            num_entries = self._get_info(cursor, NUM_ENTRIES_INFO)
+            total_bytes = self._get_info(cursor, TOTAL_BYTES_INFO)
+            cursor.execute(SELECT_LAST_USED_TIMES_STATEMENT)
+            age_counts = count_ages((_parse_time(row[0]) for row in cursor), age_bounds)
+        return CacheStatistics(
+            num_entries=num_entries, total_bytes=total_bytes, age_counts=age_counts
+        )
+
+    def prune(
+        self,
+        *,
+        max_age: typing.Optional[datetime.timedelta] = None,
+        max_entries: typing.Optional[int] = None,
+        max_bytes: typing.Optional[int] = None,
+    ) -> PruneResult:
+        self.flush()
+        expiry = None if max_age is None else datetime.datetime.now() - max_age
+        plan = retry_on_lock_error(
+            lambda: self._prune_once(expiry, max_entries, max_bytes), _is_lock_error
+        )
+        return PruneResult(
+            num_removed_entries=len(plan.removed_hashes), freed_bytes=plan.freed_bytes
+        )
+
+    def compact(self) -> None:
+        self.flush()
+        retry_on_lock_error(lambda: self._connection.execute("VACUUM"), _is_lock_error)
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def verify(self) -> typing.List[str]:
+        self.flush()
+        problems: typing.List[str] = []
+        # Read in a transaction to check a snapshot of the database.
+        with self._transaction("BEGIN") as cursor:
+            cursor.execute("PRAGMA integrity_check")
+            messages = [str(row[0]) for row in cursor.fetchall()]
+            if messages != ["ok"]:
+                problems.extend(f"Broken database: {message}" for message in messages)
+            cursor.execute(COUNT_RESULTS_WITHOUT_OUTPUTS_STATEMENT)
+            num_results = int(cursor.fetchone()[0])
+            if num_results > 0:
+                problems.append(f"{num_results} results refer to missing outputs.")
+            cursor.execute(COUNT_WRONG_REF_COUNTS_STATEMENT)
+            num_blobs = int(cursor.fetchone()[0])
+            if num_blobs > 0:
+                problems.append(f"{num_blobs} outputs have wrong reference counts.")
+            for name, statement in CALCULATE_INFO_STATEMENTS.items():
+                cursor.execute(statement)
+                actual_value = int(cursor.fetchone()[0] or 0)
+                saved_value = self._get_info(cursor, name)
+                if actual_value != saved_value:
+                    problems.append(
+                        f"Statistics {name} is {saved_value}, "
+                        f"but the actual value is {actual_value}."
+                    )
+            problems.extend(self._verify_blobs(cursor))
+        return problems
+
+    def _write(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        retry_on_lock_error(
+            lambda: self._write_once(pending_results, last_used_times),
+            _is_lock_error,
+        )
+
+    def _write_once(
+        self,
+        pending_results: typing.Dict[str, PendingResult],
+        last_used_times: typing.Dict[str, datetime.datetime],
+    ) -> None:
+        """Write results and times of uses in a transaction.
+
+        Args:
+            pending_results (typing.Dict[str, PendingResult]): Results to write.
+            last_used_times (typing.Dict[str, datetime.datetime]): Times of last
+                uses for hashes of source codes.
+        """
+        last_used_times = dict(last_used_times)
+        with self._transaction() as cursor:
+            # The same source can be checked concurrently, so existing entries
+            # are kept as they are.
+            new_results: typing.Dict[str, PendingResult] = {}
+            for source_hash, pending in pending_results.items():
+                cursor.execute(SELECT_EXISTING_HASH_STATEMENT, (source_hash,))
+                if cursor.fetchone() is not None:
+                    last_used_times[source_hash] = pending.created_at
+                else:
+                    new_results[source_hash] = pending
+            if new_results:
+                self._insert_results(cursor, new_results)
+            cursor.executemany(
+                UPDATE_LAST_USED_TIME_STATEMENT,
+                [
+                    (_format_time(used_at), source_hash)
+                    for source_hash, used_at in last_used_times.items()
+                ],
+            )
+            if new_results:
+                self._remove_old_entries(cursor)
+
+    def _read(self, source_hashes: typing.List[str]) -> typing.Dict[str, CheckResult]:
+        # Outputs shared among results are decompressed once.
+        texts: typing.Dict[str, str] = {}
+        results: typing.Dict[str, CheckResult] = {}
+        cursor = self._connection.cursor()
+        try:
+            for source_hash in source_hashes:
+                cursor.execute(SELECT_RESULT_STATEMENT, (source_hash,))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                exit_code, stdout_hash, stdout, stderr_hash, stderr = row
+                results[source_hash] = decompress_result(
+                    exit_code, (stdout_hash, stdout), (stderr_hash, stderr), texts
+                )
+        finally:
+            cursor.close()
+        return results
+
+    def _find_saved(self, source_hashes: typing.List[str]) -> typing.Set[str]:
+        found_hashes: typing.Set[str] = set()
+        cursor = self._connection.cursor()
+        try:
+            for source_hash in source_hashes:
+                cursor.execute(SELECT_EXISTING_HASH_STATEMENT, (source_hash,))
+                if cursor.fetchone() is not None:
+                    found_hashes.add(source_hash)
+        finally:
+            cursor.close()
+        return found_hashes
+
+    def _iterate(self) -> typing.Iterator[typing.Tuple[str, CheckResult]]:
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(SELECT_ALL_RESULTS_STATEMENT)
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                # Outputs shared among results in rows fetched at once are
+                # decompressed once.
+                texts: typing.Dict[str, str] = {}
+                for source_hash, exit_code, *blobs in rows:
+                    yield source_hash, decompress_result(
+                        exit_code, (blobs[0], blobs[1]), (blobs[2], blobs[3]), texts
+                    )
+        finally:
+            cursor.close()
+
+    def _prune_once(
+        self,
+        expiry: typing.Optional[datetime.datetime],
+        max_entries: typing.Optional[int],
+        max_bytes: typing.Optional[int],
+    ) -> EvictionPlan:
+        """Remove entries in a transaction.
+
+        Args:
+            expiry (typing.Optional[datetime.datetime]): Time before which
+                entries not used are removed.
+            max_entries (typing.Optional[int]): Maximum number of entries.
+            max_bytes (typing.Optional[int]): Maximum total size of outputs.
+
+        Returns:
+            EvictionPlan: Removed entries.
+        """
+        with self._transaction() as cursor:
+            num_expired_entries = 0
+            if expiry is not None:
+                cursor.execute(COUNT_EXPIRED_RESULTS_STATEMENT, (_format_time(expiry),))
+                num_expired_entries = int(cursor.fetchone()[0])
+            total_bytes = self._get_info(cursor, TOTAL_BYTES_INFO)
+            targets = calculate_prune_targets(
+                num_entries=self._get_info(cursor, NUM_ENTRIES_INFO),
+                total_bytes=total_bytes,
+                num_expired_entries=num_expired_entries,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+            )
+            return self._remove_entries(cursor, *targets, total_bytes=total_bytes)
+
+    def _verify_blobs(self, cursor: sqlite3.Cursor) -> typing.List[str]:
+        """Verify data of outputs.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor.
+
+        Returns:
+            typing.List[str]: Descriptions of problems found.
+        """
+        num_broken_blobs = 0
+        cursor.execute(SELECT_BLOBS_STATEMENT)
+        while rows := cursor.fetchmany(FETCH_SIZE):
+            for blob_hash, data, size in rows:
+                if len(data) != size or not is_valid_blob(blob_hash, data):
+                    num_broken_blobs += 1
+        if num_broken_blobs > 0:
+            return [f"{num_broken_blobs} outputs are broken."]
+        return []
+
+    def _insert_results(
+        self,
+        cursor: sqlite3.Cursor,
+        pending_results: typing.Dict[str, PendingResult],
+    ) -> None:
+        """Insert results and their outputs.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor in a transaction.
+            pending_results (typing.Dict[str, PendingResult]): Results to insert.
+        """
+        output_hashes, blobs, ref_counts = collect_outputs(pending_results)
+        rows: typing.List[typing.Tuple[str, int, str, str, str, str]] = []
+        for source_hash, pending in pending_results.items():
+            stdout_hash, stderr_hash = output_hashes[source_hash]
+            created_at = _format_time(pending.created_at)
+            rows.append(
+                (
+                    source_hash,
+                    pending.result.exit_code,
+                    stdout_hash,
+                    stderr_hash,
+                    created_at,
+                    created_at,
+                )
+            )
+
+        inserted_bytes = self._insert_blobs(cursor, blobs, ref_counts)
+        cursor.executemany(INSERT_RESULT_STATEMENT, rows)
+
+        cursor.execute(ADD_INFO_STATEMENT, (len(rows), NUM_ENTRIES_INFO))
+        cursor.execute(ADD_INFO_STATEMENT, (inserted_bytes, TOTAL_BYTES_INFO))
+
+    def _insert_blobs(
+        self,
+        cursor: sqlite3.Cursor,
+        blobs: typing.Dict[str, str],
+        ref_counts: typing.Counter[str],
+    ) -> int:
+        """Insert outputs, or add reference counts of existing outputs.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor in a transaction.
+            blobs (typing.Dict[str, str]): Outputs for their hashes.
+            ref_counts (typing.Counter[str]): Numbers of new references.
+
+        Returns:
+            int: Total size of inserted outputs.
+        """
+        blob_states = self._select_blob_states(cursor, blobs.keys())
+        new_blobs: typing.List[typing.Tuple[str, bytes, int, int]] = []
+        for blob_hash, text in blobs.items():
+            if blob_hash in blob_states:
+                continue
+            data = compress_text(text)
+            new_blobs.append((blob_hash, data, len(data), ref_counts[blob_hash]))
+        cursor.executemany(INSERT_BLOB_STATEMENT, new_blobs)
+        cursor.executemany(
+            ADD_REF_COUNT_STATEMENT,
+            [(ref_counts[blob_hash], blob_hash) for blob_hash in blob_states],
+        )
+        return sum(blob[2] for blob in new_blobs)
+
+    def _remove_old_entries(self, cursor: sqlite3.Cursor) -> None:
+        """Remove least recently used entries.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor in a transaction.
+        """
+        total_bytes = self._get_info(cursor, TOTAL_BYTES_INFO)
+        targets = self._eviction_targets(
+            self._get_info(cursor, NUM_ENTRIES_INFO), total_bytes
+        )
+        if targets is None:
+            return
+        self._remove_entries(cursor, *targets, total_bytes=total_bytes)
+
+    def _remove_entries(
+        self,
+        cursor: sqlite3.Cursor,
+        min_removed_entries: int,
+        max_remaining_bytes: int,
+        *,
+        total_bytes: int,
+    ) -> EvictionPlan:
+        """Remove least recently used entries to targets.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor in a transaction.
+            min_removed_entries (int): Minimum number of entries to remove.
+            max_remaining_bytes (int): Maximum total size after removal.
+            total_bytes (int): Current total size.
+
+        Returns:
+            EvictionPlan: Removed entries.
+        """
+        plan = self._plan_eviction(
+            min_removed_entries=min_removed_entries,
+            max_remaining_bytes=max_remaining_bytes,
+            total_bytes=total_bytes,
+        )
+
+        cursor.executemany(
+            DELETE_RESULT_STATEMENT,
+            [(source_hash,) for source_hash in plan.removed_hashes],
+        )
+        cursor.executemany(
+            ADD_REF_COUNT_STATEMENT,
+            [(-count, blob_hash) for blob_hash, count in plan.released_counts.items()],
+        )
+        # Remove outputs no result refers to.
+        cursor.executemany(
+            DELETE_BLOB_STATEMENT,
+            [(blob_hash,) for blob_hash in plan.unreferenced_hashes()],
+        )
+
+        cursor.execute(
+            ADD_INFO_STATEMENT, (-len(plan.removed_hashes), NUM_ENTRIES_INFO)
+        )
+        cursor.execute(ADD_INFO_STATEMENT, (-plan.freed_bytes, TOTAL_BYTES_INFO))
+        return plan
+
+    def _plan_eviction(
+        self,
+        *,
+        min_removed_entries: int,
+        max_remaining_bytes: int,
+        total_bytes: int,
+    ) -> EvictionPlan:
+        """Select entries to remove in a pass of the index of last uses.
+
+        Args:
+            min_removed_entries (int): Minimum number of entries to remove.
+            max_remaining_bytes (int): Maximum total size after removal.
+            total_bytes (int): Current total size.
+
+        Returns:
+            EvictionPlan: Plan of removal.
+        """
+        plan = EvictionPlan()
+        # Another cursor is used to read states of outputs during the pass.
+        candidates = self._connection.cursor()
+        blob_cursor = self._connection.cursor()
+        try:
+            candidates.execute(SELECT_EVICTION_CANDIDATES_STATEMENT)
+            for source_hash, stdout_hash, stderr_hash in candidates:
+                if (
+                    len(plan.removed_hashes) >= min_removed_entries
+                    and total_bytes - plan.freed_bytes <= max_remaining_bytes
+                ):
+                    break
+                plan.blob_states.update(
+                    self._select_blob_states(
+                        blob_cursor,
+                        {stdout_hash, stderr_hash} - plan.blob_states.keys(),
+                    )
+                )
+                plan.remove(source_hash, (stdout_hash, stderr_hash))
+        finally:
+            candidates.close()
+            blob_cursor.close()
+        return plan
+
+    def _select_blob_states(
+        self, cursor: sqlite3.Cursor, blob_hashes: typing.Iterable[str]
+    ) -> typing.Dict[str, typing.Tuple[int, int]]:
+        """Select reference counts and sizes of outputs.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor.
+            blob_hashes (typing.Iterable[str]): Hashes of outputs.
+
+        Returns:
+            typing.Dict[str, typing.Tuple[int, int]]: Reference counts and sizes
+            of outputs found in the database.
+        """
+        blob_states: typing.Dict[str, typing.Tuple[int, int]] = {}
+        for blob_hash in blob_hashes:
+            cursor.execute(SELECT_BLOB_STATE_STATEMENT, (blob_hash,))
+            row = cursor.fetchone()
+            if row is not None:
+                blob_states[blob_hash] = (row[0], row[1])
+        return blob_states
+
+    def _initialize(self) -> None:
+        """Create tables and initialize statistics of the cache if not saved."""
+        with self._transaction() as cursor:
+            for statement in CREATE_TABLE_STATEMENTS:
+                cursor.execute(statement)
+            for name, statement in CALCULATE_INFO_STATEMENTS.items():
+                cursor.execute(SELECT_INFO_STATEMENT, (name,))
+                if cursor.fetchone() is not None:
+                    continue
+                cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO cache_info (name, value) VALUES (?, ?)",
+                    (name, int(cursor.fetchone()[0] or 0)),
+                )
+
+    @contextlib.contextmanager
+    def _transaction(
+        self, begin_statement: str = "BEGIN IMMEDIATE"
+    ) -> typing.Iterator[sqlite3.Cursor]:
+        """Execute statements in a transaction.
+
+        Args:
+            begin_statement (str): Statement to begin the transaction.
+                Transactions lock the database for writes at first by default.
+
+        Yields:
+            sqlite3.Cursor: Cursor in the transaction.
+        """
+        cursor = self._connection.cursor()
+        cursor.execute(begin_statement)
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.close()
+
+    def _get_info(self, cursor: sqlite3.Cursor, name: str) -> int:
+        """Get a statistics of the cache.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor.
+            name (str): Name of the statistics.
+
+        Returns:
+            int: Value.
+        """
+        cursor.execute(SELECT_INFO_STATEMENT, (name,))
+        row = cursor.fetchone()
+        return int(row[0]) if row is not None else 0
@@ -0,0 +1,265 @@
+"""Fingerprints of clang-tidy and its configurations for keys of caches.
+
+Results of clang-tidy depend on the executable and its configurations in
+addition to source codes, so keys of caches are calculated from all of them.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import shutil
+import typing
+
+from clang_tidy_checker.command_executor import CommandExecutor
+from clang_tidy_checker.compile_database import normalize_path
+from clang_tidy_checker.config import Config
+from clang_tidy_checker.path_normalizer import PathNormalizer
+
+LOGGER = logging.getLogger(__name__)
+
+# Version of the format of keys of caches.
+CACHE_KEY_VERSION = 3
+
+# Name of configuration files of clang-tidy.
+CLANG_TIDY_CONFIG_FILE_NAME = ".clang-tidy"
+
+# Option of clang-tidy to specify the configuration file.
+CONFIG_FILE_OPTION = "--config-file"
+
+# Name of the file of memoized hashes of executables in the cache directory.
+EXECUTABLE_HASHES_FILE_NAME = "executable_hashes.json"
+
+# Size of chunks to read executables in bytes.
+EXECUTABLE_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _read_file_if_exists(filepath: str) -> typing.Optional[str]:
+    """Read a file if exists.
+
+    Args:
+        filepath (str): File path.
+
+    Returns:
+        typing.Optional[str]: Contents of the file if exists.
+    """
+    try:
+        with open(filepath, mode="r", encoding="utf8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def get_config_files_in_args(args: typing.List[str]) -> typing.List[str]:
+    """Get paths of configuration files specified in arguments of clang-tidy.
+
+    Args:
+        args (typing.List[str]): Arguments.
+
+    Returns:
+        typing.List[str]: Paths of configuration files.
+    """
+    config_files: typing.List[str] = []
+    for index, arg in enumerate(args):
+        if arg == CONFIG_FILE_OPTION and index + 1 < len(args):
+            config_files.append(args[index + 1])
+        elif arg.startswith(CONFIG_FILE_OPTION + "="):
+            config_files.append(arg[len(CONFIG_FILE_OPTION) + 1 :])
+    return config_files
+
+
+def _load_executable_hashes(filepath: str) -> typing.Dict[str, typing.Any]:
+    """Load memoized hashes of executables.
+
+    Args:
+        filepath (str): File path.
+
+    Returns:
+        typing.Dict[str, typing.Any]: Sizes, modification times, and hashes
+        of executables for their paths. Empty if not saved.
+    """
+    contents = _read_file_if_exists(filepath)
+    if contents is None:
+        return {}
+    try:
+        hashes = json.loads(contents)
+    except ValueError as error:
+        LOGGER.warning("Ignored broken hashes of executables: %s", error)
+        return {}
+    if not isinstance(hashes, dict):
+        return {}
+    return hashes
+
+
+def hash_executable(
+    executable: str, cache_dir: typing.Optional[str] = None
+) -> typing.Optional[str]:
+    """Calculate a hash of the contents of an executable.
+
+    Hashes are memoized in the cache directory for paths, sizes, and
+    modification times of executables, so that large executables are not
+    read in each run.
+
+    Args:
+        executable (str): Path or name of the executable.
+        cache_dir (typing.Optional[str]): Cache directory. Hashes are not
+            memoized if None.
+
+    Returns:
+        typing.Optional[str]: Hash. None if the executable is not found.
+    """
+    found_path = shutil.which(executable)
+    if found_path is None:
+        return None
+    path = os.path.realpath(found_path)
+    stat = os.stat(path)
+    state = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    hashes_path: typing.Optional[str] = None
+    hashes: typing.Dict[str, typing.Any] = {}
+    if cache_dir is not None:
+        hashes_path = os.path.join(cache_dir, EXECUTABLE_HASHES_FILE_NAME)
+        hashes = _load_executable_hashes(hashes_path)
+        memoized = hashes.get(path)
+        if isinstance(memoized, dict) and all(
+            memoized.get(key) == value for key, value in state.items()
+        ):
+            return str(memoized["hash"])
+
+    hasher = hashlib.sha3_256()
+    with open(path, mode="rb") as file:
+        while chunk := file.read(EXECUTABLE_READ_CHUNK_SIZE):
+            hasher.update(chunk)
+    executable_hash = hasher.hexdigest()
+
+    if hashes_path is not None:
+        hashes[path] = {**state, "hash": executable_hash}
+        os.makedirs(os.path.dirname(hashes_path), exist_ok=True)
+        # The file is replaced atomically, because processes may write at once.
+        temp_path = f"{hashes_path}.{os.getpid()}.tmp"
+        with open(temp_path, mode="w", encoding="utf8") as file:
+            json.dump(hashes, file)
+        os.replace(temp_path, hashes_path)
+    return executable_hash
+
+
+async def calculate_tool_fingerprint(
+    config: Config, path_normalizer: typing.Optional[PathNormalizer] = None
+) -> str:
+    """Calculate a fingerprint of clang-tidy used in a run.
+
+    The fingerprint includes the version of clang-tidy, a hash of the contents
+    of the executable, extra arguments, and configuration files specified in
+    the extra arguments. The path and the state of the file of the executable
+    are not included, so that installations of the same executable share
+    caches. If ``config.relocatable_cache`` is enabled, the hash of the
+    executable is not included either, so that machines with different builds
+    of the same release of clang-tidy share caches.
+
+    Args:
+        config (Config): Configuration.
+        path_normalizer (typing.Optional[PathNormalizer]): Normalizer of paths
+            of clang-tidy and arguments.
+
+    Returns:
+        str: Fingerprint.
+    """
+    async with CommandExecutor() as command_executor:
+        version_result = await command_executor.execute(
+            [config.clang_tidy_path, "--version"]
+        )
+    if version_result.exit_code != 0:
+        LOGGER.warning("Failed to get the version of clang-tidy.")
+    executable_hash: typing.Optional[str] = None
+    if not config.relocatable_cache:
+        executable_hash = await asyncio.to_thread(
+            hash_executable, config.clang_tidy_path, config.cache_dir
+        )
+
+    extra_args = config.extra_args
+    if path_normalizer is not None:
+        extra_args = [path_normalizer.normalize(arg) for arg in extra_args]
+    data = json.dumps(
+        [
+            CACHE_KEY_VERSION,
+            version_result.stdout,
+            executable_hash,
+            extra_args,
+            [
+                _read_file_if_exists(os.path.join(config.build_dir, filepath))
+                for filepath in get_config_files_in_args(config.extra_args)
+            ],
+        ]
+    )
+    fingerprint = hashlib.sha3_256(data.encode()).hexdigest()
+    LOGGER.debug("Fingerprint of clang-tidy: %s", fingerprint)
+    return fingerprint
+
+
+class ClangTidyConfigHasher:
+    """Class to calculate hashes of configuration files of clang-tidy.
+
+    clang-tidy searches ``.clang-tidy`` files in the directory of a source
+    code and its parents, so hashes of the chain of those files are
+    calculated for each directory. Hashes are memoized during a run.
+    """
+
+    def __init__(self) -> None:
+        self._hashes: typing.Dict[str, str] = {}
+
+    def calculate_for_file(self, input_file: str) -> str:
+        """Calculate a hash of configuration files applied to a source code.
+
+        Args:
+            input_file (str): Input file path.
+
+        Returns:
+            str: Hash.
+        """
+        return self.calculate(os.path.dirname(normalize_path(input_file)))
+
+    def calculate(self, directory: str) -> str:
+        """Calculate a hash of configuration files applied to a directory.
+
+        Args:
+            directory (str): Absolute path of the directory.
+
+        Returns:
+            str: Hash.
+        """
+        config_hash = self._hashes.get(directory)
+        if config_hash is not None:
+            return config_hash
+
+        parent = os.path.dirname(directory)
+        parent_hash = "" if parent == directory else self.calculate(parent)
+        contents = _read_file_if_exists(
+            os.path.join(directory, CLANG_TIDY_CONFIG_FILE_NAME)
+        )
+        if contents is None:
+            config_hash = parent_hash
+        else:
+            config_hash = hashlib.sha3_256(
+                json.dumps([contents, parent_hash]).encode()
+            ).hexdigest()
+        self._hashes[directory] = config_hash
+        return config_hash
+
+
+def create_cache_key(
+    *, tool_fingerprint: str, config_hash: str, source_hash: str
+) -> str:
+    """Create a key of caches.
+
+    Args:
+        tool_fingerprint (str): Fingerprint of clang-tidy.
+        config_hash (str): Hash of configuration files of clang-tidy.
+        source_hash (str): Hash of the source code.
+
+    Returns:
+        str: Key.
+    """
+    data = json.dumps([tool_fingerprint, config_hash, source_hash])
+    return base64.b64encode(hashlib.sha3_512(data.encode()).digest()).decode("ascii")
@@ -0,0 +1,257 @@
+"""Tracing of stages of runs to find where time is spent.
+
+Spans of stages (e.g., preprocessing, lookups of the cache, and clang-tidy)
+are recorded by a :py:class:`Tracer` activated using :py:func:`use_tracer`.
+Spans are ignored when no tracer is activated, so functions can be
+instrumented using :py:func:`trace_span` without passing tracers around.
+
+Each stage is shown as a process in Chrome trace-event format, and spans of
+a stage running at once are placed in different lanes (threads), so a lane
+corresponds to a worker of the stage.
+"""
+
+import contextlib
+import contextvars
+import dataclasses
+import json
+import threading
+import time
+import typing
+
+# Name of the stage to search checked files.
+STAGE_SEARCH_FILES = "search files"
+
+# Name of the stage to load the compile database.
+STAGE_LOAD_COMPILE_DATABASE = "load compile database"
+
+# Name of the stage to calculate hashes of source codes.
+STAGE_HASH_SOURCE = "hash source"
+
+# Name of the stage to preprocess source codes.
+STAGE_PREPROCESS = "preprocess"
+
+# Name of the stage to hash headers of source codes.
+STAGE_HASH_HEADERS = "hash headers"
+
+# Name of the stage to load results from the cache.
+STAGE_CACHE_LOAD = "cache load"
+
+# Name of the stage to load results from the remote cache.
+STAGE_REMOTE_CACHE_LOAD = "remote cache load"
+
+# Name of the stage to save results to the cache.
+STAGE_CACHE_SAVE = "cache save"
+
+# Name of the stage to write buffered results to the cache.
+STAGE_CACHE_FLUSH = "cache flush"
+
+# Name of the stage to execute clang-tidy.
+STAGE_CLANG_TIDY = "clang-tidy"
+
+# Number of the slowest files shown in summaries of timings.
+NUM_SLOWEST_FILES = 10
+
+
+@dataclasses.dataclass
+class Span:
+    """Class of a span of a stage."""
+
+    stage: str
+    lane: int
+    start_seconds: float
+    duration_seconds: float
+    input_file: typing.Optional[str] = None
+
+
+class Tracer:
+    """Class to record spans of stages.
+
+    Spans can be recorded from threads other than the thread of the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._start_time = time.perf_counter()
+        self._spans: typing.List[Span] = []
+        self._busy_lanes: typing.Dict[str, typing.Set[int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self) -> typing.List[Span]:
+        """Recorded spans."""
+        with self._lock:
+            return list(self._spans)
+
+    @contextlib.contextmanager
+    def span(
+        self, stage: str, input_file: typing.Optional[str] = None
+    ) -> typing.Iterator[None]:
+        """Record a span of a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            input_file (typing.Optional[str]): Input file processed in the span.
+
+        Yields:
+            None: Nothing.
+        """
+        with self._lock:
+            busy_lanes = self._busy_lanes.setdefault(stage, set())
+            lane = 0
+            while lane in busy_lanes:
+                lane += 1
+            busy_lanes.add(lane)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            with self._lock:
+                busy_lanes.remove(lane)
+                self._spans.append(
+                    Span(
+                        stage=stage,
+                        lane=lane,
+                        start_seconds=start_time - self._start_time,
+                        duration_seconds=end_time - start_time,
+                        input_file=input_file,
+                    )
+                )
+
+    def write_chrome_trace(self, filepath: str) -> None:
+        """Write spans in Chrome trace-event format.
+
+        The file can be viewed in ``chrome://tracing`` or Perfetto.
+
+        Args:
+            filepath (str): File path.
+        """
+        spans = sorted(self.spans, key=lambda span: span.start_seconds)
+        stage_ids: typing.Dict[str, int] = {}
+        lanes: typing.Set[typing.Tuple[int, int]] = set()
+        events: typing.List[dict] = []
+        for span in spans:
+            stage_id = stage_ids.setdefault(span.stage, len(stage_ids) + 1)
+            lanes.add((stage_id, span.lane))
+            event: typing.Dict[str, typing.Any] = {
+                "name": span.input_file or span.stage,
+                "cat": span.stage,
+                "ph": "X",
+                "ts": span.start_seconds * 1e6,
+                "dur": span.duration_seconds * 1e6,
+                "pid": stage_id,
+                "tid": span.lane,
+            }
+            if span.input_file is not None:
+                event["args"] = {"file": span.input_file}
+            events.append(event)
+        for stage, stage_id in stage_ids.items():
+            events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": stage_id,
+                    "args": {"name": stage},
+                }
+            )
+        for stage_id, lane in sorted(lanes):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": stage_id,
+                    "tid": lane,
+                    "args": {"name": f"worker {lane}"},
+                }
+            )
+        with open(filepath, mode="w", encoding="utf8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def format_timings(self, num_slowest_files: int = NUM_SLOWEST_FILES) -> str:
+        """Format a summary of timings of stages and the slowest files.
+
+        Args:
+            num_slowest_files (int): Number of the slowest files shown.
+
+        Returns:
+            str: Summary.
+        """
+        spans = self.spans
+        durations: typing.Dict[str, typing.List[float]] = {}
+        for span in spans:
+            durations.setdefault(span.stage, []).append(span.duration_seconds)
+
+        lines = [
+            "Timings of stages:",
+            f"  {'stage':<24} {'count':>7} {'total [s]':>10} "
+            f"{'mean [s]':>10} {'max [s]':>10}",
+        ]
+        for stage, stage_durations in sorted(
+            durations.items(), key=lambda item: sum(item[1]), reverse=True
+        ):
+            total = sum(stage_durations)
+            lines.append(
+                f"  {stage:<24} {len(stage_durations):>7} {total:>10.3f} "
+                f"{total / len(stage_durations):>10.3f} "
+                f"{max(stage_durations):>10.3f}"
+            )
+
+        file_spans = sorted(
+            (span for span in spans if span.input_file is not None),
+            key=lambda span: span.duration_seconds,
+            reverse=True,
+        )
+        if file_spans:
+            lines.append("Slowest files:")
+            for span in file_spans[:num_slowest_files]:
+                lines.append(
+                    f"  {span.duration_seconds:>10.3f} s  {span.stage:<12} "
+                    f"{span.input_file}"
+                )
+        return "\n".join(lines)
+
+
+# Tracer activated in the current context.
+_CURRENT_TRACER: contextvars.ContextVar[typing.Optional[Tracer]] = (
+    contextvars.ContextVar("tracer", default=None)
+)
+
+
+@contextlib.contextmanager
+def use_tracer(tracer: typing.Optional[Tracer]) -> typing.Iterator[None]:
+    """Activate a tracer in the current context.
+
+    Tasks and threads started in the context by ``asyncio.create_task`` or
+    ``asyncio.to_thread`` inherit the tracer.
+
+    Args:
+        tracer (typing.Optional[Tracer]): Tracer. None to disable tracing.
+
+    Yields:
+        None: Nothing.
+    """
+    token = _CURRENT_TRACER.set(tracer)
+    try:
+        yield
+    finally:
+        _CURRENT_TRACER.reset(token)
+
+
+@contextlib.contextmanager
+def trace_span(
+    stage: str, input_file: typing.Optional[str] = None
+) -> typing.Iterator[None]:
+    """Record a span of a stage if a tracer is activated.
+
+    Args:
+        stage (str): Name of the stage.
+        input_file (typing.Optional[str]): Input file processed in the span.
+
+    Yields:
+        None: Nothing.
+    """
+    tracer = _CURRENT_TRACER.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(stage, input_file):
+        yield
@@ -0,0 +1,111 @@
+"""Test of cache_commands.py."""
+
+import os
+import pathlib
+
+import pytest
+from click.testing import CliRunner
+
+from clang_tidy_checker.cache_backend import CACHE_DATABASE_FILE_NAME
+from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.main import main
+from clang_tidy_checker.run_statistics import RunStatistics, save_run_statistics
+
+
+def test_export_and_import(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test to export and import the cache."""
+    monkeypatch.chdir(tmp_path)
+    result = CheckResult(exit_code=1, stdout="warning", stderr="")
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    table = create_cache_table_at(
+        str(source_dir / CACHE_DATABASE_FILE_NAME), max_cache_entries=100
+    )
+    table.save(source_hash="abc", result=result)
+    table.close()
+
+    runner = CliRunner()
+    output = runner.invoke(
+        main, ["--cache_dir", str(source_dir), "cache", "export", "cache.pack"]
+    )
+    assert output.exit_code == 0, output.output
+    assert os.path.exists(tmp_path / "cache.pack")
+
+    target_dir = tmp_path / "target"
+    for _ in range(2):
+        output = runner.invoke(
+            main, ["--cache_dir", str(target_dir), "cache", "import", "cache.pack"]
+        )
+        assert output.exit_code == 0, output.output
+
+    table = create_cache_table_at(
+        str(target_dir / CACHE_DATABASE_FILE_NAME), max_cache_entries=100
+    )
+    assert dict(table.iterate_results()) == {"abc": result}
+
+
+def test_cache_dir_required(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test of commands without cache directories."""
+    monkeypatch.chdir(tmp_path)
+
+    output = CliRunner().invoke(main, ["cache", "export", "cache.pack"])
+
+    assert output.exit_code == 2
+    assert "Cache directory is not configured." in output.output
+
+
+def test_maintenance(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test of commands to maintain the cache without clang-tidy."""
+    monkeypatch.chdir(tmp_path)
+    # Commands of the cache do not require clang-tidy.
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+    monkeypatch.setenv("PATH", str(empty_dir))
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    table = create_cache_table_at(
+        str(cache_dir / CACHE_DATABASE_FILE_NAME), max_cache_entries=100
+    )
+    for index in range(3):
+        table.save(
+            source_hash=f"hash{index}",
+            result=CheckResult(exit_code=0, stdout=f"output{index}", stderr=""),
+        )
+    table.close()
+    save_run_statistics(str(cache_dir), RunStatistics(num_hits=1, num_misses=3))
+    runner = CliRunner()
+
+    def invoke(*args: str) -> str:
+        output = runner.invoke(main, ["--cache_dir", str(cache_dir), "cache", *args])
+        assert output.exit_code == 0, output.output
+        return output.output
+
+    stats = invoke("stats")
+    assert "Entries: 3" in stats
+    assert "Hit rate of the last run: 25.0%" in stats
+
+    invoke("prune", "--max_entries", "1")
+    assert "Entries: 1" in invoke("stats")
+    invoke("vacuum")
+    invoke("verify")
+    invoke("export", "cache.pack")
+    invoke("import", "cache.pack")
+
+
+def test_prune_without_limits(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test of prune command without limits."""
+    monkeypatch.chdir(tmp_path)
+
+    output = CliRunner().invoke(
+        main, ["--cache_dir", str(tmp_path / "cache"), "cache", "prune"]
+    )
+
+    assert output.exit_code == 2
+    assert "Specify --max_age" in output.output
@@ -0,0 +1,119 @@
+"""Test of cache_pack.py."""
+
+import gzip
+import pathlib
+import typing
+
+import pytest
+
+from clang_tidy_checker.cache_backend import ICacheTable
+from clang_tidy_checker.cache_pack import (
+    InvalidPackError,
+    export_pack,
+    import_pack,
+    read_pack,
+)
+from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.directory_cache_table import DirectoryCacheTable
+from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+BACKENDS = ["sqlalchemy", "sqlite3", "directory"]
+
+
+def _create_table(
+    backend: str, path: pathlib.Path, max_cache_entries: int = 100
+) -> ICacheTable:
+    """Create a table of a backend."""
+    if backend == "sqlalchemy":
+        return create_cache_table_at(str(path), max_cache_entries=max_cache_entries)
+    if backend == "sqlite3":
+        return SqliteCacheTable(str(path), max_cache_entries=max_cache_entries)
+    return DirectoryCacheTable(str(path), max_cache_entries=max_cache_entries)
+
+
+def _result(index: int) -> CheckResult:
+    """Create a result sharing outputs with other results."""
+    return CheckResult(exit_code=index % 2, stdout=f"warning {index % 3}", stderr="")
+
+
+@pytest.mark.parametrize("source_backend", BACKENDS)
+@pytest.mark.parametrize("target_backend", BACKENDS)
+def test_move_results(
+    tmp_path: pathlib.Path, source_backend: str, target_backend: str
+) -> None:
+    """Test to move results among tables via a pack."""
+    source = _create_table(source_backend, tmp_path / "source")
+    for index in range(10):
+        source.save(f"hash{index}", _result(index))
+    source.flush()
+    # Use results to change the order of last uses.
+    assert source.load("hash0") == _result(0)
+    pack_path = str(tmp_path / "cache.pack")
+    assert export_pack(source, pack_path).num_results == 10
+    source.close()
+
+    source_hashes = [source_hash for source_hash, _ in read_pack(pack_path)]
+    assert source_hashes[-1] == "hash0"
+
+    target = _create_table(target_backend, tmp_path / "target")
+    target.save("hash1", _result(1))
+    statistics = import_pack(target, pack_path)
+    assert statistics.num_results == 9
+    assert statistics.num_skipped_results == 1
+    assert target.load_many(f"hash{index}" for index in range(10)) == {
+        f"hash{index}": _result(index) for index in range(10)
+    }
+    target.close()
+
+
+def test_append_to_pack(tmp_path: pathlib.Path) -> None:
+    """Test to append results to a pack."""
+    pack_path = str(tmp_path / "cache.pack")
+    for name in ("first", "second"):
+        table = _create_table("sqlite3", tmp_path / name)
+        table.save(name, CheckResult(exit_code=0, stdout=name, stderr=""))
+        export_pack(table, pack_path, append=True)
+        table.close()
+
+    assert dict(read_pack(pack_path)) == {
+        name: CheckResult(exit_code=0, stdout=name, stderr="")
+        for name in ("first", "second")
+    }
+
+
+def test_import_with_limits(tmp_path: pathlib.Path) -> None:
+    """Test to remove old entries when imported results exceed the limit."""
+    source = _create_table("sqlite3", tmp_path / "source")
+    for index in range(10):
+        source.save(f"hash{index}", _result(index))
+    pack_path = str(tmp_path / "cache.pack")
+    export_pack(source, pack_path)
+    source.close()
+
+    target = _create_table("sqlite3", tmp_path / "target", max_cache_entries=5)
+    import_pack(target, pack_path)
+    assert len(list(target.iterate_results())) == 5
+    target.close()
+
+
+@pytest.mark.parametrize(
+    "records",
+    [
+        ['{"format":"unknown","version":1}'],
+        ['{"format":"clang-tidy-checker-cache-pack","version":2}'],
+        [
+            '{"format":"clang-tidy-checker-cache-pack","version":1}',
+            '{"source_hash":"abc","exit_code":0,"stdout":"x","stderr":"x"}',
+        ],
+        ["not json"],
+    ],
+)
+def test_invalid_pack(tmp_path: pathlib.Path, records: typing.List[str]) -> None:
+    """Test of invalid packs."""
+    pack_path = tmp_path / "cache.pack"
+    with gzip.open(pack_path, mode="wt", encoding="utf8") as file:
+        file.write("\n".join(records) + "\n")
+
+    with pytest.raises(InvalidPackError):
+        list(read_pack(str(pack_path)))
@@ -1,9 +1,22 @@
 """Test of cache_table.py."""
 
+import asyncio
+import hashlib
+import multiprocessing
+import pathlib
+import time
+import typing
+
 import pytest
 import sqlalchemy
 
-from clang_tidy_checker.cache_table import CacheTable
+from clang_tidy_checker.cache_backend import AsyncCacheTable
+from clang_tidy_checker.cache_model import CachedBlobModel, CacheInfoModel
+from clang_tidy_checker.cache_table import (
+    CacheTable,
+    create_cache_table_at,
+    create_engine_at,
+)
 from clang_tidy_checker.check_result import CheckResult
 
 # pylint: disable=redefined-outer-name
@@ -28,10 +41,10 @@ class TestCacheTable:
         )
 
         table.save(source_hash=source_hash, result=result)
+        assert table.load(source_hash=source_hash) == result
 
-        loaded_result = table.load(source_hash=source_hash)
-
-        assert loaded_result == result
+        table.flush()
+        assert table.load(source_hash=source_hash) == result
 
     def test_try_to_get_non_existing_result(
         self, engine_for_test: sqlalchemy.Engine
@@ -65,7 +78,274 @@ class TestCacheTable:
             exit_code=56, stdout="Sample output e.", stderr="Sample error 3."
         )
         table.save(source_hash=source_hash3, result=result3)
+        table.flush()
 
         assert table.load(source_hash=source_hash1) is None
         assert table.load(source_hash=source_hash2) == result2
         assert table.load(source_hash=source_hash3) == result3
+
+    def test_load_many_results(self, engine_for_test: sqlalchemy.Engine) -> None:
+        """Test to load multiple results at once."""
+        table = CacheTable(engine=engine_for_test, max_cache_entries=2000)
+
+        results = {
+            f"hash{i}": CheckResult(exit_code=i % 2, stdout=f"out{i}", stderr="")
+            for i in range(1200)
+        }
+        for source_hash, result in results.items():
+            table.save(source_hash=source_hash, result=result)
+        table.save(source_hash="pending", result=results["hash0"])
+
+        loaded_results = table.load_many(list(results.keys()) + ["pending", "none"])
+
+        assert loaded_results == {**results, "pending": results["hash0"]}
+
+    def test_save_same_hash_twice(self, engine_for_test: sqlalchemy.Engine) -> None:
+        """Test to save results of the same hash in different batches."""
+        table = CacheTable(
+            engine=engine_for_test, max_cache_entries=100, write_batch_size=1
+        )
+
+        result = CheckResult(exit_code=0, stdout="", stderr="")
+        table.save(source_hash="abc", result=result)
+        table.save(source_hash="abc", result=result)
+
+        assert table.load(source_hash="abc") == result
+
+    def test_remove_old_data_in_batches(
+        self, engine_for_test: sqlalchemy.Engine
+    ) -> None:
+        """Test to remove old data when writing batches."""
+        table = CacheTable(
+            engine=engine_for_test, max_cache_entries=3, write_batch_size=2
+        )
+
+        for i in range(5):
+            table.save(
+                source_hash=f"hash{i}",
+                result=CheckResult(exit_code=0, stdout=f"out{i}", stderr=""),
+            )
+        table.flush()
+
+        loaded_results = table.load_many([f"hash{i}" for i in range(5)])
+        assert sorted(loaded_results.keys()) == ["hash2", "hash3", "hash4"]
+
+    def test_compress_outputs(self, engine_for_test: sqlalchemy.Engine) -> None:
+        """Test to save compressed outputs."""
+        table = CacheTable(engine=engine_for_test, max_cache_entries=100)
+        stdout = "file.cpp:1:2: warning: sample message [sample-check]\n" * 1000
+        result = CheckResult(exit_code=1, stdout=stdout, stderr="警告\n")
+
+        table.save(source_hash="abc", result=result)
+        table.flush()
+
+        with engine_for_test.connect() as connection:
+            stored_sizes = connection.scalars(
+                sqlalchemy.select(sqlalchemy.func.length(CachedBlobModel.data))
+            ).all()
+        assert max(stored_sizes) < len(stdout) / 10
+        assert table.load(source_hash="abc") == result
+
+    def test_share_same_outputs(self, engine_for_test: sqlalchemy.Engine) -> None:
+        """Test to share the same outputs among results."""
+        table = CacheTable(engine=engine_for_test, max_cache_entries=2)
+
+        def count_blobs() -> typing.Dict[str, int]:
+            with engine_for_test.connect() as connection:
+                return dict(
+                    connection.execute(
+                        sqlalchemy.select(
+                            CachedBlobModel.blob_hash, CachedBlobModel.ref_count
+                        )
+                    ).all()
+                )
+
+        shared_result = CheckResult(exit_code=1, stdout="warning", stderr="")
+        table.save(source_hash="hash1", result=shared_result)
+        table.save(source_hash="hash2", result=shared_result)
+        table.flush()
+        assert sorted(count_blobs().values()) == [2, 2]
+        assert table.load(source_hash="hash1") == shared_result
+        assert table.load(source_hash="hash2") == shared_result
+
+        other_result = CheckResult(exit_code=0, stdout="", stderr="")
+        table.save(source_hash="hash3", result=other_result)
+        table.flush()
+        assert sorted(count_blobs().values()) == [1, 3]
+
+        table.save(source_hash="hash4", result=other_result)
+        table.flush()
+        assert sorted(count_blobs().values()) == [4]
+        assert table.load(source_hash="hash1") is None
+        assert table.load(source_hash="hash4") == other_result
+
+    def test_remove_least_recently_used_data(
+        self, engine_for_test: sqlalchemy.Engine
+    ) -> None:
+        """Test to remove least recently used data."""
+        table = CacheTable(engine=engine_for_test, max_cache_entries=2)
+        result = CheckResult(exit_code=0, stdout="", stderr="")
+
+        table.save(source_hash="hash1", result=result)
+        table.save(source_hash="hash2", result=result)
+        table.flush()
+        assert table.load(source_hash="hash1") == result
+        table.flush()
+
+        table.save(source_hash="hash3", result=result)
+        table.flush()
+        assert table.load(source_hash="hash1") == result
+        assert table.load(source_hash="hash2") is None
+        assert table.load(source_hash="hash3") == result
+
+    def test_remove_data_exceeding_max_bytes(
+        self, engine_for_test: sqlalchemy.Engine
+    ) -> None:
+        """Test to remove data when the total size exceeds the limit."""
+        table = CacheTable(
+            engine=engine_for_test, max_cache_entries=100, max_cache_bytes=950
+        )
+
+        def create_result(index: int) -> CheckResult:
+            # Random-like outputs of about 300 bytes after compression.
+            return CheckResult(
+                exit_code=1,
+                stdout="".join(
+                    hashlib.sha3_512(f"{index}-{i}".encode()).hexdigest()
+                    for i in range(4)
+                ),
+                stderr="",
+            )
+
+        for index in range(3):
+            table.save(source_hash=f"hash{index}", result=create_result(index))
+        table.flush()
+        assert all(table.load(source_hash=f"hash{i}") is not None for i in range(3))
+
+        table.save(source_hash="hash3", result=create_result(3))
+        table.flush()
+        # Removed below the low-water mark (855 bytes) at once.
+        assert table.load(source_hash="hash0") is None
+        assert table.load(source_hash="hash1") is None
+        assert table.load(source_hash="hash2") is not None
+        assert table.load(source_hash="hash3") is not None
+
+        # Statistics are loaded from the database.
+        table = CacheTable(engine=engine_for_test, max_cache_entries=1)
+        table.save(source_hash="hash4", result=create_result(4))
+        table.flush()
+        assert table.load(source_hash="hash2") is None
+        assert table.load(source_hash="hash3") is None
+        assert table.load(source_hash="hash4") is not None
+
+
+class TestAsyncCacheTable:
+    """Test of AsyncCacheTable class."""
+
+    @pytest.mark.asyncio
+    async def test_save_and_load(self, tmp_path: pathlib.Path) -> None:
+        """Test to save and load results."""
+        filepath = str(tmp_path / "cache.db")
+        table = AsyncCacheTable(create_cache_table_at(filepath, max_cache_entries=10))
+        result = CheckResult(exit_code=1, stdout="warning", stderr="")
+
+        await table.save("hash0", result)
+        assert await table.load_many(["hash0", "hash1"]) == {"hash0": result}
+        await table.close()
+
+        table = AsyncCacheTable(create_cache_table_at(filepath, max_cache_entries=10))
+        assert await table.load_many(["hash0"]) == {"hash0": result}
+        await table.close()
+
+    @pytest.mark.asyncio
+    async def test_not_block_event_loop(self, tmp_path: pathlib.Path) -> None:
+        """Test that slow operations do not block the event loop."""
+        cache_table = create_cache_table_at(
+            str(tmp_path / "cache.db"), max_cache_entries=10
+        )
+        cache_table.flush = lambda: time.sleep(0.5)  # type: ignore[method-assign]
+        table = AsyncCacheTable(cache_table)
+
+        num_ticks = 0
+
+        async def tick() -> None:
+            nonlocal num_ticks
+            while True:
+                await asyncio.sleep(0.01)
+                num_ticks += 1
+
+        tick_task = asyncio.create_task(tick())
+        await table.flush()
+        tick_task.cancel()
+
+        assert num_ticks > 10
+
+
+# Number of processes in the test of concurrent writes.
+NUM_WRITING_PROCESSES = 4
+
+# Number of results written in each process in the test of concurrent writes.
+NUM_RESULTS_PER_PROCESS = 200
+
+
+def _write_results_in_process(filepath: str, process_index: int) -> None:
+    """Write results to a database in a process."""
+    table = CacheTable(
+        engine=create_engine_at(filepath),
+        max_cache_entries=NUM_WRITING_PROCESSES * NUM_RESULTS_PER_PROCESS,
+        write_batch_size=10,
+    )
+    for index in range(NUM_RESULTS_PER_PROCESS):
+        source_hash = f"hash{process_index}-{index}"
+        table.save(
+            source_hash=source_hash,
+            result=CheckResult(exit_code=0, stdout=f"output{index % 10}", stderr=""),
+        )
+        # Loads of results written by other processes.
+        table.load(source_hash=f"hash{index % NUM_WRITING_PROCESSES}-{index}")
+    table.flush()
+
+
+def test_write_from_multiple_processes(tmp_path: pathlib.Path) -> None:
+    """Test to write results to a database from multiple processes."""
+    filepath = str(tmp_path / "cache.db")
+
+    processes = [
+        multiprocessing.Process(
+            target=_write_results_in_process, args=(filepath, index)
+        )
+        for index in range(NUM_WRITING_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+
+    num_results = NUM_WRITING_PROCESSES * NUM_RESULTS_PER_PROCESS
+    table = create_cache_table_at(filepath, max_cache_entries=num_results)
+    results = table.load_many(
+        f"hash{process_index}-{index}"
+        for process_index in range(NUM_WRITING_PROCESSES)
+        for index in range(NUM_RESULTS_PER_PROCESS)
+    )
+    assert len(results) == num_results
+
+    # Statistics and reference counts are consistent with the data.
+    with create_engine_at(filepath).connect() as connection:
+        info = dict(
+            connection.execute(
+                sqlalchemy.select(CacheInfoModel.name, CacheInfoModel.value)
+            ).all()
+        )
+        assert info["num_entries"] == num_results
+        assert info["total_bytes"] == connection.scalar(
+            sqlalchemy.select(sqlalchemy.func.sum(CachedBlobModel.size))
+        )
+        # Each result refers to stdout and stderr.
+        assert (
+            connection.scalar(
+                sqlalchemy.select(sqlalchemy.func.sum(CachedBlobModel.ref_count))
+            )
+            == 2 * num_results
+        )
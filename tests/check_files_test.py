@@ -1,12 +1,16 @@
 """Test of check_files.py.
 """
 
+import asyncio
 import copy
 import pathlib
+import typing
 
 import pytest
 
 from clang_tidy_checker.check_files import check_files
+from clang_tidy_checker.clang_tidy_executor import CheckResult, ClangTidyExecutor
+from clang_tidy_checker.command_executor import CommandExecutor, CommandResult
 from clang_tidy_checker.config import Config
 
 
@@ -62,3 +66,91 @@ async def test_check_files_error(
     result = await check_files(config=config, input_files=input_files)
 
     assert not result
+
+
+@pytest.mark.asyncio
+async def test_check_files_in_parallel(
+    default_config: Config, sample_proj_warning: pathlib.Path
+):
+    """Test of check_files with multiple jobs."""
+
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(sample_proj_warning / "build")
+    config.jobs = 2
+    input_files = [
+        str(sample_proj_warning / "src" / "sample_function.cpp"),
+        str(sample_proj_warning / "src" / "main.cpp"),
+    ]
+
+    result = await check_files(config=config, input_files=input_files)
+
+    assert not result
+
+
+@pytest.mark.asyncio
+async def test_check_files_from_largest(
+    default_config: Config,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that check_files starts checks from the largest file."""
+
+    config = copy.deepcopy(default_config)
+    config.jobs = 1
+    input_files = []
+    for name, size in [("small", 10), ("large", 1000), ("medium", 100)]:
+        path = tmp_path / f"{name}.cpp"
+        path.write_text("x" * size, encoding="utf8")
+        input_files.append(str(path))
+
+    checked_files: typing.List[str] = []
+
+    async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+        checked_files.append(input_file)
+        return CheckResult(exit_code=0, stdout="", stderr="")
+
+    monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+
+    result = await check_files(config=config, input_files=input_files)
+
+    assert result
+    assert checked_files == [input_files[1], input_files[2], input_files[0]]
+
+
+@pytest.mark.asyncio
+async def test_check_files_up_to_jobs(
+    default_config: Config,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that check_files runs clang-tidy in parallel up to the number of jobs."""
+
+    config = copy.deepcopy(default_config)
+    config.jobs = 3
+    input_files = []
+    for index in range(10):
+        path = tmp_path / f"source{index}.cpp"
+        path.write_text("", encoding="utf8")
+        input_files.append(str(path))
+
+    num_running = 0
+    peak_num_running = 0
+
+    async def execute(
+        _self: CommandExecutor, command: typing.List[str], **_kwargs: typing.Any
+    ) -> CommandResult:
+        nonlocal num_running, peak_num_running
+        num_running += 1
+        peak_num_running = max(peak_num_running, num_running)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            num_running -= 1
+        return CommandResult(exit_code=0, stdout=command[-1], stderr="")
+
+    monkeypatch.setattr(CommandExecutor, "execute", execute)
+
+    result = await check_files(config=config, input_files=input_files)
+
+    assert result
+    assert peak_num_running == config.jobs
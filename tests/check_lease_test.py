@@ -0,0 +1,119 @@
+"""Test of check_lease.py."""
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import time
+import typing
+
+import pytest
+
+from clang_tidy_checker.check_lease import LEASE_EXPIRY_SECONDS, Lease, LeaseStore
+
+
+class TestLeaseStore:
+    """Test of LeaseStore class."""
+
+    def test_acquire(self, tmp_path: pathlib.Path) -> None:
+        """Test to acquire and release leases."""
+        store = LeaseStore(str(tmp_path))
+
+        lease = store.try_acquire("key1")
+        assert lease is not None
+        assert store.try_acquire("key1") is None
+        assert store.try_acquire("key2") is not None
+
+        store.release(lease)
+        assert store.try_acquire("key1") is not None
+
+    def test_take_over_expired_lease(self, tmp_path: pathlib.Path) -> None:
+        """Test to take over a lease not renewed."""
+        store = LeaseStore(str(tmp_path))
+        lease = store.try_acquire("key")
+        assert lease is not None
+
+        past = time.time() - LEASE_EXPIRY_SECONDS - 1.0
+        os.utime(lease.path, (past, past))
+
+        assert store.try_acquire("key") is not None
+
+    def test_take_over_stale_lease_at_once(
+        self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that only one of stores taking over a stale lease at once wins."""
+        first_store = LeaseStore(str(tmp_path))
+        second_store = LeaseStore(str(tmp_path))
+        lease = first_store.try_acquire("key")
+        assert lease is not None
+        past = time.time() - LEASE_EXPIRY_SECONDS - 1.0
+        os.utime(lease.path, (past, past))
+
+        # The second store takes over the lease after the first store found it
+        # stale but before the first store takes it over.
+        is_stale = LeaseStore._is_stale  # pylint: disable=protected-access
+        second_leases: typing.List[typing.Optional[Lease]] = []
+
+        def take_over_during_check(self: LeaseStore, *args: typing.Any) -> bool:
+            result = is_stale(self, *args)
+            if self is first_store and not second_leases:
+                second_leases.append(second_store.try_acquire("key"))
+            return result
+
+        monkeypatch.setattr(LeaseStore, "_is_stale", take_over_during_check)
+
+        first_lease = first_store.try_acquire("key")
+
+        assert second_leases[0] is not None
+        assert first_lease is None
+        assert os.path.exists(second_leases[0].path)
+        assert first_store.try_acquire("key") is None
+        assert os.listdir(os.path.dirname(second_leases[0].path)) == [
+            os.path.basename(second_leases[0].path)
+        ]
+
+    def test_renew(self, tmp_path: pathlib.Path) -> None:
+        """Test to renew a lease."""
+        store = LeaseStore(str(tmp_path))
+        lease = store.try_acquire("key")
+        assert lease is not None
+
+        past = time.time() - LEASE_EXPIRY_SECONDS - 1.0
+        os.utime(lease.path, (past, past))
+        store.renew(lease)
+
+        assert store.try_acquire("key") is None
+
+    def test_take_over_lease_of_terminated_process(
+        self, tmp_path: pathlib.Path
+    ) -> None:
+        """Test to take over a lease of a terminated process."""
+        store = LeaseStore(str(tmp_path))
+        lease = store.try_acquire("key")
+        assert lease is not None
+
+        with subprocess.Popen([sys.executable, "-c", "pass"]) as process:
+            process.wait()
+        with open(lease.path, mode="r", encoding="utf8") as file:
+            holder = json.load(file)
+        holder["pid"] = process.pid
+        with open(lease.path, mode="w", encoding="utf8") as file:
+            json.dump(holder, file)
+
+        assert store.try_acquire("key") is not None
+
+    def test_waiters(self, tmp_path: pathlib.Path) -> None:
+        """Test to mark waiters of leases."""
+        store = LeaseStore(str(tmp_path))
+        lease = store.try_acquire("key")
+        assert lease is not None
+        assert not store.has_waiters(lease)
+
+        store.mark_waiting("key")
+        assert store.has_waiters(lease)
+
+        store.release(lease)
+        lease = store.try_acquire("key")
+        assert lease is not None
+        assert not store.has_waiters(lease)
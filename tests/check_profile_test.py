@@ -0,0 +1,127 @@
+"""Test of check_profile.py."""
+
+import copy
+import json
+import pathlib
+import typing
+
+import pytest
+
+from clang_tidy_checker.check_profile import (
+    CheckProfileAggregator,
+    parse_check_profile_file,
+)
+from clang_tidy_checker.clang_tidy_executor import ClangTidyExecutor
+from clang_tidy_checker.config import Config
+
+# Script of clang-tidy writing a profile like clang-tidy.
+FAKE_CLANG_TIDY = """#!/usr/bin/env python3
+import json
+import os
+import sys
+
+assert sys.argv[1] == "--enable-check-profile"
+profile_dir = sys.argv[2].split("=", 1)[1]
+input_file = sys.argv[-1]
+with open(
+    os.path.join(profile_dir, "profile-" + os.path.basename(input_file) + ".json"),
+    mode="w",
+) as file:
+    json.dump(
+        {
+            "file": input_file,
+            "timestamp": "2024-01-02 03:04:05.678901",
+            "profile": {
+                "time.clang-tidy.misc-include-cleaner.wall": 0.5,
+                "time.clang-tidy.misc-include-cleaner.user": 0.4,
+                "time.clang-tidy.bugprone-use-after-move.wall": 0.1,
+            },
+        },
+        file,
+    )
+"""
+
+
+def _write_profile(
+    path: pathlib.Path, input_file: str, times: typing.Dict[str, float]
+) -> None:
+    """Write a profile in the format of clang-tidy."""
+    profile = {f"time.clang-tidy.{check}.wall": time for check, time in times.items()}
+    profile.update(
+        {f"time.clang-tidy.{check}.user": time for check, time in times.items()}
+    )
+    path.write_text(
+        json.dumps({"file": input_file, "timestamp": "", "profile": profile}),
+        encoding="utf8",
+    )
+
+
+def test_merge_profiles(tmp_path: pathlib.Path) -> None:
+    """Test to merge profiles of files."""
+    _write_profile(tmp_path / "a.json", "a.cpp", {"check1": 1.0, "check2": 3.0})
+    _write_profile(tmp_path / "b.json", "b.cpp", {"check1": 2.0})
+    (tmp_path / "broken.json").write_text("{", encoding="utf8")
+
+    aggregator = CheckProfileAggregator()
+    aggregator.add_directory(str(tmp_path))
+
+    assert aggregator.num_files == 2
+    profiles = aggregator.ranked_profiles()
+    assert [profile.check for profile in profiles] == ["check1", "check2"]
+    assert profiles[0].total_seconds == 3.0
+    assert profiles[0].mean_seconds == 1.5
+    assert profiles[0].max_seconds == 2.0
+    assert profiles[0].slowest_file == "b.cpp"
+
+    report_path = tmp_path / "report.json"
+    aggregator.write_report(str(report_path))
+    with open(report_path, mode="r", encoding="utf8") as file:
+        report = json.load(file)
+    assert report["num_files"] == 2
+    assert report["total_seconds"] == 6.0
+    assert report["checks"][1] == {
+        "check": "check2",
+        "total_seconds": 3.0,
+        "mean_seconds": 3.0,
+        "max_seconds": 3.0,
+        "num_files": 1,
+        "slowest_file": "a.cpp",
+    }
+
+
+def test_parse_invalid_profile(tmp_path: pathlib.Path) -> None:
+    """Test to parse invalid profiles."""
+    path = tmp_path / "profile.json"
+    path.write_text('{"file": "a.cpp"}', encoding="utf8")
+
+    with pytest.raises(ValueError):
+        parse_check_profile_file(str(path))
+
+
+@pytest.mark.asyncio
+async def test_profile_checks_of_clang_tidy(
+    default_config: Config, temp_proj: pathlib.Path, tmp_path: pathlib.Path
+) -> None:
+    """Test to profile checks in executions of clang-tidy."""
+    clang_tidy_path = tmp_path / "clang-tidy"
+    clang_tidy_path.write_text(FAKE_CLANG_TIDY, encoding="utf8")
+    clang_tidy_path.chmod(0o755)
+    config = copy.deepcopy(default_config)
+    config.clang_tidy_path = str(clang_tidy_path)
+    config.build_dir = str(temp_proj / "build")
+    config.profile_checks = str(tmp_path / "profile.json")
+
+    async with ClangTidyExecutor(config=config) as executor:
+        for name in ["a", "b"]:
+            result = await executor.execute(
+                input_file=str(temp_proj / "src" / f"{name}.cpp")
+            )
+            assert result.exit_code == 0, result.stderr
+
+    with open(tmp_path / "profile.json", mode="r", encoding="utf8") as file:
+        report = json.load(file)
+    assert report["num_files"] == 2
+    assert [(check["check"], check["total_seconds"]) for check in report["checks"]] == [
+        ("misc-include-cleaner", 1.0),
+        ("bugprone-use-after-move", 0.2),
+    ]
@@ -1,18 +1,25 @@
 """Test of clang_tidy_executor.py"""
 
+import asyncio
 import copy
+import logging
 import pathlib
+import time
+import typing
 
 import approvaltests
 import approvaltests.scrubbers
 import pytest
 
+from clang_tidy_checker.check_lease import Lease, LeaseStore
 from clang_tidy_checker.clang_tidy_executor import (
     CachedClangTidyExecutor,
     CheckResult,
     ClangTidyExecutor,
 )
 from clang_tidy_checker.config import Config
+from clang_tidy_checker.file_costs import FileCostStore
+from clang_tidy_checker.run_statistics import load_run_statistics
 
 from .path_scrubber import PATH_SCRUBBER
 from .warning_count_scrubber import WARNING_COUNT_SCRUBBER
@@ -91,6 +98,29 @@ class TestClangTidyExecutor:
         check_result(input_file, result)
 
 
+@pytest.mark.asyncio
+async def test_record_costs_of_checks(
+    default_config: Config, temp_proj: pathlib.Path, tmp_path: pathlib.Path
+):
+    """Test to record costs of checks of files."""
+
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    config.clang_tidy_path = "true"
+    input_file = str(temp_proj / "src" / "a.cpp")
+    file_cost_store = FileCostStore(str(tmp_path))
+
+    async with ClangTidyExecutor(
+        config=config, file_cost_store=file_cost_store
+    ) as executor:
+        result = await executor.execute(input_file=input_file)
+
+    assert result.exit_code == 0
+    cost = file_cost_store.get(input_file)
+    assert cost is not None
+    assert cost.wall_seconds > 0.0
+
+
 class TestCachedClangTidyExecutor:
     """Test of CachedClangTidyExecutor class."""
 
@@ -138,3 +168,240 @@ class TestCachedClangTidyExecutor:
             result = await executor.execute(input_file=input_file)
 
         check_result(input_file, result)
+
+    @pytest.mark.asyncio
+    async def test_execute_clang_tidy_concurrently(
+        self, default_config_with_cache: Config, sample_proj_warning: pathlib.Path
+    ):
+        """Test of execute_clang_tidy for multiple files concurrently."""
+
+        config = copy.deepcopy(default_config_with_cache)
+        config.build_dir = str(sample_proj_warning / "build")
+        config.jobs = 1
+        config.preprocess_jobs = 2
+        input_files = [
+            str(sample_proj_warning / "src" / "sample_function.cpp"),
+            str(sample_proj_warning / "src" / "main.cpp"),
+        ]
+
+        async with CachedClangTidyExecutor(config=config) as executor:
+            results = await asyncio.gather(
+                *[executor.execute(input_file=input_file) for input_file in input_files]
+            )
+
+        assert [result.exit_code for result in results] == [1, 0]
+
+    @pytest.mark.asyncio
+    async def test_execute_clang_tidy_once_among_executors(
+        self,
+        default_config: Config,
+        temp_proj: pathlib.Path,
+        tmp_path: pathlib.Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Test that executors sharing a cache check the same file only once."""
+
+        config = copy.deepcopy(default_config)
+        config.build_dir = str(temp_proj / "build")
+        config.cache_dir = str(tmp_path / "cache")
+        input_file = str(temp_proj / "src" / "a.cpp")
+
+        num_executions = 0
+
+        async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+            nonlocal num_executions
+            num_executions += 1
+            await asyncio.sleep(1.0)
+            return CheckResult(exit_code=1, stdout=f"{input_file}: warning", stderr="")
+
+        monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+
+        async def check() -> CheckResult:
+            async with CachedClangTidyExecutor(config=config) as executor:
+                return await executor.execute(input_file=input_file)
+
+        results = await asyncio.gather(check(), check())
+
+        assert num_executions == 1
+        assert [result.exit_code for result in results] == [1, 1]
+        assert [result.stdout for result in results] == [f"{input_file}: warning"] * 2
+        run_statistics = load_run_statistics(config.cache_dir)
+        assert run_statistics is not None
+        assert run_statistics.num_hits + run_statistics.num_misses == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cache_backend", ["sqlalchemy", "sqlite3", "directory"])
+    async def test_execute_clang_tidy_once_for_same_source(
+        self,
+        default_config: Config,
+        temp_proj: pathlib.Path,
+        tmp_path: pathlib.Path,
+        monkeypatch: pytest.MonkeyPatch,
+        cache_backend: str,
+    ):
+        """Test that requests of the same source in a run check it only once."""
+
+        config = copy.deepcopy(default_config)
+        config.build_dir = str(temp_proj / "build")
+        config.cache_dir = str(tmp_path / "cache")
+        config.cache_backend = cache_backend
+        input_file = str(temp_proj / "src" / "a.cpp")
+
+        num_executions = 0
+
+        async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+            nonlocal num_executions
+            num_executions += 1
+            await asyncio.sleep(0.1)
+            return CheckResult(exit_code=1, stdout=f"{input_file}: warning", stderr="")
+
+        monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+
+        num_acquisitions = 0
+        try_acquire = LeaseStore.try_acquire
+
+        def count_acquisitions(self: LeaseStore, key: str) -> typing.Optional[Lease]:
+            nonlocal num_acquisitions
+            num_acquisitions += 1
+            return try_acquire(self, key)
+
+        monkeypatch.setattr(LeaseStore, "try_acquire", count_acquisitions)
+
+        async with CachedClangTidyExecutor(config=config) as executor:
+            results = await asyncio.gather(
+                *[executor.execute(input_file=input_file) for _ in range(3)]
+            )
+
+        assert num_executions == 1
+        assert num_acquisitions == 1
+        assert [result.stdout for result in results] == [f"{input_file}: warning"] * 3
+
+
+@pytest.mark.asyncio
+async def test_release_lease_after_renewal(
+    default_config: Config,
+    temp_proj: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that leases are released after renewals in progress finish."""
+
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    config.cache_dir = str(tmp_path / "cache")
+    input_file = str(temp_proj / "src" / "a.cpp")
+    monkeypatch.setattr(
+        "clang_tidy_checker.clang_tidy_executor.LEASE_RENEWAL_INTERVAL_SECONDS", 0.01
+    )
+    events: typing.List[str] = []
+
+    async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+        await asyncio.sleep(0.02)
+        return CheckResult(exit_code=0, stdout=input_file, stderr="")
+
+    def renew(_self: LeaseStore, _lease: Lease) -> None:
+        events.append("renewal started")
+        time.sleep(0.1)
+        events.append("renewal finished")
+
+    release = LeaseStore.release
+
+    def record_release(self: LeaseStore, lease: Lease) -> None:
+        events.append("released")
+        release(self, lease)
+
+    monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+    monkeypatch.setattr(LeaseStore, "renew", renew)
+    monkeypatch.setattr(LeaseStore, "release", record_release)
+
+    async with CachedClangTidyExecutor(config=config) as executor:
+        await executor.execute(input_file=input_file)
+
+    assert events[-1] == "released"
+    assert events.count("renewal started") == events.count("renewal finished")
+
+
+@pytest.mark.asyncio
+async def test_cancel_check_after_all_requests_cancelled(
+    default_config: Config,
+    temp_proj: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+):
+    """Test that a shared check is cancelled only when all requests are cancelled."""
+
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    config.cache_dir = str(tmp_path / "cache")
+    input_file = str(temp_proj / "src" / "a.cpp")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+        started.set()
+        try:
+            await asyncio.sleep(10.0)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return CheckResult(exit_code=0, stdout=input_file, stderr="")
+
+    monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+    caplog.set_level(logging.DEBUG)
+
+    async with CachedClangTidyExecutor(config=config) as executor:
+        requests = [
+            asyncio.create_task(executor.execute(input_file=input_file))
+            for _ in range(2)
+        ]
+        await asyncio.wait_for(started.wait(), timeout=5.0)
+        # Wait for the second request to join the check.
+        while "Reuse the check in progress" not in caplog.text:
+            await asyncio.sleep(0.01)
+
+        requests[0].cancel()
+        await asyncio.sleep(0.1)
+        assert not cancelled.is_set()
+
+        requests[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=5.0)
+        await asyncio.gather(*requests, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_stop_checks_at_exit(
+    default_config: Config,
+    temp_proj: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that checks in progress are stopped and not saved at exit."""
+
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    config.cache_dir = str(tmp_path / "cache")
+    input_file = str(temp_proj / "src" / "a.cpp")
+    started = asyncio.Event()
+    exit_codes = [-9, 0]
+
+    async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+        started.set()
+        await asyncio.sleep(0.1)
+        return CheckResult(exit_code=exit_codes.pop(0), stdout=input_file, stderr="")
+
+    monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+
+    async with CachedClangTidyExecutor(config=config) as executor:
+        request = asyncio.create_task(executor.execute(input_file=input_file))
+        await asyncio.wait_for(started.wait(), timeout=5.0)
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    assert exit_codes == [-9, 0]
+
+    # Results of killed processes are not saved.
+    async with CachedClangTidyExecutor(config=config) as executor:
+        assert (await executor.execute(input_file=input_file)).exit_code == -9
+        assert (await executor.execute(input_file=input_file)).exit_code == 0
+        assert (await executor.execute(input_file=input_file)).exit_code == 0
+    assert not exit_codes
@@ -1,10 +1,12 @@
 """Test of command_executor.py."""
 
 import asyncio
+import os
+import threading
 
 import pytest
 
-from clang_tidy_checker.command_executor import CommandExecutor
+from clang_tidy_checker.command_executor import STREAM_CHUNK_SIZE, CommandExecutor
 
 
 @pytest.mark.asyncio
@@ -28,3 +30,80 @@ async def test_kill_all_commands():
 
     result = await task
     assert result.exit_code < 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_command():
+    """Test to cancel a command."""
+    executor = CommandExecutor()
+    async with executor:
+        task = asyncio.create_task(executor.execute(["sleep", "10"]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The process is killed and is no longer tracked.
+        executor.kill_all()
+
+
+@pytest.mark.asyncio
+async def test_execute_command_streaming():
+    """Test to execute commands with streaming of standard output."""
+    chunks = []
+    executor = CommandExecutor()
+    async with executor:
+        result = await executor.execute_streaming(
+            ["sh", "-c", "head -c 1000000 /dev/zero; echo error >&2"],
+            stdout_consumer=chunks.append,
+        )
+    assert result.exit_code == 0
+    assert result.stdout == ""
+    assert result.stderr == "error\n"
+    assert sum(len(chunk) for chunk in chunks) == 1000000
+    assert max(len(chunk) for chunk in chunks) <= STREAM_CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+async def test_cancel_command_streaming():
+    """Test to cancel a command with streaming of standard output."""
+    executor = CommandExecutor()
+    async with executor:
+        task = asyncio.create_task(
+            executor.execute_streaming(["yes"], stdout_consumer=lambda chunk: None)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_measure_peak_rss():
+    """Test to measure peak memory usage of commands."""
+    executor = CommandExecutor()
+    async with executor:
+        result = await executor.execute(["sleep", "0.2"], measure_peak_rss=True)
+    assert result.exit_code == 0
+    if os.path.exists("/proc"):
+        assert result.peak_rss_bytes is not None
+        assert result.peak_rss_bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_consume_stdout_in_worker_thread():
+    """Test that consumers of standard output do not run in the event loop."""
+    thread_ids = set()
+    chunks = []
+
+    def consume(chunk: bytes) -> None:
+        thread_ids.add(threading.get_ident())
+        chunks.append(chunk)
+
+    executor = CommandExecutor()
+    async with executor:
+        result = await executor.execute_streaming(
+            ["sh", "-c", "seq 1 100000"], stdout_consumer=consume
+        )
+    assert result.exit_code == 0
+    assert threading.get_ident() not in thread_ids
+    assert b"".join(chunks).decode() == "".join(f"{i}\n" for i in range(1, 100001))
@@ -0,0 +1,91 @@
+"""Test of compile_database.py."""
+
+import pathlib
+
+import pytest
+
+from clang_tidy_checker.compile_database import (
+    CompileDatabase,
+    load_compile_database,
+    try_load_compile_database,
+)
+
+
+class TestCompileDatabase:
+    """Test of CompileDatabase class."""
+
+    def test_find_command(self) -> None:
+        """Test to find an entry with command."""
+        database = CompileDatabase(
+            [
+                {
+                    "directory": "/proj/build",
+                    "command": "/usr/bin/c++ -I/proj/include -c /proj/src/a.cpp",
+                    "file": "/proj/src/a.cpp",
+                }
+            ]
+        )
+
+        command = database.find("/proj/src/../src/a.cpp")
+
+        assert command is not None
+        assert command.directory == "/proj/build"
+        assert command.file == "/proj/src/a.cpp"
+        assert command.arguments == [
+            "/usr/bin/c++",
+            "-I/proj/include",
+            "-c",
+            "/proj/src/a.cpp",
+        ]
+
+    def test_find_arguments(self) -> None:
+        """Test to find an entry with arguments and a relative file path."""
+        database = CompileDatabase(
+            [
+                {
+                    "directory": "/proj/build",
+                    "arguments": ["/usr/bin/c++", "-c", "../src/b.cpp"],
+                    "file": "../src/b.cpp",
+                }
+            ]
+        )
+
+        command = database.find("/proj/src/b.cpp")
+
+        assert command is not None
+        assert command.file == "/proj/src/b.cpp"
+        assert command.arguments == ["/usr/bin/c++", "-c", "../src/b.cpp"]
+        assert "/proj/src/b.cpp" in database
+        assert len(database) == 1
+
+    def test_find_first_entry(self) -> None:
+        """Test to find the first entry of a file compiled multiple times."""
+        database = CompileDatabase(
+            [
+                {"directory": "/a", "command": "cc -DA -c x.c", "file": "/p/x.c"},
+                {"directory": "/b", "command": "cc -DB -c x.c", "file": "/p/x.c"},
+            ]
+        )
+
+        assert database.get("/p/x.c").directory == "/a"
+
+    def test_get_non_existing_entry(self) -> None:
+        """Test to get a non-existing entry."""
+        database = CompileDatabase([])
+
+        assert database.find("/proj/src/a.cpp") is None
+        with pytest.raises(ValueError):
+            database.get("/proj/src/a.cpp")
+
+
+def test_load_compile_database(sample_proj_no_error: pathlib.Path) -> None:
+    """Test to load compile_commands.json."""
+    database = load_compile_database(str(sample_proj_no_error / "build"))
+
+    assert str(sample_proj_no_error / "src" / "main.cpp") in database
+    assert str(sample_proj_no_error / "src" / "sample_function.cpp") in database
+
+
+def test_try_load_non_existing_compile_database(tmp_path: pathlib.Path) -> None:
+    """Test to try to load compile_commands.json not existing."""
+    assert try_load_compile_database(str(tmp_path)) is None
@@ -1,6 +1,7 @@
 """Test of config.py
 """
 
+import datetime
 import pathlib
 
 import pytest
@@ -8,6 +9,7 @@ import pytest
 from clang_tidy_checker.config import (
     DEFAULT_CHECKED_FILE_PATTERNS,
     parse_config_from_dict,
+    parse_duration,
 )
 
 
@@ -136,3 +138,150 @@ async def test_parse_config_from_dict_with_cache_dir():
     assert output.checked_file_patterns == DEFAULT_CHECKED_FILE_PATTERNS
 
     assert output.cache_dir == "cache_test"
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_jobs():
+    """Test of parse_config_from_dict with the number of jobs."""
+
+    input_config = {"jobs": 3}
+
+    output = await parse_config_from_dict(input_config)
+
+    assert output.jobs == 3
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_default_jobs():
+    """Test of parse_config_from_dict with the default number of jobs."""
+
+    input_config = {}
+
+    output = await parse_config_from_dict(input_config)
+
+    assert output.jobs >= 1
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_invalid_jobs():
+    """Test of parse_config_from_dict with an invalid number of jobs."""
+
+    input_config = {"jobs": 0}
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict(input_config)
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_preprocess_jobs():
+    """Test of parse_config_from_dict with the number of preprocessing jobs."""
+
+    output = await parse_config_from_dict({"jobs": 3})
+    assert output.preprocess_jobs == 3
+
+    output = await parse_config_from_dict({"jobs": 3, "preprocess_jobs": 2})
+    assert output.preprocess_jobs == 2
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict({"preprocess_jobs": 0})
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_hash_method():
+    """Test of parse_config_from_dict with the method to calculate hashes."""
+
+    output = await parse_config_from_dict({})
+    assert output.hash_method == "preprocess"
+
+    output = await parse_config_from_dict({"hash_method": "dependencies"})
+    assert output.hash_method == "dependencies"
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict({"hash_method": "invalid"})
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_max_cache_bytes():
+    """Test of parse_config_from_dict with the maximum size of the cache."""
+
+    output = await parse_config_from_dict({})
+    assert output.max_cache_bytes is None
+
+    output = await parse_config_from_dict({"max_cache_bytes": 1000})
+    assert output.max_cache_bytes == 1000
+
+    output = await parse_config_from_dict({"max_cache_bytes": "2M"})
+    assert output.max_cache_bytes == 2 * 1024 * 1024
+
+    output = await parse_config_from_dict({"max_cache_bytes": "1.5GB"})
+    assert output.max_cache_bytes == int(1.5 * 1024 * 1024 * 1024)
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict({"max_cache_bytes": "0"})
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict({"max_cache_bytes": "abc"})
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_cache_backend():
+    """Test of parse_config_from_dict with the backend of caches."""
+
+    output = await parse_config_from_dict({})
+    assert output.cache_backend == "sqlalchemy"
+
+    output = await parse_config_from_dict({"cache_backend": "sqlite3"})
+    assert output.cache_backend == "sqlite3"
+
+    output = await parse_config_from_dict({"cache_backend": "directory"})
+    assert output.cache_backend == "directory"
+
+    with pytest.raises(ValueError):
+        await parse_config_from_dict({"cache_backend": "invalid"})
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_remote_cache_url():
+    """Test of parse_config_from_dict with the URL of the remote cache."""
+
+    output = await parse_config_from_dict({})
+    assert output.remote_cache_url is None
+
+    output = await parse_config_from_dict(
+        {"remote_cache_url": "http://localhost:8080/cache"}
+    )
+    assert output.remote_cache_url == "http://localhost:8080/cache"
+
+
+@pytest.mark.asyncio
+async def test_parse_config_from_dict_with_profile_checks():
+    """Test of parse_config_from_dict with the file of profiles of checks."""
+
+    output = await parse_config_from_dict({})
+    assert output.profile_checks is None
+
+    output = await parse_config_from_dict({"profile_checks": "profile.json"})
+    assert output.profile_checks == "profile.json"
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("30", datetime.timedelta(seconds=30)),
+        ("15m", datetime.timedelta(minutes=15)),
+        ("12H", datetime.timedelta(hours=12)),
+        ("1.5d", datetime.timedelta(days=1.5)),
+    ],
+)
+def test_parse_duration(value: str, expected: datetime.timedelta):
+    """Test of parse_duration."""
+
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "-1d", "abc", "1w"])
+def test_parse_duration_invalid(value: str):
+    """Test of parse_duration with invalid values."""
+
+    with pytest.raises(ValueError):
+        parse_duration(value)
@@ -2,6 +2,7 @@
 """
 
 import asyncio
+import json
 import pathlib
 import subprocess
 
@@ -107,3 +108,44 @@ def default_config_with_cache() -> Config:
     cache_path = THIS_DIR.parent / ".clang-tidy-cache"
     config.cache_dir = str(cache_path)
     return config
+
+
+@pytest.fixture
+def temp_proj(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Fixture of a temporary project with compile_commands.json.
+
+    The project has source files ``src/a.cpp`` and ``src/b.cpp``
+    including ``include/header.h``.
+
+    Returns:
+        pathlib.Path: Source directory.
+    """
+
+    source_dir = tmp_path / "proj"
+    (source_dir / "include").mkdir(parents=True)
+    (source_dir / "src").mkdir()
+    (source_dir / "build").mkdir()
+    (source_dir / "include" / "header.h").write_text(
+        "#pragma once\n\nint value();\n", encoding="utf8"
+    )
+    compile_commands = []
+    for name in ["a", "b"]:
+        source = source_dir / "src" / f"{name}.cpp"
+        source.write_text(
+            f'#include "header.h"\n\nint {name}() {{ return value(); }}\n',
+            encoding="utf8",
+        )
+        compile_commands.append(
+            {
+                "directory": str(source_dir / "build"),
+                "command": (
+                    f"c++ -I{source_dir / 'include'} -MD -MF {name}.d "
+                    f"-o {name}.o -c {source}"
+                ),
+                "file": str(source),
+            }
+        )
+    (source_dir / "build" / "compile_commands.json").write_text(
+        json.dumps(compile_commands), encoding="utf8"
+    )
+    return source_dir
@@ -0,0 +1,173 @@
+"""Test of direct_mode.py."""
+
+import copy
+import os
+import pathlib
+
+from clang_tidy_checker.compile_database import CompileCommand
+from clang_tidy_checker.config import Config
+from clang_tidy_checker.direct_mode import (
+    DependencyChecker,
+    Manifest,
+    ManifestStore,
+    calculate_hash_of_file,
+    calculate_manifest_key,
+    get_compiler_state,
+    parse_dependency_file,
+)
+
+
+def test_parse_dependency_file() -> None:
+    """Test to parse a dependency file."""
+    contents = (
+        "a.o: /proj/src/a.cpp /proj/include/header.h \\\n"
+        "  /proj/include/with\\ space.h ../relative.h\n"
+    )
+
+    assert parse_dependency_file(contents) == [
+        "/proj/src/a.cpp",
+        "/proj/include/header.h",
+        "/proj/include/with space.h",
+        "../relative.h",
+    ]
+
+
+def test_parse_dependency_file_with_multiple_rules() -> None:
+    """Test to parse a dependency file with multiple rules."""
+    contents = "a.o : a.cpp a.h\nb.o: a$$b.h\n\na.h:\n"
+
+    assert parse_dependency_file(contents) == ["a.cpp", "a.h", "a$b.h"]
+
+
+class TestDependencyChecker:
+    """Test of DependencyChecker class."""
+
+    def test_check_dependencies(self, tmp_path: pathlib.Path) -> None:
+        """Test to check dependencies."""
+        header = tmp_path / "header.h"
+        header.write_text("int value();\n", encoding="utf8")
+        checker = DependencyChecker()
+
+        manifest = checker.create_manifest(
+            source_hash="abc",
+            dependency_paths=["header.h", "header.h"],
+            directory=str(tmp_path),
+            start_time_ns=os.stat(header).st_mtime_ns + 1,
+        )
+        assert manifest is not None
+        assert len(manifest.dependencies) == 1
+        assert manifest.dependencies[0].path == str(header)
+        assert checker.is_up_to_date(manifest)
+
+        # Touched without changes.
+        os.utime(header, ns=(0, 0))
+        assert DependencyChecker().is_up_to_date(manifest)
+
+        header.write_text("int value(int);\n", encoding="utf8")
+        assert not DependencyChecker().is_up_to_date(manifest)
+
+        header.unlink()
+        assert not DependencyChecker().is_up_to_date(manifest)
+
+    def test_hash_of_dependencies_with_compilers(self, tmp_path: pathlib.Path) -> None:
+        """Test that hashes depend on contents of compilers but not on paths."""
+        header = tmp_path / "header.h"
+        header.write_text("int value();\n", encoding="utf8")
+        hashes = []
+        for index, contents in enumerate(["clang 17", "clang 17", "clang 18"]):
+            compiler = tmp_path / f"install{index}" / "clang++"
+            compiler.parent.mkdir()
+            compiler.write_text(contents, encoding="utf8")
+            os.utime(compiler, ns=(index, index))
+            hashes.append(
+                DependencyChecker().calculate_hash_of_dependencies(
+                    args=["-c", "a.cpp"],
+                    compiler=str(compiler),
+                    dependency_paths=["header.h"],
+                    directory=str(tmp_path),
+                )
+            )
+
+        assert hashes[0] == hashes[1]
+        assert hashes[0] != hashes[2]
+
+    def test_skip_too_new_dependencies(self, tmp_path: pathlib.Path) -> None:
+        """Test to skip creation of manifests with too new dependencies."""
+        header = tmp_path / "header.h"
+        header.write_text("int value();\n", encoding="utf8")
+
+        manifest = DependencyChecker().create_manifest(
+            source_hash="abc",
+            dependency_paths=[str(header)],
+            directory=str(tmp_path),
+            start_time_ns=os.stat(header).st_mtime_ns,
+        )
+
+        assert manifest is None
+
+
+class TestManifestStore:
+    """Test of ManifestStore class."""
+
+    def test_save_and_load(self, tmp_path: pathlib.Path) -> None:
+        """Test to save and load a manifest."""
+        header = tmp_path / "header.h"
+        header.write_text("int value();\n", encoding="utf8")
+        store = ManifestStore(str(tmp_path / "manifests"))
+        manifest = Manifest(
+            source_hash="abc",
+            dependencies=[DependencyChecker().get_state(str(header))],
+        )
+
+        assert store.load("0123") is None
+        store.save("0123", manifest)
+
+        assert store.load("0123") == manifest
+        assert manifest.dependencies[0].content_hash == calculate_hash_of_file(
+            str(header)
+        )
+
+    def test_load_broken_manifest(self, tmp_path: pathlib.Path) -> None:
+        """Test to load a broken manifest."""
+        store = ManifestStore(str(tmp_path))
+        (tmp_path / "01").mkdir()
+        (tmp_path / "01" / "23.json").write_text("{", encoding="utf8")
+
+        assert store.load("0123") is None
+
+
+def test_manifest_key_depends_on_hash_rules(default_config: Config) -> None:
+    """Test that keys of manifests change with rules to calculate hashes."""
+    compile_command = CompileCommand(
+        directory="/build", file="/src/a.cpp", arguments=["c++", "-c", "a.cpp"]
+    )
+    keys = set()
+    for hash_method in ["preprocess", "dependencies"]:
+        for relocatable_cache in [False, True]:
+            config = copy.deepcopy(default_config)
+            config.hash_method = hash_method
+            config.relocatable_cache = relocatable_cache
+            keys.add(calculate_manifest_key(compile_command, config))
+    config = copy.deepcopy(default_config)
+    config.relocatable_cache = True
+    config.source_root = "/other"
+    keys.add(calculate_manifest_key(compile_command, config))
+
+    assert len(keys) == 5
+
+
+def test_compiler_state_of_relative_path(tmp_path: pathlib.Path) -> None:
+    """Test to find compilers at paths relative to directories of commands."""
+    compiler = tmp_path / "toolchain" / "bin" / "clang++"
+    compiler.parent.mkdir(parents=True)
+    compiler.write_text("#!/bin/sh\n", encoding="utf8")
+    compiler.chmod(0o755)
+    compile_command = CompileCommand(
+        directory=str(tmp_path),
+        file=str(tmp_path / "a.cpp"),
+        arguments=["./toolchain/bin/clang++", "-c", "a.cpp"],
+    )
+
+    state = get_compiler_state(compile_command)
+
+    assert state[0] == str(compiler)
@@ -0,0 +1,226 @@
+"""Test of directory_cache_table.py."""
+
+import datetime
+import hashlib
+import os
+import pathlib
+import time
+
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.directory_cache_table import (
+    BLOBS_DIR_NAME,
+    RESULTS_DIR_NAME,
+    TEMP_FILE_PREFIX,
+    UNREFERENCED_FILE_GRACE_SECONDS,
+    DirectoryCacheTable,
+)
+
+
+def _create_result(index: int) -> CheckResult:
+    """Create a result with random-like outputs of about 300 bytes compressed."""
+    stdout = "".join(
+        hashlib.sha3_512(f"{index}-{i}".encode()).hexdigest() for i in range(4)
+    )
+    return CheckResult(exit_code=1, stdout=stdout, stderr="")
+
+
+def _list_files(directory: pathlib.Path) -> list:
+    """List files in a directory recursively."""
+    return [path for path in directory.glob("**/*") if path.is_file()]
+
+
+def _make_old(directory: pathlib.Path, source_hash: str, days: int) -> None:
+    """Set the time of the last use of a result to days ago."""
+    name = hashlib.sha3_256(source_hash.encode("utf8")).hexdigest()
+    path = directory / RESULTS_DIR_NAME / name[:2] / name[2:]
+    used_at = (datetime.datetime.now() - datetime.timedelta(days=days)).timestamp()
+    os.utime(path, (used_at, used_at))
+
+
+def _make_outputs_old(directory: pathlib.Path) -> None:
+    """Set times of outputs to before the grace period of unreferenced outputs."""
+    written_at = time.time() - UNREFERENCED_FILE_GRACE_SECONDS - 1.0
+    for path in _list_files(directory / BLOBS_DIR_NAME):
+        os.utime(path, (written_at, written_at))
+
+
+def _use_in_order(table: DirectoryCacheTable, num_entries: int) -> None:
+    """Load entries one by one to make times of last uses in the order."""
+    for index in range(num_entries):
+        assert table.load(source_hash=f"hash{index}") is not None
+    table.flush()
+
+
+class TestDirectoryCacheTable:
+    """Test of DirectoryCacheTable class."""
+
+    def test_save_result(self, tmp_path: pathlib.Path) -> None:
+        """Test to save a result."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        result = CheckResult(exit_code=12, stdout="Sample output.", stderr="警告")
+
+        table.save(source_hash="abc/def+", result=result)
+        assert table.load(source_hash="abc/def+") == result
+        table.flush()
+
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        assert table.load(source_hash="abc/def+") == result
+        assert table.load(source_hash="abc") is None
+
+        files = _list_files(tmp_path)
+        assert len(files) == 3
+        assert all(not path.name.startswith(TEMP_FILE_PREFIX) for path in files)
+        assert all(len(path.parent.name) == 2 for path in files)
+
+    def test_share_same_outputs(self, tmp_path: pathlib.Path) -> None:
+        """Test to share the same outputs among results."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        result = CheckResult(exit_code=1, stdout="warning", stderr="")
+
+        table.save(source_hash="hash1", result=result)
+        table.flush()
+        table.save(source_hash="hash2", result=result)
+        table.flush()
+
+        assert len(_list_files(tmp_path / RESULTS_DIR_NAME)) == 2
+        assert len(_list_files(tmp_path / BLOBS_DIR_NAME)) == 2
+        assert table.load_many(["hash1", "hash2"]) == {
+            "hash1": result,
+            "hash2": result,
+        }
+
+    def test_remove_least_recently_used_data(self, tmp_path: pathlib.Path) -> None:
+        """Test to remove least recently used data."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=10)
+        for index in range(10):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        _use_in_order(table, 10)
+        assert table.load(source_hash="hash0") is not None
+        table.flush()
+        _make_outputs_old(tmp_path)
+
+        table.save(source_hash="hash10", result=_create_result(10))
+        table.flush()
+
+        # Removed below the low-water mark (9 entries) at once.
+        loaded_results = table.load_many([f"hash{i}" for i in range(11)])
+        assert sorted(loaded_results.keys(), key=lambda key: int(key[4:])) == [
+            "hash0",
+            *[f"hash{i}" for i in range(3, 11)],
+        ]
+        assert len(_list_files(tmp_path / RESULTS_DIR_NAME)) == 9
+        assert len(_list_files(tmp_path / BLOBS_DIR_NAME)) == 10
+
+    def test_remove_data_exceeding_max_bytes(self, tmp_path: pathlib.Path) -> None:
+        """Test to remove data when the total size exceeds the limit."""
+        table = DirectoryCacheTable(
+            str(tmp_path), max_cache_entries=100, max_cache_bytes=950
+        )
+        for index in range(3):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        _use_in_order(table, 3)
+
+        # Statistics are estimated from files in the directory.
+        table = DirectoryCacheTable(
+            str(tmp_path), max_cache_entries=100, max_cache_bytes=950
+        )
+        table.save(source_hash="hash3", result=_create_result(3))
+        table.flush()
+
+        loaded_results = table.load_many([f"hash{i}" for i in range(4)])
+        assert sorted(loaded_results.keys()) == ["hash2", "hash3"]
+
+    def test_ignore_removed_outputs(self, tmp_path: pathlib.Path) -> None:
+        """Test to ignore results whose outputs are removed by other processes."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        table.save(source_hash="abc", result=_create_result(0))
+        table.flush()
+
+        for path in _list_files(tmp_path / BLOBS_DIR_NAME):
+            path.unlink()
+
+        assert table.load(source_hash="abc") is None
+
+    def test_rewrite_result_of_removed_outputs(self, tmp_path: pathlib.Path) -> None:
+        """Test to rewrite results whose outputs are removed by other processes."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        result = _create_result(0)
+        table.save(source_hash="abc", result=result)
+        table.flush()
+        for path in _list_files(tmp_path / BLOBS_DIR_NAME):
+            path.unlink()
+
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        table.save(source_hash="abc", result=result)
+        table.flush()
+
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        assert table.load(source_hash="abc") == result
+
+    def test_keep_new_outputs_of_removed_entries(self, tmp_path: pathlib.Path) -> None:
+        """Test to keep new outputs which other processes may refer to."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        table.save(source_hash="abc", result=_create_result(0))
+        table.flush()
+
+        assert table.prune(max_entries=0).num_removed_entries == 1
+        assert len(_list_files(tmp_path / BLOBS_DIR_NAME)) == 2
+
+        # Another process saves a result referring to the same outputs.
+        table.save(source_hash="def", result=_create_result(0))
+        table.flush()
+        assert table.load(source_hash="def") == _create_result(0)
+
+        _make_outputs_old(tmp_path)
+        table.prune(max_entries=0)
+        assert not _list_files(tmp_path / BLOBS_DIR_NAME)
+
+    def test_maintenance(self, tmp_path: pathlib.Path) -> None:
+        """Test of statistics, removal, and compaction of entries."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        for index in range(5):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        for index, days in enumerate([20, 10, 5]):
+            _make_old(tmp_path, f"hash{index}", days=days)
+
+        statistics = table.get_statistics([datetime.timedelta(days=7)])
+        assert statistics.num_entries == 5
+        assert statistics.age_counts == [3, 2]
+
+        result = table.prune(max_age=datetime.timedelta(days=7))
+        assert result.num_removed_entries == 2
+        result = table.prune(max_entries=2)
+        assert result.num_removed_entries == 1
+        assert sorted(table.load_many([f"hash{i}" for i in range(5)])) == [
+            "hash3",
+            "hash4",
+        ]
+
+        _make_outputs_old(tmp_path)
+        table.prune(max_entries=0)
+        table.compact()
+        assert not list(tmp_path.glob(f"{RESULTS_DIR_NAME}/*"))
+        assert not list(tmp_path.glob(f"{BLOBS_DIR_NAME}/*"))
+
+    def test_verify(self, tmp_path: pathlib.Path) -> None:
+        """Test to find broken files."""
+        table = DirectoryCacheTable(str(tmp_path), max_cache_entries=100)
+        for index in range(3):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        assert not table.verify()
+
+        result_files = sorted(_list_files(tmp_path / RESULTS_DIR_NAME))
+        result_files[0].write_text("{}", encoding="utf8")
+        blob_files = sorted(_list_files(tmp_path / BLOBS_DIR_NAME))
+        blob_files[0].write_bytes(b"broken")
+        blob_files[1].unlink()
+
+        assert sorted(table.verify()) == [
+            "1 outputs are broken.",
+            "1 results are broken.",
+            "2 results refer to missing outputs.",
+        ]
@@ -0,0 +1,74 @@
+"""Test of file_costs.py."""
+
+import pathlib
+import typing
+
+from clang_tidy_checker.file_costs import (
+    FILE_COSTS_FILE_NAME,
+    FileCost,
+    FileCostStore,
+    order_by_cost,
+)
+
+
+def _create_files(directory: pathlib.Path, sizes: typing.List[int]) -> typing.List[str]:
+    """Create files of sizes."""
+    files = []
+    for index, size in enumerate(sizes):
+        path = directory / f"file{index}.cpp"
+        path.write_bytes(b"x" * size)
+        files.append(str(path))
+    return files
+
+
+def test_order_by_size_without_costs(tmp_path: pathlib.Path) -> None:
+    """Test to order files by sizes when no cost is recorded."""
+    files = _create_files(tmp_path, [10, 30, 20, 30])
+    files.append(str(tmp_path / "missing.cpp"))
+
+    assert order_by_cost(files, {}) == [1, 3, 2, 0, 4]
+
+
+def test_order_by_cost(tmp_path: pathlib.Path) -> None:
+    """Test to order files by recorded costs and estimates from sizes."""
+    files = _create_files(tmp_path, [100, 100, 300, 50])
+    costs = {
+        files[0]: FileCost(wall_seconds=1.0),
+        files[1]: FileCost(wall_seconds=5.0),
+    }
+
+    # Unrecorded files are estimated with 0.03 seconds per byte.
+    assert order_by_cost(files, costs) == [2, 1, 3, 0]
+
+
+def test_record_and_save(tmp_path: pathlib.Path) -> None:
+    """Test to record, save, and load costs."""
+    files = _create_files(tmp_path, [10, 20])
+    store = FileCostStore(str(tmp_path))
+    store.record(files[0], wall_seconds=2.0, peak_rss_bytes=1024)
+    store.record(files[0], wall_seconds=4.0, peak_rss_bytes=2048)
+    store.record(str(tmp_path / "removed.cpp"), wall_seconds=1.0)
+    store.save()
+
+    # Another process records another file.
+    other_store = FileCostStore(str(tmp_path))
+    other_store.record(files[1], wall_seconds=1.0)
+    other_store.save()
+
+    loaded = FileCostStore(str(tmp_path))
+    cost = loaded.get(files[0])
+    assert cost is not None
+    assert cost.wall_seconds == 3.0
+    assert cost.peak_rss_bytes == 2048
+    assert loaded.get(files[1]) is not None
+    assert loaded.get(str(tmp_path / "removed.cpp")) is None
+    assert loaded.order(files) == [0, 1]
+
+
+def test_load_broken_file(tmp_path: pathlib.Path) -> None:
+    """Test to ignore broken files of costs."""
+    (tmp_path / FILE_COSTS_FILE_NAME).write_text("[]", encoding="utf8")
+
+    store = FileCostStore(str(tmp_path))
+
+    assert store.get("a.cpp") is None
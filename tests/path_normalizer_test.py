@@ -0,0 +1,70 @@
+"""Test of path_normalizer.py."""
+
+import typing
+
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.path_normalizer import (
+    BUILD_DIR_PLACEHOLDER,
+    SOURCE_ROOT_PLACEHOLDER,
+    PathNormalizer,
+    StreamNormalizer,
+)
+
+
+class TestPathNormalizer:
+    """Test of PathNormalizer class."""
+
+    def test_normalize(self) -> None:
+        """Test to normalize texts."""
+        normalizer = PathNormalizer(source_root="/ws/proj", build_dir="/ws/proj/build")
+
+        assert normalizer.normalize(
+            '# 1 "/ws/proj/src/a.cpp"\n# 1 "/ws/proj/build/gen.h"\n'
+        ) == (
+            f'# 1 "{SOURCE_ROOT_PLACEHOLDER}/src/a.cpp"\n'
+            f'# 1 "{BUILD_DIR_PLACEHOLDER}/gen.h"\n'
+        )
+        assert normalizer.normalize("/ws/proj2/a.cpp") == "/ws/proj2/a.cpp"
+        assert (
+            normalizer.normalize_bytes(b"/ws/proj/a.cpp:1:2")
+            == f"{SOURCE_ROOT_PLACEHOLDER}/a.cpp:1:2".encode()
+        )
+
+    def test_restore_result(self) -> None:
+        """Test to restore paths in results."""
+        normalizer = PathNormalizer(source_root="/ws/proj", build_dir="/ws/proj/build")
+        result = CheckResult(
+            exit_code=1,
+            stdout="/ws/proj/src/a.cpp:1:2: warning: test",
+            stderr="1 warning generated.",
+        )
+
+        normalized_result = normalizer.normalize_result(result)
+        assert "/ws/proj" not in normalized_result.stdout
+
+        other_normalizer = PathNormalizer(
+            source_root="/other/proj", build_dir="/other/build"
+        )
+        restored_result = other_normalizer.restore_result(normalized_result)
+        assert restored_result == CheckResult(
+            exit_code=1,
+            stdout="/other/proj/src/a.cpp:1:2: warning: test",
+            stderr="1 warning generated.",
+        )
+
+
+def test_stream_normalizer() -> None:
+    """Test to normalize streams split in the middle of paths."""
+    normalizer = PathNormalizer(source_root="/ws/proj", build_dir="/ws/proj/build")
+    chunks: typing.List[bytes] = []
+    stream_normalizer = StreamNormalizer(normalizer, chunks.append)
+
+    stream_normalizer(b'# 1 "/ws/pr')
+    stream_normalizer(b'oj/a.cpp"\nint x;\n/ws/')
+    stream_normalizer(b"proj")
+    stream_normalizer.flush()
+
+    expected = (
+        f'# 1 "{SOURCE_ROOT_PLACEHOLDER}/a.cpp"\nint x;\n{SOURCE_ROOT_PLACEHOLDER}'
+    )
+    assert b"".join(chunks) == expected.encode()
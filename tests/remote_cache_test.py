@@ -0,0 +1,255 @@
+"""Test of remote_cache.py."""
+
+import asyncio
+import copy
+import http.server
+import pathlib
+import socket
+import threading
+import typing
+
+import pytest
+
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.clang_tidy_executor import (
+    CachedClangTidyExecutor,
+    ClangTidyExecutor,
+)
+from clang_tidy_checker.config import Config
+from clang_tidy_checker.remote_cache import AsyncTieredCacheTable, RemoteCache
+from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+
+class StandInCacheServer(http.server.ThreadingHTTPServer):
+    """Stand-in server of remote caches saving entries in memory."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StandInCacheHandler)
+        self.entries: typing.Dict[str, bytes] = {}
+        self.requests: typing.List[typing.Tuple[str, str]] = []
+        self.client_ports: typing.Set[int] = set()
+        self.error_status: typing.Optional[int] = None
+        self.lock = threading.Lock()
+        # Responses of GET are held while this is cleared.
+        self.get_released = threading.Event()
+        self.get_released.set()
+
+    @property
+    def url(self) -> str:
+        """URL of the cache."""
+        return f"http://127.0.0.1:{self.server_address[1]}/cache"
+
+
+class StandInCacheHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of requests to the stand-in server."""
+
+    protocol_version = "HTTP/1.1"
+    server: StandInCacheServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Get an entry."""
+        if not self._record("GET"):
+            return
+        self.server.get_released.wait()
+        with self.server.lock:
+            body = self.server.entries.get(self.path)
+        if body is None:
+            self._respond(404)
+        else:
+            self._respond(200, body)
+
+    def do_PUT(self) -> None:  # pylint: disable=invalid-name
+        """Save an entry."""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if not self._record("PUT"):
+            return
+        with self.server.lock:
+            self.server.entries[self.path] = body
+        self._respond(204)
+
+    def log_message(self, *args: typing.Any) -> None:
+        """Suppress logs."""
+
+    def _record(self, method: str) -> bool:
+        with self.server.lock:
+            self.server.requests.append((method, self.path))
+            self.server.client_ports.add(self.client_address[1])
+            error_status = self.server.error_status
+        if error_status is not None:
+            self._respond(error_status)
+            return False
+        return True
+
+    def _respond(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(name="cache_server")
+def fixture_cache_server() -> typing.Iterator[StandInCacheServer]:
+    """Fixture of a stand-in server of remote caches."""
+    server = StandInCacheServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _unused_url() -> str:
+    """Get a URL of a port on which no server listens."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/cache"
+
+
+def _create_table(path: pathlib.Path, url: str) -> AsyncTieredCacheTable:
+    """Create a table with a local cache at a path."""
+    local_table = SqliteCacheTable(str(path), max_cache_entries=100)
+    return AsyncTieredCacheTable(local_table, RemoteCache(url, max_connections=4))
+
+
+class TestAsyncTieredCacheTable:
+    """Test of AsyncTieredCacheTable class."""
+
+    @pytest.mark.asyncio
+    async def test_share_results_via_remote(
+        self, tmp_path: pathlib.Path, cache_server: StandInCacheServer
+    ) -> None:
+        """Test to share results among local caches via the remote cache."""
+        result = CheckResult(exit_code=1, stdout="warning", stderr="警告")
+
+        table = _create_table(tmp_path / "first.db", cache_server.url)
+        await table.save(source_hash="abc/def+", result=result)
+        await table.close()
+        assert len(cache_server.entries) == 1
+
+        table = _create_table(tmp_path / "second.db", cache_server.url)
+        assert await table.load_many(["abc/def+", "abc"]) == {"abc/def+": result}
+        await table.close()
+
+        # Results found in the remote cache are saved in the local cache.
+        cache_server.error_status = 500
+        table = _create_table(tmp_path / "second.db", cache_server.url)
+        assert await table.load_many(["abc/def+"]) == {"abc/def+": result}
+        await table.close()
+
+    @pytest.mark.asyncio
+    async def test_pool_connections(
+        self, tmp_path: pathlib.Path, cache_server: StandInCacheServer
+    ) -> None:
+        """Test to send requests in parallel using a pool of connections."""
+        table = _create_table(tmp_path / "cache.db", cache_server.url)
+        for index in range(20):
+            await table.save(
+                f"hash{index}", CheckResult(exit_code=index, stdout="", stderr="")
+            )
+        await table.close()
+
+        table = _create_table(tmp_path / "another.db", cache_server.url)
+        results = await table.load_many([f"hash{index}" for index in range(40)])
+        await table.close()
+
+        assert sorted(result.exit_code for result in results.values()) == list(
+            range(20)
+        )
+        assert len(cache_server.requests) == 60
+        assert len(cache_server.client_ports) <= 8
+
+    @pytest.mark.asyncio
+    async def test_use_local_cache_without_server(self, tmp_path: pathlib.Path) -> None:
+        """Test to use only the local cache when the server is unavailable."""
+        result = CheckResult(exit_code=0, stdout="", stderr="")
+
+        table = _create_table(tmp_path / "cache.db", _unused_url())
+        await table.save(source_hash="abc", result=result)
+        assert not await table.load_many(["def"])
+        await table.close()
+
+        table = _create_table(tmp_path / "cache.db", _unused_url())
+        assert await table.load_many(["abc"]) == {"abc": result}
+        await table.close()
+
+    @pytest.mark.asyncio
+    async def test_disable_remote_after_errors(
+        self, tmp_path: pathlib.Path, cache_server: StandInCacheServer
+    ) -> None:
+        """Test to stop requests to the remote cache after an error."""
+        cache_server.error_status = 503
+        table = _create_table(tmp_path / "cache.db", cache_server.url)
+        results: typing.List[typing.Dict[str, CheckResult]] = []
+        for index in range(3):
+            results.append(await table.load_many([f"hash{index}"]))
+            await table.save(
+                f"hash{index}", CheckResult(exit_code=0, stdout="", stderr="")
+            )
+        await table.close()
+
+        assert results == [{}] * 3
+        assert cache_server.requests == [("GET", cache_server.requests[0][1])]
+
+    @pytest.mark.asyncio
+    async def test_load_local_during_remote_lookup(
+        self, tmp_path: pathlib.Path, cache_server: StandInCacheServer
+    ) -> None:
+        """Test that lookups of the local cache do not wait for the remote cache."""
+        result = CheckResult(exit_code=0, stdout="local", stderr="")
+        table = _create_table(tmp_path / "cache.db", cache_server.url)
+        await table.save(source_hash="local", result=result)
+
+        cache_server.get_released.clear()
+        try:
+            remote_lookup = asyncio.ensure_future(table.load_many(["remote"]))
+            while not any(method == "GET" for method, _ in cache_server.requests):
+                await asyncio.sleep(0.01)
+
+            assert await asyncio.wait_for(table.load_many(["local"]), timeout=5.0) == {
+                "local": result
+            }
+            assert not remote_lookup.done()
+        finally:
+            cache_server.get_released.set()
+        assert await remote_lookup == {}
+        await table.close()
+
+
+def test_invalid_url() -> None:
+    """Test of invalid URLs."""
+    with pytest.raises(ValueError):
+        RemoteCache("ftp://localhost/cache")
+
+
+@pytest.mark.asyncio
+async def test_skip_checks_found_in_remote(
+    default_config: Config,
+    temp_proj: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    cache_server: StandInCacheServer,
+) -> None:
+    """Test to skip checks of results found in the remote cache."""
+    input_file = str(temp_proj / "src" / "a.cpp")
+    checked_files: typing.List[str] = []
+
+    async def execute(_self: ClangTidyExecutor, input_file: str) -> CheckResult:
+        checked_files.append(input_file)
+        return CheckResult(exit_code=1, stdout="remote warning", stderr="")
+
+    monkeypatch.setattr(ClangTidyExecutor, "execute", execute)
+
+    results: typing.List[CheckResult] = []
+    for machine in ("first", "second"):
+        config = copy.deepcopy(default_config)
+        config.build_dir = str(temp_proj / "build")
+        config.cache_dir = str(tmp_path / machine)
+        config.cache_backend = "directory"
+        config.remote_cache_url = cache_server.url
+        async with CachedClangTidyExecutor(config=config) as executor:
+            results.append(await executor.execute(input_file=input_file))
+
+    assert checked_files == [input_file]
+    assert [result.stdout for result in results] == ["remote warning"] * 2
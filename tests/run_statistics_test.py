@@ -0,0 +1,37 @@
+"""Test of run_statistics.py."""
+
+import datetime
+import pathlib
+
+from clang_tidy_checker.run_statistics import (
+    RUN_STATISTICS_FILE_NAME,
+    RunStatistics,
+    load_run_statistics,
+    save_run_statistics,
+)
+
+
+def test_save_and_load(tmp_path: pathlib.Path) -> None:
+    """Test to save and load statistics."""
+    statistics = RunStatistics(
+        num_hits=3, num_misses=1, finished_at=datetime.datetime(2024, 1, 2, 3, 4, 5)
+    )
+
+    save_run_statistics(str(tmp_path), statistics)
+
+    assert load_run_statistics(str(tmp_path)) == statistics
+    assert statistics.hit_rate == 0.75
+    assert [path.name for path in tmp_path.iterdir()] == [RUN_STATISTICS_FILE_NAME]
+
+
+def test_load_missing_or_broken(tmp_path: pathlib.Path) -> None:
+    """Test to load statistics not saved correctly."""
+    assert load_run_statistics(str(tmp_path)) is None
+
+    (tmp_path / RUN_STATISTICS_FILE_NAME).write_text("{}", encoding="utf8")
+    assert load_run_statistics(str(tmp_path)) is None
+
+
+def test_hit_rate_without_lookups() -> None:
+    """Test of the hit rate without lookups."""
+    assert RunStatistics().hit_rate is None
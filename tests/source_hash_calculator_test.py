@@ -2,10 +2,12 @@
 
 import copy
 import pathlib
+import shutil
 
 import pytest
 
 from clang_tidy_checker.config import Config
+from clang_tidy_checker.direct_mode import ManifestStore
 from clang_tidy_checker.source_hash_calculator import SourceHashCalculator
 
 
@@ -25,3 +27,116 @@ async def test_calculate_hash(
         hash3 = await calculator.calculate(input_file1)
         assert hash1 != hash2
         assert hash1 == hash3
+
+
+@pytest.mark.asyncio
+async def test_calculate_hash_without_writing_dependencies(
+    default_config: Config, temp_proj: pathlib.Path
+) -> None:
+    """Test to calculate a hash without overwriting dependency files of builds."""
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+
+    async with SourceHashCalculator(config=config) as calculator:
+        await calculator.calculate(str(temp_proj / "src" / "a.cpp"))
+
+    assert not (temp_proj / "build" / "a.d").exists()
+
+
+@pytest.mark.asyncio
+async def test_calculate_hash_in_direct_mode(
+    default_config: Config,
+    temp_proj: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test to calculate hashes in direct mode."""
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    input_file = str(temp_proj / "src" / "a.cpp")
+    header = temp_proj / "include" / "header.h"
+    manifest_store = ManifestStore(str(temp_proj / "manifests"))
+
+    async with SourceHashCalculator(config=config) as calculator:
+        hash_without_direct_mode = await calculator.calculate(input_file)
+
+    async with SourceHashCalculator(
+        config=config, manifest_store=manifest_store
+    ) as calculator:
+        hash_before_change = await calculator.calculate(input_file)
+    assert hash_before_change == hash_without_direct_mode
+    assert list((temp_proj / "manifests").glob("*/*.json"))
+
+    # Reuse the hash in the manifest without preprocessing.
+    async def fail_to_preprocess(*args, **kwargs) -> str:
+        raise AssertionError("Preprocessing must be skipped.")
+
+    async with SourceHashCalculator(
+        config=config, manifest_store=manifest_store
+    ) as calculator:
+        monkeypatch.setattr(calculator, "_preprocess", fail_to_preprocess)
+        assert await calculator.calculate(input_file) == hash_before_change
+
+    header.write_text("#pragma once\n\nint value(int x);\n", encoding="utf8")
+    async with SourceHashCalculator(
+        config=config, manifest_store=manifest_store
+    ) as calculator:
+        hash_after_change = await calculator.calculate(input_file)
+    assert hash_after_change != hash_before_change
+
+
+@pytest.mark.asyncio
+async def test_calculate_hash_from_dependencies(
+    default_config: Config, temp_proj: pathlib.Path
+) -> None:
+    """Test to calculate hashes from dependencies."""
+    config = copy.deepcopy(default_config)
+    config.build_dir = str(temp_proj / "build")
+    config.hash_method = "dependencies"
+    input_file1 = str(temp_proj / "src" / "a.cpp")
+    input_file2 = str(temp_proj / "src" / "b.cpp")
+
+    async with SourceHashCalculator(config=config) as calculator:
+        hash1 = await calculator.calculate(input_file1)
+        hash2 = await calculator.calculate(input_file2)
+        assert hash1 != hash2
+        assert await calculator.calculate(input_file1) == hash1
+
+    (temp_proj / "include" / "header.h").write_text(
+        "#pragma once\n\nint value(int x);\n", encoding="utf8"
+    )
+    async with SourceHashCalculator(config=config) as calculator:
+        assert await calculator.calculate(input_file1) != hash1
+
+
+def _copy_proj(source_dir: pathlib.Path, dest_dir: pathlib.Path) -> None:
+    """Copy a project rewriting paths in compile_commands.json."""
+    shutil.copytree(source_dir, dest_dir)
+    compile_commands_path = dest_dir / "build" / "compile_commands.json"
+    compile_commands_path.write_text(
+        compile_commands_path.read_text(encoding="utf8").replace(
+            str(source_dir), str(dest_dir)
+        ),
+        encoding="utf8",
+    )
+
+
+@pytest.mark.parametrize("hash_method", ["preprocess", "dependencies"])
+@pytest.mark.asyncio
+async def test_calculate_relocatable_hash(
+    default_config: Config, temp_proj: pathlib.Path, hash_method: str
+) -> None:
+    """Test to calculate hashes independent of directories of projects."""
+    copied_proj = temp_proj.parent / "copied_proj"
+    _copy_proj(temp_proj, copied_proj)
+
+    async def calculate(source_dir: pathlib.Path, relocatable_cache: bool) -> str:
+        config = copy.deepcopy(default_config)
+        config.build_dir = str(source_dir / "build")
+        config.source_root = str(source_dir)
+        config.hash_method = hash_method
+        config.relocatable_cache = relocatable_cache
+        async with SourceHashCalculator(config=config) as calculator:
+            return await calculator.calculate(str(source_dir / "src" / "a.cpp"))
+
+    assert await calculate(temp_proj, False) != await calculate(copied_proj, False)
+    assert await calculate(temp_proj, True) == await calculate(copied_proj, True)
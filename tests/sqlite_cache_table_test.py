@@ -0,0 +1,246 @@
+"""Test of sqlite_cache_table.py."""
+
+import datetime
+import hashlib
+import pathlib
+import sqlite3
+import typing
+
+import pytest
+
+from clang_tidy_checker.cache_table import create_cache_table_at
+from clang_tidy_checker.check_result import CheckResult
+from clang_tidy_checker.sqlite_cache_table import SqliteCacheTable
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def database_path(tmp_path: pathlib.Path) -> str:
+    """Path of the database for tests."""
+    return str(tmp_path / "cache.db")
+
+
+def _count_blobs(filepath: str) -> typing.Dict[str, int]:
+    """Get reference counts of outputs."""
+    with sqlite3.connect(filepath) as connection:
+        return dict(
+            connection.execute(
+                "SELECT blob_hash, ref_count FROM cached_blob"
+            ).fetchall()
+        )
+
+
+def _database_size(filepath: str) -> int:
+    """Get the size of the database including the write-ahead log."""
+    wal_path = pathlib.Path(filepath + "-wal")
+    wal_size = wal_path.stat().st_size if wal_path.exists() else 0
+    return pathlib.Path(filepath).stat().st_size + wal_size
+
+
+def _set_last_used_time(filepath: str, source_hash: str, days_ago: int) -> None:
+    """Set the time of the last use of a result."""
+    used_at = datetime.datetime.now() - datetime.timedelta(days=days_ago)
+    with sqlite3.connect(filepath) as connection:
+        connection.execute(
+            "UPDATE cached_result SET last_used_at = ? WHERE source_hash = ?",
+            (used_at.strftime("%Y-%m-%d %H:%M:%S.%f"), source_hash),
+        )
+
+
+def _create_result(index: int) -> CheckResult:
+    """Create a result with random-like outputs of about 300 bytes compressed."""
+    stdout = "".join(
+        hashlib.sha3_512(f"{index}-{i}".encode()).hexdigest() for i in range(4)
+    )
+    return CheckResult(exit_code=1, stdout=stdout, stderr="")
+
+
+class TestSqliteCacheTable:
+    """Test of SqliteCacheTable class."""
+
+    def test_save_result(self, database_path: str) -> None:
+        """Test to save a result."""
+        table = SqliteCacheTable(database_path, max_cache_entries=100)
+        result = CheckResult(exit_code=12, stdout="Sample output.", stderr="警告")
+
+        table.save(source_hash="abc", result=result)
+        assert table.load(source_hash="abc") == result
+
+        table.flush()
+        assert table.load(source_hash="abc") == result
+        assert table.load(source_hash="def") is None
+        table.close()
+
+        table = SqliteCacheTable(database_path, max_cache_entries=100)
+        assert table.load(source_hash="abc") == result
+
+    def test_load_many_results(self, database_path: str) -> None:
+        """Test to load multiple results at once."""
+        table = SqliteCacheTable(database_path, max_cache_entries=2000)
+        for index in range(1200):
+            table.save(source_hash=f"hash{index}", result=_create_result(index % 10))
+        table.flush()
+        table.save(source_hash="pending", result=_create_result(0))
+
+        loaded_results = table.load_many(
+            [f"hash{index}" for index in range(1200)] + ["pending", "none"]
+        )
+
+        assert len(loaded_results) == 1201
+        assert loaded_results["hash11"] == _create_result(1)
+        assert loaded_results["pending"] == _create_result(0)
+
+    def test_save_same_hash_twice(self, database_path: str) -> None:
+        """Test to save results of the same hash in different batches."""
+        table = SqliteCacheTable(
+            database_path, max_cache_entries=100, write_batch_size=1
+        )
+
+        result = CheckResult(exit_code=0, stdout="", stderr="")
+        table.save(source_hash="abc", result=result)
+        table.save(source_hash="abc", result=result)
+
+        assert table.load(source_hash="abc") == result
+        assert sorted(_count_blobs(database_path).values()) == [2]
+
+    def test_share_same_outputs(self, database_path: str) -> None:
+        """Test to share the same outputs among results."""
+        table = SqliteCacheTable(database_path, max_cache_entries=2)
+
+        shared_result = CheckResult(exit_code=1, stdout="warning", stderr="")
+        table.save(source_hash="hash1", result=shared_result)
+        table.save(source_hash="hash2", result=shared_result)
+        table.flush()
+        assert sorted(_count_blobs(database_path).values()) == [2, 2]
+
+        other_result = CheckResult(exit_code=0, stdout="", stderr="")
+        table.save(source_hash="hash3", result=other_result)
+        table.flush()
+        assert sorted(_count_blobs(database_path).values()) == [1, 3]
+
+        table.save(source_hash="hash4", result=other_result)
+        table.flush()
+        assert sorted(_count_blobs(database_path).values()) == [4]
+        assert table.load(source_hash="hash1") is None
+        assert table.load(source_hash="hash4") == other_result
+
+    def test_remove_least_recently_used_data(self, database_path: str) -> None:
+        """Test to remove least recently used data."""
+        table = SqliteCacheTable(database_path, max_cache_entries=3)
+        for index in range(3):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        assert len(table.load_many(["hash0", "hash1"])) == 2
+        table.flush()
+
+        table.save(source_hash="hash3", result=_create_result(3))
+        table.flush()
+
+        loaded_results = table.load_many([f"hash{i}" for i in range(4)])
+        assert sorted(loaded_results.keys()) == ["hash0", "hash1", "hash3"]
+
+    def test_remove_data_exceeding_max_bytes(self, database_path: str) -> None:
+        """Test to remove data when the total size exceeds the limit."""
+        table = SqliteCacheTable(
+            database_path, max_cache_entries=100, max_cache_bytes=950
+        )
+        for index in range(4):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+            table.flush()
+
+        # Removed below the low-water mark (855 bytes) at once.
+        loaded_results = table.load_many([f"hash{i}" for i in range(4)])
+        assert sorted(loaded_results.keys()) == ["hash2", "hash3"]
+
+    def test_share_database_with_sqlalchemy_backend(self, database_path: str) -> None:
+        """Test to use a database written by the backend using SQLAlchemy."""
+        result1 = CheckResult(exit_code=1, stdout="warning", stderr="")
+        result2 = CheckResult(exit_code=0, stdout="", stderr="")
+
+        sqlalchemy_table = create_cache_table_at(database_path, max_cache_entries=2)
+        sqlalchemy_table.save(source_hash="hash1", result=result1)
+        sqlalchemy_table.flush()
+
+        table = SqliteCacheTable(database_path, max_cache_entries=2)
+        assert table.load(source_hash="hash1") == result1
+        table.save(source_hash="hash2", result=result2)
+        table.flush()
+        table.close()
+
+        sqlalchemy_table = create_cache_table_at(database_path, max_cache_entries=2)
+        assert sqlalchemy_table.load(source_hash="hash2") == result2
+        # The least recently used entry is removed using times in the database.
+        sqlalchemy_table.save(source_hash="hash3", result=result2)
+        sqlalchemy_table.flush()
+        assert sqlalchemy_table.load(source_hash="hash1") is None
+        assert sqlalchemy_table.load(source_hash="hash2") == result2
+
+    def test_get_statistics(self, database_path: str) -> None:
+        """Test to get statistics of entries."""
+        table = SqliteCacheTable(database_path, max_cache_entries=100)
+        for index in range(3):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        _set_last_used_time(database_path, "hash0", days_ago=10)
+
+        statistics = table.get_statistics(
+            [datetime.timedelta(days=1), datetime.timedelta(days=30)]
+        )
+
+        assert statistics.num_entries == 3
+        assert 0 < statistics.total_bytes < 1000
+        assert statistics.age_counts == [2, 1, 0]
+
+    def test_prune(self, database_path: str) -> None:
+        """Test to remove old entries and entries exceeding limits."""
+        table = SqliteCacheTable(database_path, max_cache_entries=100)
+        for index in range(6):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        for index in range(6):
+            _set_last_used_time(database_path, f"hash{index}", days_ago=10 - index)
+
+        result = table.prune(max_age=datetime.timedelta(days=8))
+        assert result.num_removed_entries == 3
+        assert result.freed_bytes > 0
+        result = table.prune(max_entries=2)
+        assert result.num_removed_entries == 1
+        table.prune(max_bytes=1)
+
+        assert not table.load_many([f"hash{i}" for i in range(6)])
+        assert not table.verify()
+
+    def test_compact(self, database_path: str) -> None:
+        """Test to compact the database."""
+        table = SqliteCacheTable(database_path, max_cache_entries=1000)
+        for index in range(500):
+            table.save(source_hash=f"hash{index}", result=_create_result(index))
+        table.flush()
+        table.prune(max_entries=0)
+        size_before = _database_size(database_path)
+
+        table.compact()
+
+        assert _database_size(database_path) < size_before / 2
+
+    def test_verify(self, database_path: str) -> None:
+        """Test to find broken data."""
+        table = SqliteCacheTable(database_path, max_cache_entries=100)
+        table.save(source_hash="hash1", result=_create_result(1))
+        table.save(source_hash="hash2", result=CheckResult(0, "", ""))
+        table.flush()
+        assert not table.verify()
+
+        with sqlite3.connect(database_path) as connection:
+            connection.execute("UPDATE cached_blob SET data = x'00', size = 1")
+            connection.execute("UPDATE cached_blob SET ref_count = 5")
+            connection.execute("DELETE FROM cached_result WHERE source_hash = 'hash2'")
+
+        assert table.verify() == [
+            "2 outputs have wrong reference counts.",
+            "Statistics num_entries is 2, but the actual value is 1.",
+            "Statistics total_bytes is "
+            f"{table.get_statistics([]).total_bytes}, but the actual value is 2.",
+            "2 outputs are broken.",
+        ]
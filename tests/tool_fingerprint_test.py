@@ -0,0 +1,132 @@
+"""Test of tool_fingerprint.py."""
+
+import copy
+import os
+import pathlib
+
+import pytest
+
+from clang_tidy_checker.config import Config
+from clang_tidy_checker.tool_fingerprint import (
+    ClangTidyConfigHasher,
+    calculate_tool_fingerprint,
+    create_cache_key,
+    get_config_files_in_args,
+    hash_executable,
+)
+
+
+@pytest.mark.asyncio
+async def test_calculate_tool_fingerprint(default_config: Config) -> None:
+    """Test to calculate fingerprints of clang-tidy."""
+    fingerprint = await calculate_tool_fingerprint(default_config)
+    assert await calculate_tool_fingerprint(default_config) == fingerprint
+
+    config = copy.deepcopy(default_config)
+    config.extra_args = ["--checks=-*"]
+    assert await calculate_tool_fingerprint(config) != fingerprint
+
+
+@pytest.mark.asyncio
+async def test_calculate_tool_fingerprint_of_installations(
+    default_config: Config, tmp_path: pathlib.Path
+) -> None:
+    """Test that installations of the same clang-tidy have the same fingerprint."""
+    fingerprints = []
+    for index, version in enumerate(["17.0.0", "17.0.0", "18.0.0"]):
+        clang_tidy_path = tmp_path / f"install{index}" / "clang-tidy"
+        clang_tidy_path.parent.mkdir()
+        clang_tidy_path.write_text(
+            f"#!/bin/sh\necho 'LLVM version {version}'\n", encoding="utf8"
+        )
+        clang_tidy_path.chmod(0o755)
+        os.utime(clang_tidy_path, (index * 1000, index * 1000))
+        config = copy.deepcopy(default_config)
+        config.clang_tidy_path = str(clang_tidy_path)
+        fingerprints.append(await calculate_tool_fingerprint(config))
+
+    assert fingerprints[0] == fingerprints[1]
+    assert fingerprints[0] != fingerprints[2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("relocatable_cache", [False, True])
+async def test_calculate_tool_fingerprint_of_builds(
+    default_config: Config, tmp_path: pathlib.Path, relocatable_cache: bool
+) -> None:
+    """Test fingerprints of different builds of the same version of clang-tidy."""
+    fingerprints = []
+    for build in ["first", "second"]:
+        clang_tidy_path = tmp_path / build / "clang-tidy"
+        clang_tidy_path.parent.mkdir()
+        clang_tidy_path.write_text(
+            f"#!/bin/sh\n# {build}\necho 'LLVM version 17.0.0'\n", encoding="utf8"
+        )
+        clang_tidy_path.chmod(0o755)
+        config = copy.deepcopy(default_config)
+        config.clang_tidy_path = str(clang_tidy_path)
+        config.cache_dir = str(tmp_path / "cache")
+        config.relocatable_cache = relocatable_cache
+        fingerprints.append(await calculate_tool_fingerprint(config))
+
+    assert (fingerprints[0] == fingerprints[1]) == relocatable_cache
+
+
+def test_hash_executable(tmp_path: pathlib.Path) -> None:
+    """Test to calculate hashes of executables memoized in the cache directory."""
+    executable = tmp_path / "clang-tidy"
+    executable.write_text("#!/bin/sh\n", encoding="utf8")
+    executable.chmod(0o755)
+    cache_dir = str(tmp_path / "cache")
+
+    executable_hash = hash_executable(str(executable), cache_dir)
+    assert executable_hash is not None
+    assert hash_executable(str(executable)) == executable_hash
+    assert hash_executable(str(tmp_path / "missing")) is None
+
+    # Memoized hashes are used while the size and the time are unchanged.
+    stat = executable.stat()
+    executable.write_text("#!/bin/ss\n", encoding="utf8")
+    os.utime(executable, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert hash_executable(str(executable), cache_dir) == executable_hash
+
+    executable.write_text("#!/bin/sh\n# changed\n", encoding="utf8")
+    assert hash_executable(str(executable), cache_dir) not in (None, executable_hash)
+
+
+def test_get_config_files_in_args() -> None:
+    """Test to get configuration files in arguments."""
+    assert get_config_files_in_args(
+        ["--config-file", "a.yaml", "--quiet", "--config-file=b.yaml"]
+    ) == ["a.yaml", "b.yaml"]
+
+
+def test_clang_tidy_config_hasher(tmp_path: pathlib.Path) -> None:
+    """Test to calculate hashes of configuration files of clang-tidy."""
+    sub_dir = tmp_path / "sub"
+    other_dir = tmp_path / "other"
+    sub_dir.mkdir()
+    other_dir.mkdir()
+    (tmp_path / ".clang-tidy").write_text("Checks: '-*'\n", encoding="utf8")
+
+    hasher = ClangTidyConfigHasher()
+    root_hash = hasher.calculate(str(tmp_path))
+    assert hasher.calculate(str(sub_dir)) == root_hash
+    assert hasher.calculate(str(other_dir)) == root_hash
+    assert hasher.calculate_for_file(str(sub_dir / "a.cpp")) == root_hash
+
+    (sub_dir / ".clang-tidy").write_text("InheritParentConfig: true\n", "utf8")
+    hasher = ClangTidyConfigHasher()
+    assert hasher.calculate(str(sub_dir)) != root_hash
+    assert hasher.calculate(str(other_dir)) == root_hash
+
+
+def test_create_cache_key() -> None:
+    """Test to create keys of caches."""
+    key = create_cache_key(tool_fingerprint="a", config_hash="b", source_hash="c")
+    assert key != create_cache_key(
+        tool_fingerprint="x", config_hash="b", source_hash="c"
+    )
+    assert key != create_cache_key(
+        tool_fingerprint="a", config_hash="x", source_hash="c"
+    )
@@ -0,0 +1,114 @@
+"""Test of tracer.py."""
+
+import asyncio
+import json
+import pathlib
+
+import pytest
+
+from clang_tidy_checker.main import async_main
+from clang_tidy_checker.tracer import (
+    STAGE_CACHE_LOAD,
+    STAGE_CLANG_TIDY,
+    STAGE_HASH_SOURCE,
+    STAGE_LOAD_COMPILE_DATABASE,
+    STAGE_PREPROCESS,
+    STAGE_SEARCH_FILES,
+    Tracer,
+    trace_span,
+    use_tracer,
+)
+
+
+@pytest.mark.asyncio
+async def test_lanes_of_workers():
+    """Test that spans running at once are placed in different lanes."""
+    tracer = Tracer()
+
+    async def work(input_file: str) -> None:
+        with trace_span("stage", input_file):
+            await asyncio.sleep(0.01)
+
+    def work_in_thread(input_file: str) -> None:
+        with trace_span("stage", input_file):
+            pass
+
+    with use_tracer(tracer):
+        await asyncio.gather(work("a.cpp"), work("b.cpp"))
+        await work("c.cpp")
+        await asyncio.to_thread(work_in_thread, "d.cpp")
+
+    lanes = {span.input_file: span.lane for span in tracer.spans}
+    assert sorted([lanes["a.cpp"], lanes["b.cpp"]]) == [0, 1]
+    assert lanes["c.cpp"] == 0
+    assert lanes["d.cpp"] == 0
+
+
+def test_without_tracer():
+    """Test that spans are ignored without tracers."""
+    tracer = Tracer()
+    with use_tracer(tracer):
+        pass
+
+    with trace_span("stage"):
+        pass
+
+    assert not tracer.spans
+
+
+def test_write_chrome_trace_and_timings(tmp_path: pathlib.Path):
+    """Test to write traces and timings."""
+    tracer = Tracer()
+    with use_tracer(tracer):
+        with trace_span("first", "a.cpp"):
+            with trace_span("second"):
+                pass
+
+    trace_path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(str(trace_path))
+    with open(trace_path, mode="r", encoding="utf8") as file:
+        events = json.load(file)["traceEvents"]
+    assert sorted(
+        (event["ph"], event["name"], event["pid"], event["tid"])
+        for event in events
+        if event["ph"] == "X"
+    ) == [("X", "a.cpp", 1, 0), ("X", "second", 2, 0)]
+    assert {
+        event["args"]["name"] for event in events if event["name"] == "process_name"
+    } == {"first", "second"}
+
+    timings = tracer.format_timings()
+    assert "first" in timings
+    assert "Slowest files:" in timings
+    assert "a.cpp" in timings
+
+
+@pytest.mark.asyncio
+async def test_trace_stages_of_run(
+    temp_proj: pathlib.Path, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test to trace stages of a run of checks."""
+    monkeypatch.chdir(temp_proj)
+    tracer = Tracer()
+
+    is_success = await async_main(
+        {
+            "clang_tidy_executable": "true",
+            "build_dir": str(temp_proj / "build"),
+            "file_patterns": ["src/*.cpp"],
+            "cache_dir": str(tmp_path / "cache"),
+            "show_progress": False,
+        },
+        tracer=tracer,
+    )
+
+    assert is_success
+    stages = {span.stage for span in tracer.spans}
+    assert {
+        STAGE_SEARCH_FILES,
+        STAGE_LOAD_COMPILE_DATABASE,
+        STAGE_HASH_SOURCE,
+        STAGE_PREPROCESS,
+        STAGE_CACHE_LOAD,
+        STAGE_CLANG_TIDY,
+    } <= stages